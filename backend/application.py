@@ -1,13 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
 from flask_cors import CORS
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 from datetime import datetime
 import logging
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
 import time
 
+from cassette import MODEL_CASSETTE, MODEL_CASSETTE_MODE, ModelCassette
+from json_repair import continuation_prompt, loads_tolerant, merge_parts, salvage
+from food_alternatives import ALTERNATIVES_K, AlternativesGraph
+from food_facets import FoodFacetIndex
+from food_search import DEFAULT_LIMIT, MAX_LIMIT, FoodSearchIndex, InvalidSearch
+from nutrition_index import NUTRITION_GROUNDING, NutritionIndex, ground_plan, load_food_rows
+from plan_store import PlanStore
+from plan_validator import PLAN_VALIDATION, validate_plan
+from projection import InvalidFields, parse_fields, project
+from serialization import ResponseEncoding, matching_etag, representation_etag
+from structured_logging import RequestIdMiddleware, configure_logging, get_logger, profile_hash
+from tracing import RequestTracing, StageTimer, current_timer
+from monitoring import (
+    RequestInstrumentation, generate_metrics, DIET_PLAN_REQUESTS, DIET_PLAN_GENERATION_TIME, DIET_PLAN_FAILURES,
+    API_INITIALIZATION_STATUS, MODEL_API_CALLS, JSON_PARSE_ERRORS, JSON_REPAIRED, JSON_SALVAGED, JSON_UNRECOVERABLE,
+    PLAN_VALIDATION_ISSUES, FOOD_ITEM_MATCHES, USER_PROFILE_DISTRIBUTION, CALORIE_TARGET_DISTRIBUTION
+)
+
 # Suppress gRPC warnings
 os.environ['GRPC_ENABLE_FORK_SUPPORT'] = '1'
 os.environ['GRPC_POLL_STRATEGY'] = 'poll'
@@ -19,85 +37,63 @@ load_dotenv()
 
 application = Flask(__name__)
 
-# ============= PROMETHEUS METRICS =============
+# 'gemini' (default) or 'fake' for the local stand-in in fake_gemini.py
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'gemini').lower()
+# Follow-up model calls allowed to complete a truncated plan
+PLAN_CONTINUATION_ATTEMPTS = int(os.environ.get('PLAN_CONTINUATION_ATTEMPTS', 2))
+# Alternative Gemini REST endpoint, e.g. http://localhost:8089 for `python fake_gemini.py`
+GEMINI_API_ENDPOINT = os.environ.get('GEMINI_API_ENDPOINT')
 
-# Request metrics
-REQUEST_COUNT = Counter(
-    'flask_app_requests_total', 
-    'Total HTTP requests', 
-    ['method', 'endpoint', 'http_status']
-)
+# Hot paths log through a background queue (see structured_logging.py)
+configure_logging()
+logger = get_logger('api')
+RequestIdMiddleware(application)
 
-REQUEST_LATENCY = Histogram(
-    'flask_app_request_latency_seconds', 
-    'HTTP request latency', 
-    ['method', 'endpoint'],
-    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
-)
+# Request metrics are labelled by matched route rule (see monitoring.py)
+instrumentation = RequestInstrumentation(application)
 
-# Diet plan specific metrics
-DIET_PLAN_REQUESTS = Counter(
-    'diet_plan_requests_total',
-    'Total diet plan generation requests',
-    ['goal', 'diet_preference', 'status']
-)
+# Per-stage Server-Timing / histogram / span breakdown (see tracing.py)
+tracing = RequestTracing(application)
 
-DIET_PLAN_GENERATION_TIME = Histogram(
-    'diet_plan_generation_seconds',
-    'Time taken to generate diet plan',
-    ['goal', 'diet_preference'],
-    buckets=(1.0, 2.0, 5.0, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0)
-)
+# Fast JSON encoder, compression and byte counts (see serialization.py)
+ResponseEncoding(application)
 
-DIET_PLAN_FAILURES = Counter(
-    'diet_plan_failures_total',
-    'Total diet plan generation failures',
-    ['error_type', 'goal']
-)
+# Generated plans, addressable by content hash for conditional GETs
+plan_store = PlanStore()
 
-# API health metrics
-API_INITIALIZATION_STATUS = Gauge(
-    'api_initialization_status',
-    'API initialization status (1=success, 0=failure)'
-)
+# Food dataset indexes, built once per worker
+food_rows = load_food_rows()
+food_search = FoodSearchIndex(food_rows)
+food_facets = FoodFacetIndex.from_rows(food_rows)
+food_alternatives = AlternativesGraph.from_rows(food_rows)
+# Dataset lookup for grounding generated food items
+nutrition_index = NutritionIndex(food_rows) if NUTRITION_GROUNDING != 'off' else None
 
-ACTIVE_REQUESTS = Gauge(
-    'active_requests',
-    'Number of requests currently being processed',
-    ['endpoint']
-)
-
-# Model metrics
-MODEL_API_CALLS = Counter(
-    'gemini_api_calls_total',
-    'Total Gemini API calls',
-    ['model_name', 'status']
-)
-
-JSON_PARSE_ERRORS = Counter(
-    'json_parse_errors_total',
-    'Total JSON parsing errors from AI responses'
-)
+CORS(application)
 
-# User profile metrics
-USER_PROFILE_DISTRIBUTION = Counter(
-    'user_profile_requests',
-    'Distribution of user profiles',
-    ['goal', 'diet_preference', 'activity_level', 'gender']
-)
+class IncompletePlan(ValueError):
+    """Raised when a truncated plan could not be completed"""
 
-CALORIE_TARGET_DISTRIBUTION = Histogram(
-    'calorie_target_distribution',
-    'Distribution of calorie targets generated',
-    buckets=(1000, 1500, 2000, 2500, 3000, 3500, 4000, 5000)
-)
 
-# ============= END METRICS =============
+class DietPlanGenerator:
+    def __init__(self, api_key: str = None, backend: str = MODEL_BACKEND, cassette: str = MODEL_CASSETTE):
+        if cassette and MODEL_CASSETTE_MODE == 'replay':
+            # Recorded responses only; no key or network needed
+            self.model = ModelCassette(path=cassette)
+            self.model_name = self.model.model_name
+            API_INITIALIZATION_STATUS.set(1)
+            logger.info("Replaying model cassette", extra={'cassette': cassette, 'recordings': len(self.model)})
+            return
 
-CORS(application)
+        if backend == 'fake':
+            from fake_gemini import FakeGenerativeModel
+            self.model = FakeGenerativeModel()
+            self.model_name = self.model.model_name
+            API_INITIALIZATION_STATUS.set(1)
+            logger.info("Using fake model backend", extra={'profile': self.model.profile})
+            self._record_to(cassette)
+            return
 
-class DietPlanGenerator:
-    def __init__(self, api_key: str = None):
         if api_key is None:
             # Try to get from environment variables (EB sets these automatically)
             api_key = os.environ.get('GEMINI_API_KEY') or os.getenv('GEMINI_API_KEY')
@@ -106,7 +102,11 @@ class DietPlanGenerator:
                 API_INITIALIZATION_STATUS.set(0)
                 raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        genai.configure(api_key=api_key)
+        if GEMINI_API_ENDPOINT:
+            genai.configure(api_key=api_key, transport='rest',
+                            client_options={'api_endpoint': GEMINI_API_ENDPOINT})
+        else:
+            genai.configure(api_key=api_key)
         
         try:
             available_models = genai.list_models()
@@ -132,21 +132,34 @@ class DietPlanGenerator:
             self.model = genai.GenerativeModel(model_to_use)
             self.model_name = model_to_use
             API_INITIALIZATION_STATUS.set(1)
-            print(f"✓ Using model: {model_to_use}")
+            logger.info("Using model %s", model_to_use)
         except Exception as e:
             self.model = genai.GenerativeModel('gemini-2.5-flash-lite')
             self.model_name = 'gemini-2.5-flash-lite'
             API_INITIALIZATION_STATUS.set(1)
-            print(f"✓ Using fallback model: gemini-2.5-flash-lite")
+            logger.warning("Model discovery failed, using fallback model gemini-2.5-flash-lite")
+        
+        self._record_to(cassette)
+    
+    def _record_to(self, cassette):
+        """Record every model call to the cassette file, if one is configured"""
+        if cassette:
+            self.model = ModelCassette(self.model, cassette, mode='record')
+            logger.info("Recording model cassette", extra={'cassette': cassette})
     
-    def generate_diet_plan(self, user_data: dict) -> dict:
+    def generate_diet_plan(self, user_data: dict, timings: StageTimer = None) -> dict:
         import json
         
         goal = user_data.get('goal', 'Weight Maintenance')
         diet_pref = user_data.get('diet_preference', 'No Preference')
         
+        # Per-stage breakdown; the request's timer when called from a route
+        if timings is None:
+            timings = StageTimer()
+        
         # Start timing
         start_time = time.time()
+        prompt_started = time.perf_counter()
         
         prompt = f"""
 You are a certified nutritionist and fitness expert. Create a detailed, personalized 7-day diet plan based on the following user information and respond ONLY with valid JSON format.
@@ -269,7 +282,7 @@ Return ONLY a valid JSON object with the following structure (no markdown, no ex
   ],
   "hydration_guidelines": {{
     "daily_water_liters": <number>,
-    "water_intake_schedule": ["timing": "liters"]
+    "water_intake_schedule": [{{"timing": "time", "liters": <number>}}]
   }},
   "meal_timing": {{
     "breakfast_time": "time",
@@ -307,27 +320,56 @@ Return ONLY a valid JSON object with the following structure (no markdown, no ex
 
 Important: Return ONLY the JSON object, with no additional text, markdown formatting, or code blocks.
 """
+        timings.record('prompt', time.perf_counter() - prompt_started)
         
         try:
-            print(f"→ Generating diet plan for {goal} goal...")
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            logger.debug("Generating diet plan", extra={'goal': goal})
+            with timings.stage('model_total'):
+                model_started_ns = time.time_ns()
+                model_started = time.perf_counter()
+                # Stream so time-to-first-token can be measured separately
+                response = self.model.generate_content(prompt, stream=True)
+                for _chunk in response:
+                    if model_started is not None:
+                        timings.record('model_ttft', time.perf_counter() - model_started, model_started_ns)
+                        model_started = None
+                response_text = response.text.strip()
             
             # Track successful API call
             MODEL_API_CALLS.labels(model_name=self.model_name, status='success').inc()
             
-            # Remove markdown code blocks if present
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
+            with timings.stage('parse'):
+                # Strips fences and repairs common defects before giving up
+                diet_plan, parse_status = loads_tolerant(response_text)
+            
+            if parse_status != 'clean':
+                JSON_PARSE_ERRORS.inc()
+            if parse_status == 'truncated':
+                with timings.stage('regenerate'):
+                    self._complete_truncated_plan(prompt, diet_plan)
+                JSON_SALVAGED.inc()
+                logger.warning("Salvaged truncated diet plan", extra={'goal': goal})
+            elif parse_status == 'repaired':
+                JSON_REPAIRED.inc()
             
-            response_text = response_text.strip()
+            if nutrition_index is not None:
+                # Replace invented nutrition with dataset values before totals are recomputed
+                with timings.stage('ground'):
+                    grounding = ground_plan(diet_plan, nutrition_index)
+                FOOD_ITEM_MATCHES.labels(match='exact').inc(grounding.exact)
+                FOOD_ITEM_MATCHES.labels(match='fuzzy').inc(grounding.fuzzy)
+                FOOD_ITEM_MATCHES.labels(match='unmatched').inc(grounding.unmatched)
             
-            # Parse JSON response
-            diet_plan = json.loads(response_text)
+            if PLAN_VALIDATION != 'off':
+                # Model totals are recomputed from the food items
+                with timings.stage('plan_validate'):
+                    report = validate_plan(diet_plan)
+                if report.issues:
+                    for kind, _path, _message, corrected in report.issues:
+                        PLAN_VALIDATION_ISSUES.labels(kind=kind, action='corrected' if corrected else 'flagged').inc()
+                    logger.warning("Plan failed validation checks", extra={
+                        'goal': goal, 'issues': report.summary(), 'corrected': report.corrected
+                    })
             
             # Track generation time
             generation_time = time.time() - start_time
@@ -340,55 +382,65 @@ Important: Return ONLY the JSON object, with no additional text, markdown format
             if 'daily_calorie_target' in diet_plan:
                 CALORIE_TARGET_DISTRIBUTION.observe(diet_plan['daily_calorie_target'])
             
-            print(f"✓ Diet plan generated successfully in {generation_time:.2f}s!")
+            logger.info("Diet plan generated", extra={
+                'goal': goal, 'generation_seconds': round(generation_time, 3), 'stages': timings.as_dict()
+            })
             return diet_plan
             
-        except json.JSONDecodeError as e:
-            JSON_PARSE_ERRORS.inc()
+        except (json.JSONDecodeError, IncompletePlan) as e:
+            if isinstance(e, json.JSONDecodeError):
+                JSON_PARSE_ERRORS.inc()
+            JSON_UNRECOVERABLE.inc()
             DIET_PLAN_FAILURES.labels(error_type='json_parse_error', goal=goal).inc()
             DIET_PLAN_REQUESTS.labels(goal=goal, diet_preference=diet_pref, status='failure').inc()
             MODEL_API_CALLS.labels(model_name=self.model_name, status='json_error').inc()
-            print(f"✗ JSON parsing error: {str(e)}")
+            logger.error("JSON parsing error: %s", e, extra={'goal': goal, 'stages': timings.as_dict()})
             raise Exception(f"Error parsing AI response as JSON: {str(e)}")
             
         except Exception as e:
             DIET_PLAN_FAILURES.labels(error_type='generation_error', goal=goal).inc()
             DIET_PLAN_REQUESTS.labels(goal=goal, diet_preference=diet_pref, status='failure').inc()
             MODEL_API_CALLS.labels(model_name=self.model_name, status='error').inc()
-            print(f"✗ Generation error: {str(e)}")
+            logger.error("Generation error: %s", e, extra={'goal': goal, 'stages': timings.as_dict()})
             raise Exception(f"Error generating diet plan: {str(e)}")
+    
+    def _complete_truncated_plan(self, prompt: str, diet_plan: dict):
+        """Keep the complete days of a cut-off plan and generate only what is missing"""
+        missing_days, missing_sections = salvage(diet_plan)
+        
+        for _attempt in range(PLAN_CONTINUATION_ATTEMPTS):
+            if not missing_days and not missing_sections:
+                return
+            try:
+                response = self.model.generate_content(
+                    continuation_prompt(prompt, diet_plan, missing_days, missing_sections)
+                )
+                extra, status = loads_tolerant(response.text)
+            except ValueError as e:
+                MODEL_API_CALLS.labels(model_name=self.model_name, status='json_error').inc()
+                raise IncompletePlan(f"Continuation response was not valid JSON: {e}")
+            MODEL_API_CALLS.labels(model_name=self.model_name, status='success').inc()
+            
+            if status == 'truncated':
+                # A cut-off continuation still contributes its complete parts
+                salvage(extra)
+            missing_days, missing_sections = merge_parts(diet_plan, extra, missing_days, missing_sections)
+        
+        if missing_days or missing_sections:
+            missing = [f'day {day}' for day in missing_days] + missing_sections
+            raise IncompletePlan(f"Plan still incomplete after regeneration: {', '.join(missing)}")
 
 # Initialize generator
 try:
     generator = DietPlanGenerator()
 except Exception as e:
-    print(f"✗ Error initializing API: {e}")
+    logger.error("Error initializing API: %s", e)
     generator = None
 
-@application.before_request
-def start_timer():
-    request.start_time = time.time()
-    # Track active requests
-    ACTIVE_REQUESTS.labels(endpoint=request.path).inc()
-
-@application.after_request
-def record_metrics(response):
-    # Calculate response time
-    resp_time = time.time() - request.start_time
-    
-    # Record metrics
-    REQUEST_LATENCY.labels(request.method, request.path).observe(resp_time)
-    REQUEST_COUNT.labels(request.method, request.path, response.status_code).inc()
-    
-    # Decrement active requests
-    ACTIVE_REQUESTS.labels(endpoint=request.path).dec()
-    
-    return response
-
 @application.route('/metrics')
 def metrics():
     """Prometheus metrics endpoint"""
-    return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+    return generate_metrics(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
 
 @application.route('/')
 def index():
@@ -425,11 +477,15 @@ def create_diet_plan():
                 'message': 'API not properly initialized. Check GEMINI_API_KEY environment variable'
             }), 500
         
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['goal', 'diet_preference', 'age', 'gender', 'weight', 'height', 'activity_level']
-        missing_fields = [field for field in required_fields if field not in data]
+        timings = current_timer()
+        with timings.stage('validation'):
+            data = request.get_json()
+            
+            # Validate required fields
+            required_fields = ['goal', 'diet_preference', 'age', 'gender', 'weight', 'height', 'activity_level']
+            missing_fields = [field for field in required_fields if field not in data]
+            g.profile_hash = profile_hash(data)
+            fields = _requested_fields()
         
         if missing_fields:
             return jsonify({
@@ -446,38 +502,45 @@ def create_diet_plan():
             gender=data.get('gender', 'Unknown')
         ).inc()
         
-        print(f"\n{'='*60}")
-        print(f"📋 New Diet Plan Request")
-        print(f"{'='*60}")
-        print(f"Goal: {data.get('goal')}")
-        print(f"Diet: {data.get('diet_preference')}")
-        print(f"Activity: {data.get('activity_level')}")
-        print(f"{'='*60}\n")
+        logger.info("New diet plan request", extra={
+            'goal': data.get('goal'),
+            'diet_preference': data.get('diet_preference'),
+            'activity_level': data.get('activity_level')
+        })
         
         # Generate diet plan
-        diet_plan = generator.generate_diet_plan(data)
+        diet_plan = generator.generate_diet_plan(data, timings)
+        if not isinstance(diet_plan, dict):
+            diet_plan = {}
+        plan_id = plan_store.put(diet_plan)
         
-        return jsonify({
-            'status': 'success',
-            'message': 'Diet plan generated successfully',
-            'timestamp': datetime.now().isoformat(),
-            'user_profile': {
-                'goal': data.get('goal'),
-                'diet_preference': data.get('diet_preference'),
-                'age': data.get('age'),
-                'gender': data.get('gender'),
-                'weight': data.get('weight'),
-                'height': data.get('height'),
-                'activity_level': data.get('activity_level'),
-                'allergies': data.get('allergies', 'None'),
-                'dislikes': data.get('dislikes', 'None'),
-                'meals_per_day': data.get('meals_per_day', 3)
-            },
-            'diet_plan': diet_plan if isinstance(diet_plan, dict) else {}
-        }), 200
+        with timings.stage('serialize'):
+            response = jsonify({
+                'status': 'success',
+                'message': 'Diet plan generated successfully',
+                'timestamp': datetime.now().isoformat(),
+                'user_profile': {
+                    'goal': data.get('goal'),
+                    'diet_preference': data.get('diet_preference'),
+                    'age': data.get('age'),
+                    'gender': data.get('gender'),
+                    'weight': data.get('weight'),
+                    'height': data.get('height'),
+                    'activity_level': data.get('activity_level'),
+                    'allergies': data.get('allergies', 'None'),
+                    'dislikes': data.get('dislikes', 'None'),
+                    'meals_per_day': data.get('meals_per_day', 3)
+                },
+                'plan_id': plan_id,
+                'diet_plan': project(diet_plan, fields)
+            })
+        return response, 200
+    
+    except InvalidFields as e:
+        return _bad_fields(e)
     
     except Exception as e:
-        print(f"✗ Error: {str(e)}")
+        logger.error("Diet plan request failed: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e),
@@ -495,21 +558,25 @@ def quick_diet_plan():
                 'message': 'API not properly initialized'
             }), 500
         
-        data = request.get_json()
-        
-        # Use default values for optional fields
-        user_data = {
-            'goal': data.get('goal', 'Weight Maintenance'),
-            'diet_preference': data.get('diet_preference', 'No Preference'),
-            'age': data.get('age', '30'),
-            'gender': data.get('gender', 'M'),
-            'weight': data.get('weight', '70'),
-            'height': data.get('height', '175'),
-            'activity_level': data.get('activity_level', 'Moderately Active'),
-            'allergies': data.get('allergies', 'None'),
-            'dislikes': data.get('dislikes', 'None'),
-            'meals_per_day': data.get('meals_per_day', 3)
-        }
+        timings = current_timer()
+        with timings.stage('validation'):
+            data = request.get_json()
+            
+            # Use default values for optional fields
+            user_data = {
+                'goal': data.get('goal', 'Weight Maintenance'),
+                'diet_preference': data.get('diet_preference', 'No Preference'),
+                'age': data.get('age', '30'),
+                'gender': data.get('gender', 'M'),
+                'weight': data.get('weight', '70'),
+                'height': data.get('height', '175'),
+                'activity_level': data.get('activity_level', 'Moderately Active'),
+                'allergies': data.get('allergies', 'None'),
+                'dislikes': data.get('dislikes', 'None'),
+                'meals_per_day': data.get('meals_per_day', 3)
+            }
+            g.profile_hash = profile_hash(user_data)
+            fields = _requested_fields()
         
         # Track user profile
         USER_PROFILE_DISTRIBUTION.labels(
@@ -519,15 +586,24 @@ def quick_diet_plan():
             gender=user_data['gender']
         ).inc()
         
-        diet_plan = generator.generate_diet_plan(user_data)
+        diet_plan = generator.generate_diet_plan(user_data, timings)
+        if not isinstance(diet_plan, dict):
+            diet_plan = {}
+        plan_id = plan_store.put(diet_plan)
         
-        return jsonify({
-            'status': 'success',
-            'message': 'Quick diet plan generated',
-            'timestamp': datetime.now().isoformat(),
-            'user_profile': user_data,
-            'diet_plan': diet_plan if isinstance(diet_plan, dict) else {}
-        }), 200
+        with timings.stage('serialize'):
+            response = jsonify({
+                'status': 'success',
+                'message': 'Quick diet plan generated',
+                'timestamp': datetime.now().isoformat(),
+                'user_profile': user_data,
+                'plan_id': plan_id,
+                'diet_plan': project(diet_plan, fields)
+            })
+        return response, 200
+    
+    except InvalidFields as e:
+        return _bad_fields(e)
     
     except Exception as e:
         return jsonify({
@@ -536,6 +612,94 @@ def quick_diet_plan():
         }), 500
 
 
+def _requested_fields():
+    """Parsed ``?fields=`` projection, or None for the full representation"""
+    spec = request.args.get('fields')
+    return parse_fields(spec) if spec else None
+
+
+def _not_modified(etag):
+    response = application.response_class(status=304)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _bad_fields(error):
+    return jsonify({
+        'status': 'error',
+        'message': str(error)
+    }), 400
+
+
+@application.route('/api/diet-plan/<plan_id>', methods=['GET'])
+def get_diet_plan(plan_id):
+    """Fetch a previously generated diet plan (supports If-None-Match and ?fields=)"""
+    try:
+        fields = _requested_fields()
+    except InvalidFields as e:
+        return _bad_fields(e)
+    
+    # The plan id is the content hash, so a matching tag needs no lookup
+    etag = representation_etag(plan_id, request.args.get('fields', ''))
+    matched = matching_etag(etag)
+    if matched is not None:
+        return _not_modified(matched)
+    
+    diet_plan = plan_store.get(plan_id)
+    if diet_plan is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Diet plan not found'
+        }), 404
+    
+    response = jsonify({
+        'status': 'success',
+        'plan_id': plan_id,
+        'diet_plan': project(diet_plan, fields)
+    })
+    response.set_etag(etag)
+    return response
+
+
+@application.route('/api/diet-plan/<plan_id>/days/<int:day>', methods=['GET'])
+def get_diet_plan_day(plan_id, day):
+    """Fetch a single day (1-7) of a stored diet plan"""
+    try:
+        fields = _requested_fields()
+    except InvalidFields as e:
+        return _bad_fields(e)
+    
+    etag = representation_etag(plan_id, f'day={day}', request.args.get('fields', ''))
+    matched = matching_etag(etag)
+    if matched is not None:
+        return _not_modified(matched)
+    
+    diet_plan = plan_store.get(plan_id)
+    if diet_plan is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Diet plan not found'
+        }), 404
+    
+    days = diet_plan.get('meal_plan') or []
+    plan_day = next((d for d in days if isinstance(d, dict) and d.get('day') == day), None)
+    if plan_day is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Day {day} not found in diet plan',
+            'available_days': [d.get('day') for d in days if isinstance(d, dict)]
+        }), 404
+    
+    response = jsonify({
+        'status': 'success',
+        'plan_id': plan_id,
+        'day': project(plan_day, fields)
+    })
+    response.set_etag(etag)
+    return response
+
+
 @application.route('/api/options', methods=['GET'])
 def get_options():
     """Get available options for diet plan generation"""
@@ -548,6 +712,99 @@ def get_options():
     }), 200
 
 
+@application.route('/api/foods/search', methods=['GET'])
+def search_foods():
+    """Autocomplete dish names (?q=), optionally filtered by veg_nonveg, region, meal_category or is_* flags"""
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return _bad_search('limit must be an integer')
+    
+    filters = {name: request.args[name] for name in food_search.filter_names if name in request.args}
+    try:
+        with current_timer().stage('search'):
+            matches = food_search.search(query, filters, limit)
+    except InvalidSearch as e:
+        return _bad_search(str(e))
+    
+    return jsonify({
+        'status': 'success',
+        'query': query,
+        'count': len(matches),
+        'results': [food_search.describe(row_id, match) for row_id, match in matches]
+    }), 200
+
+
+@application.route('/api/foods', methods=['GET'])
+def list_foods():
+    """Filter the food catalog with facet counts (category, is_* flag and <nutrient>_min/_max filters)"""
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+    except ValueError:
+        return _bad_search('page and per_page must be integers')
+    
+    try:
+        with current_timer().stage('query'):
+            total, row_ids, facets, flags = food_facets.query(
+                request.args, offset=(page - 1) * per_page, limit=per_page, sort=request.args.get('sort')
+            )
+    except InvalidSearch as e:
+        return _bad_search(str(e))
+    
+    return jsonify({
+        'status': 'success',
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'results': [food_search.describe(row_id) for row_id in row_ids],
+        'facets': facets,
+        'flags': flags
+    }), 200
+
+
+@application.route('/api/foods/<int:food_id>/alternatives', methods=['GET'])
+def food_alternatives_for(food_id):
+    """Dishes of the same veg_nonveg group closest in nutrients and calories to a food (ids as in /api/foods)
+
+    The graph keeps ALTERNATIVES_K neighbors per dish, so limit is capped at that.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', ALTERNATIVES_K)), 1), ALTERNATIVES_K)
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'limit must be an integer'
+        }), 400
+    
+    if not 0 <= food_id < len(food_rows):
+        return jsonify({
+            'status': 'error',
+            'message': f'Food {food_id} not found'
+        }), 404
+    
+    with current_timer().stage('alternatives'):
+        alternatives = food_alternatives.alternatives(food_id, limit)
+    
+    return jsonify({
+        'status': 'success',
+        'food': food_search.describe(food_id),
+        'dataset_version': food_alternatives.version,
+        'count': len(alternatives),
+        'results': [dict(food_search.describe(row_id), distance=round(distance, 4))
+                    for row_id, distance in alternatives]
+    }), 200
+
+
+def _bad_search(message):
+    return jsonify({
+        'status': 'error',
+        'message': message,
+        'filters': list(food_search.filter_names)
+    }), 400
+
+
 @application.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -559,7 +816,12 @@ def not_found(error):
             'GET /api/options',
             'GET /metrics',
             'POST /api/diet-plan',
-            'POST /api/diet-plan/quick'
+            'POST /api/diet-plan/quick',
+            'GET /api/diet-plan/<plan_id>',
+            'GET /api/diet-plan/<plan_id>/days/<n>',
+            'GET /api/foods',
+            'GET /api/foods/<id>/alternatives',
+            'GET /api/foods/search?q='
         ]
     }), 404
 
@@ -573,6 +835,10 @@ def server_error(error):
     }), 500
 
 
+# Bind request metric children for every route once all routes are registered
+instrumentation.bind_routes()
+
+
 if __name__ == '__main__':
     # Get port from environment variable (EB uses PORT environment variable)
     port = int(os.environ.get('PORT', 8000))
@@ -589,6 +855,10 @@ if __name__ == '__main__':
     - GET  /api/options             → Available options
     - POST /api/diet-plan           → Generate full diet plan
     - POST /api/diet-plan/quick     → Quick diet plan
+    - GET  /api/diet-plan/<plan_id> → Stored diet plan
+    - GET  /api/diet-plan/<plan_id>/days/<n> → One day of a stored plan
+    - GET  /api/foods               → Faceted food catalog query
+    - GET  /api/foods/search?q=     → Dish search / autocomplete
     - GET  /metrics                 → Prometheus metrics
     
     🔗 Base URL: http://localhost:{port}
@@ -0,0 +1,266 @@
+"""
+Weekly meal plans for many profiles at once.
+
+BatchMealPlanner produces the same plans as running WeeklyMealPlanner per
+profile, with the per-profile work turned into array operations:
+
+* a profile's preference mask per slot (food type, regions,
+  restrictions, dislikes, meal category) and its score weights per slot
+  (goal, restrictions) are computed once per distinct combination and
+  shared by every profile that has it,
+* calorie targets are computed for all profiles from the planner's
+  distribution table, and for each meal slot the candidates of every
+  profile having that slot form one profiles x foods mask (preference
+  mask rows AND calorie band),
+* goal scoring for a chunk is one matrix product (the distinct weight
+  vectors x features^T), gathered into a profiles x foods score matrix
+  per slot, and every profile's best candidates come from one
+  argpartition over it,
+* only the variety-constrained pick - skipping dishes already used that
+  day or in the current three-day window - stays a Python loop, over the
+  top few candidates per slot.
+
+Profiles are processed in chunks so the profiles x foods matrices stay
+bounded; ``iter_plans`` yields plans in submission order as chunks finish.
+"""
+
+import numpy as np
+
+from blockwise import BLOCK_CELLS, row_blocks, smallest_k
+from food_catalog import MealSelection
+from main import WeeklyMealPlanner
+from meal_candidates import POOL_TOP_K
+
+DEFAULT_MEAL_CALORIES = 300
+
+# Row marker for a slot planned with the planner's fallback meal
+FALLBACK = -1
+
+
+def _preference_key(profile):
+    return (
+        profile.get('food_type', 'Non-Vegetarian') in ('Vegetarian', 'Vegan'),
+        tuple(profile.get('regional_preferences', ['Pan Indian']) or ()),
+        tuple(profile.get('dietary_restrictions', [])),
+        tuple(profile.get('dislikes', [])),
+    )
+
+
+def _schedule_key(profile):
+    meal_frequency = profile.get('meal_frequency', 3)
+    # Exercise only moves the pre-breakfast time, which needs five meals
+    fasted = meal_frequency >= 5 and bool(profile.get('exercises', False)) and (
+        profile.get('exercise_time', 'morning_fed') == 'morning_fasted')
+    return meal_frequency, fasted
+
+
+class _Schedule:
+    """Meal slots, times and calorie shares shared by profiles with one meal frequency"""
+
+    __slots__ = ('planner', 'slots', 'times', 'shares')
+
+    def __init__(self, planner):
+        self.planner = planner
+        self.slots = list(planner.meal_schedule)
+        self.times = [planner.meal_schedule[slot] for slot in self.slots]
+        distribution = WeeklyMealPlanner.CALORIE_DISTRIBUTIONS.get(planner.user_profile.get('meal_frequency', 3))
+        if distribution is None:
+            # Equal distribution for custom frequencies
+            distribution = {slot: 1.0 / len(self.slots) for slot in self.slots}
+        # Slots without a share plan for the planner's default calories (NaN here)
+        self.shares = np.array([distribution.get(slot, np.nan) for slot in self.slots])
+
+
+class BatchMealPlanner:
+    """Plan many profiles against one FoodCandidateIndex"""
+
+    def __init__(self, food_index, chunk_cells=BLOCK_CELLS):
+        self.food_index = food_index
+        self.chunk_cells = chunk_cells
+        self.calories = np.nan_to_num(food_index.catalog.numeric['calories_(kcal)'])
+        self._schedules = {}
+        self._masks = {}
+        self._mask_rows = []
+        self._weights = {}
+        self._weight_rows = []
+        self._fallbacks = {}
+
+    # ============= SHARED PER-COMBINATION STATE =============
+
+    def _schedule(self, profile):
+        key = _schedule_key(profile)
+        schedule = self._schedules.get(key)
+        if schedule is None:
+            schedule = self._schedules[key] = _Schedule(WeeklyMealPlanner(profile, None, self.food_index))
+        return schedule
+
+    def _slot_ids(self, profile, schedule):
+        """(preference mask id, weight id) per slot of the profile's schedule"""
+        preference = _preference_key(profile)
+        goal = (profile.get('health_goal', 'weight_maintenance'), preference[2])
+        ids = []
+        planner = None
+        for slot in schedule.slots:
+            mask_id = self._masks.get((preference, slot))
+            weight_id = self._weights.get((goal, slot))
+            if mask_id is None or weight_id is None:
+                planner = planner or WeeklyMealPlanner(profile, None, self.food_index)
+            if mask_id is None:
+                mask_id = self._masks[(preference, slot)] = len(self._mask_rows)
+                self._mask_rows.append(self.food_index.mask(planner._preference_candidates(slot)))
+            if weight_id is None:
+                weight_id = self._weights[(goal, slot)] = len(self._weight_rows)
+                self._weight_rows.append(planner._score_weights(slot))
+            ids.append((mask_id, weight_id))
+        return ids
+
+    def calorie_targets(self, schedule, target_calories):
+        """Profiles x slots targets, as WeeklyMealPlanner._calculate_calorie_distribution computes them"""
+        targets = np.trunc(np.asarray(target_calories, dtype=np.float64)[:, None] * schedule.shares[None, :])
+        return np.where(np.isnan(targets), DEFAULT_MEAL_CALORIES, targets).astype(np.int64)
+
+    def score_matrix(self, weight_ids):
+        """Weight vectors x foods scores, one matrix product"""
+        weights = np.stack([self._weight_rows[weight_id] for weight_id in weight_ids])
+        return weights @ self.food_index.features.T
+
+    # ============= PLANNING =============
+
+    def plan(self, profiles):
+        """Weekly plans for profiles, in order"""
+        return list(self.iter_plans(profiles))
+
+    def iter_plans(self, profiles):
+        """Yield each profile's weekly plan, in order, one chunk at a time"""
+        profiles = list(profiles)
+        for start, stop in row_blocks(len(profiles), self.food_index.size, self.chunk_cells):
+            yield from self.plan_chunk(profiles[start:stop])
+
+    def plan_chunk(self, profiles):
+        """Weekly plans for one chunk of profiles"""
+        schedules, targets, rows = self.select_chunk(profiles)
+        return [self.materialize(schedule, target, row)
+                for schedule, target, row in zip(schedules, targets, rows)]
+
+    def select_chunk(self, profiles):
+        """(schedules, calorie targets per slot, chosen rows per day and slot - FALLBACK if none) per profile"""
+        schedules = [self._schedule(profile) for profile in profiles]
+        slot_ids = [self._slot_ids(profile, schedule) for profile, schedule in zip(profiles, schedules)]
+
+        targets = [None] * len(profiles)
+        by_schedule = {}
+        for position, schedule in enumerate(schedules):
+            by_schedule.setdefault(id(schedule), (schedule, []))[1].append(position)
+        for schedule, positions in by_schedule.values():
+            rows = self.calorie_targets(schedule, [profiles[p]['target_calories'] for p in positions])
+            for position, row in zip(positions, rows.tolist()):
+                targets[position] = row
+
+        # Every (profile, slot) pair, grouped by meal type
+        members = {}
+        for position, schedule in enumerate(schedules):
+            for slot, meal_type in enumerate(schedule.slots):
+                members.setdefault(meal_type, []).append((position, slot))
+
+        weight_ids = sorted({weight_id for ids in slot_ids for _mask_id, weight_id in ids})
+        scores = self.score_matrix(weight_ids)
+        score_row = {weight_id: row for row, weight_id in enumerate(weight_ids)}
+
+        rankings = [[None] * len(schedule.slots) for schedule in schedules]
+        for pairs in members.values():
+            self._rank(pairs, slot_ids, targets, scores, score_row, rankings)
+
+        names = self.food_index.names
+        rows = [self._select(schedule, ranking, names) for schedule, ranking in zip(schedules, rankings)]
+        return schedules, targets, rows
+
+    def _rank(self, pairs, slot_ids, targets, scores, score_row, rankings):
+        """Best-first candidates for every (profile, slot) pair of one meal type"""
+        mask_ids = [slot_ids[position][slot][0] for position, slot in pairs]
+        weight_rows = [score_row[slot_ids[position][slot][1]] for position, slot in pairs]
+        slot_targets = np.array([targets[position][slot] for position, slot in pairs], dtype=np.float64)
+
+        low, high = WeeklyMealPlanner.CALORIE_BAND
+        band = np.where(slot_targets <= 0, DEFAULT_MEAL_CALORIES, slot_targets)[:, None]
+        # Bounds rounded to float32 like FoodCandidateIndex.calorie_band's binary search
+        calorie_min = (band * low).astype(np.float32)
+        calorie_max = (band * high).astype(np.float32)
+        calories = self.calories[None, :]
+        candidates = np.stack([self._mask_rows[mask_id] for mask_id in mask_ids])
+        candidates &= (calories >= calorie_min) & (calories <= calorie_max) & (calories > 0)
+
+        pair_scores = scores[weight_rows]
+        masked = np.where(candidates, -pair_scores, np.inf)
+        counts = candidates.sum(axis=1).tolist()
+        k = min(POOL_TOP_K, self.food_index.size)
+        # Ties keep dataset order, as in CandidatePool.ranked
+        top = smallest_k(masked, k)[0].tolist()
+
+        for row, (position, slot) in enumerate(pairs):
+            count = counts[row]
+            if count:
+                # The top k is the whole pool when it fits; otherwise keep what a full ranking would need
+                rest = None if count <= k else (candidates[row], pair_scores[row])
+                rankings[position][slot] = (top[row][:count], rest)
+
+    def _fallback_meal(self, planner, meal_type, calorie_target):
+        """The planner's fallback meal, built once per meal type and target; plans get copies"""
+        key = (meal_type, calorie_target)
+        meal = self._fallbacks.get(key)
+        if meal is None:
+            meal = self._fallbacks[key] = planner._create_fallback_meal(meal_type, calorie_target)
+        return meal
+
+    def _select(self, schedule, rankings, names):
+        """One profile's chosen rows per day and slot, choosing like WeeklyMealPlanner.generate_weekly_plan"""
+        week = []
+        used_foods_global = set()
+        for day_num in range(len(schedule.planner.days)):
+            day = []
+            used_foods_daily = set()
+            for ranking in rankings:
+                if ranking is None:
+                    day.append(FALLBACK)
+                    continue
+                row = _pick(ranking, names, used_foods_daily, used_foods_global)
+                day.append(row)
+                used_foods_daily.add(names[row])
+                used_foods_global.add(names[row])
+            week.append(day)
+            # Reset global tracking every 3 days for some repetition
+            if (day_num + 1) % 3 == 0:
+                used_foods_global = set()
+        return week
+
+    def materialize(self, schedule, targets, rows):
+        """Weekly plan dict from select_chunk's rows for one profile"""
+        planner = schedule.planner
+        catalog = self.food_index.catalog
+        # Per slot once, not per day: (meal type, time, target, fallback meal)
+        slots = [(meal_type, time, target, self._fallback_meal(planner, meal_type, target))
+                 for meal_type, time, target in zip(schedule.slots, schedule.times, targets)]
+        weekly_plan = {}
+        for day, day_rows in zip(planner.days, rows):
+            weekly_plan[day] = {
+                meal_type: fallback.copy() if row == FALLBACK else MealSelection(catalog, row, time, target)
+                for (meal_type, time, target, fallback), row in zip(slots, day_rows)
+            }
+        return weekly_plan
+
+
+def _pick(ranking, names, used_daily, used_global):
+    top, rest = ranking
+    for row in top:
+        name = names[row]
+        if name not in used_daily and name not in used_global:
+            return row
+    if rest is None:
+        return top[0]
+    # Every top candidate already used: rank the whole pool
+    candidates, scores = rest
+    rows = np.flatnonzero(candidates)
+    for row in rows[np.argsort(-scores[rows], kind='stable')].tolist():
+        name = names[row]
+        if name not in used_daily and name not in used_global:
+            return row
+    return top[0]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark of BatchMealPlanner against planning profiles one at a time.
+
+Generates random user profiles (goal, meal frequency, food type, regions,
+restrictions, dislikes, body metrics), plans all of them with the batch
+planner, plans a sample with WeeklyMealPlanner for the per-profile rate,
+and reports how many of the sample's dishes agree.
+
+Usage: python bench_batch_planner.py [profiles] [sample]
+"""
+
+import random
+import sys
+import time
+
+from batch_planner import BatchMealPlanner
+from bench_meal_planner import load_dataset
+from main import WeeklyMealPlanner
+
+GOALS = ['weight_loss', 'weight_gain', 'muscle_gain', 'weight_maintenance']
+ACTIVITY = ['sedentary', 'lightly_active', 'moderately_active', 'very_active', 'extremely_active']
+REGIONS = [['Pan Indian'], ['North Indian'], ['South Indian'], ['North Indian', 'South Indian'],
+           ['East Indian', 'West Indian']]
+RESTRICTIONS = [[], [], ['is_gluten_free'], ['is_high_protein'], ['is_diabetic_friendly', 'is_low_sodium'],
+                ['is_vegan']]
+DISLIKES = [[], [], ['paneer'], ['egg', 'fish'], ['okra', 'karela']]
+
+
+def random_profiles(system, count, seed=11):
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        user_data = {
+            'age': rng.randint(18, 70), 'gender': rng.choice(['male', 'female']),
+            'weight': rng.uniform(45, 110), 'height': rng.uniform(150, 195),
+            'activity_level': rng.choice(ACTIVITY), 'health_goal': rng.choice(GOALS),
+            'meal_frequency': rng.choice([3, 4, 5, 6]),
+            'food_type': rng.choice(['Vegetarian', 'Non-Vegetarian', 'Vegan']),
+            'regional_preferences': rng.choice(REGIONS),
+            'dietary_restrictions': rng.choice(RESTRICTIONS), 'dislikes': rng.choice(DISLIKES),
+            'exercises': rng.random() < 0.5, 'exercise_time': rng.choice(['morning_fed', 'morning_fasted']),
+        }
+        profiles.append(system.create_comprehensive_profile(user_data))
+    return profiles
+
+
+def dishes(plan):
+    return [meal['dish_name'] for day in plan.values() for meal in day.values()]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    system = load_dataset()
+    system._build_food_index()
+    profiles = random_profiles(system, count)
+
+    started = time.perf_counter()
+    plans = BatchMealPlanner(system.food_index).plan(profiles)
+    batch = time.perf_counter() - started
+
+    started = time.perf_counter()
+    singles = [WeeklyMealPlanner(profile, system.food_df, system.food_index).generate_weekly_plan()
+               for profile in profiles[:sample]]
+    single = (time.perf_counter() - started) / sample
+
+    same = total = 0
+    for plan, reference in zip(plans, singles):
+        pairs = list(zip(dishes(plan), dishes(reference)))
+        same += sum(a == b for a, b in pairs)
+        total += len(pairs)
+
+    print(f"{count} profiles x {len(system.food_df)} foods: batch {batch:.2f} s "
+          f"({batch / count * 1e6:.0f} us/profile); one at a time {single * 1e3:.2f} ms/profile "
+          f"(~{single * count:.1f} s for all); {same}/{total} sampled meals agree")
+
+
+if __name__ == '__main__':
+    main()
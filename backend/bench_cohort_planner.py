@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark of CohortPlanner (process pool over shared food arrays).
+
+Plans a synthetic cohort of random profiles with BatchMealPlanner in this
+process, then with CohortPlanner at 1, 2, 4, ... workers up to the core
+count. For each it times iter_selections (the pooled work) with the CPU
+time the parent spent in it, then building every plan dict from the
+selections one by one as iter_plans does (the part that stays serial),
+reports the speedup over one worker, and checks how many plans agree
+with the in-process batch.
+
+Usage: python bench_cohort_planner.py [profiles] [max_workers]
+"""
+
+import os
+import sys
+import time
+
+from batch_planner import BatchMealPlanner
+from bench_batch_planner import dishes, random_profiles
+from bench_meal_planner import load_dataset
+from cohort_planner import CohortPlanner
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    system = load_dataset()
+    system._build_food_index()
+    profiles = random_profiles(system, count)
+
+    started = time.perf_counter()
+    reference = [dishes(plan) for plan in BatchMealPlanner(system.food_index).iter_plans(profiles)]
+    print(f"{count} profiles x {len(system.food_df)} foods: in-process batch {time.perf_counter() - started:.2f} s")
+
+    counts = sorted({min(1 << power, max_workers) for power in range(max_workers.bit_length() + 1)})
+    baseline = None
+    for workers in counts:
+        with CohortPlanner(system.food_index, workers=workers) as cohort:
+            started, parent = time.perf_counter(), time.process_time()
+            selections = list(cohort.iter_selections(profiles))
+            elapsed, parent = time.perf_counter() - started, time.process_time() - parent
+        # Streamed, as iter_plans yields them (keeping every plan would time the garbage collector)
+        started = time.perf_counter()
+        for selection in selections:
+            selection.weekly_plan()
+        building = time.perf_counter() - started
+        same = sum(dishes(selection.weekly_plan()) == expected for selection, expected in zip(selections, reference))
+        baseline = baseline or elapsed
+        print(f"{workers} worker(s): selections {elapsed:.2f} s (parent CPU {parent:.2f} s), "
+              f"speedup {baseline / elapsed:.2f}x ({baseline / elapsed / workers:.0%} of linear); "
+              f"plan dicts +{building:.2f} s; {same}/{count} plans agree")
+    print(f"{os.cpu_count()} core(s) available")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark of DishSimilarity and maximal-marginal-relevance selection.
+
+Builds the neighbor lists for indian_food_nutrition.csv and a synthetic
+dataset resampled from it, then plans random profiles with and without
+the similarity (greedy and day-fitted), and reports the mean similarity
+of each chosen dish to the most similar dish chosen before it in its
+three-day window, how many dishes a window holds, and the time per plan.
+
+Usage: python bench_dish_similarity.py [profiles] [synthetic_rows]
+"""
+
+import statistics
+import sys
+import time
+
+from bench_batch_planner import random_profiles
+from bench_meal_planner import load_dataset, synthetic_dataset
+from dish_similarity import DishSimilarity, DiversityPenalty
+from food_catalog import FoodCatalog, MealSelection
+from main import WeeklyMealPlanner
+from meal_candidates import FoodCandidateIndex
+
+
+def window_similarity(plan, similarity):
+    """Mean similarity of each planned dish to the closest earlier dish of its window"""
+    penalty = DiversityPenalty(similarity)
+    values = []
+    for day_num, daily_plan in enumerate(plan.values()):
+        for meal in daily_plan.values():
+            if isinstance(meal, MealSelection):
+                values.append(float(penalty[meal.row]))
+                penalty.add(meal.row)
+        if (day_num + 1) % 3 == 0:
+            penalty.reset()
+    return statistics.mean(values) if values else 0.0
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    system = load_dataset()
+    system._build_food_index()
+    profiles = random_profiles(system, count)
+    synthetic = synthetic_dataset(system.food_df, size)
+
+    for label, food_df, food_index in (
+        (f'dataset ({len(system.food_df)} rows)', system.food_df, system.food_index),
+        (f'synthetic ({size} rows)', synthetic, FoodCandidateIndex(FoodCatalog.from_frame(synthetic))),
+    ):
+        started = time.perf_counter()
+        similarity = DishSimilarity(food_index)
+        print(f"{label}: neighbor lists built in {time.perf_counter() - started:.2f} s, "
+              f"{similarity.nbytes / 1e6:.2f} MB")
+
+        for fit_days in (False, True):
+            for diverse in (None, similarity):
+                started = time.perf_counter()
+                plans = [WeeklyMealPlanner(profile, food_df, food_index, fit_days=fit_days,
+                                           similarity=diverse).generate_weekly_plan() for profile in profiles]
+                elapsed = (time.perf_counter() - started) / count
+                mode = ('fitted' if fit_days else 'greedy') + (' + MMR' if diverse is not None else '')
+                distinct = statistics.mean(
+                    len({meal['dish_name'] for day in list(plan.values())[start:start + 3] for meal in day.values()})
+                    for plan in plans for start in (0, 3, 6)
+                )
+                print(f"  {mode}: window similarity {statistics.mean(window_similarity(p, similarity) for p in plans):.3f}, "
+                      f"{distinct:.1f} distinct dishes per window, {elapsed * 1e3:.2f} ms/plan")
+
+
+if __name__ == '__main__':
+    main()
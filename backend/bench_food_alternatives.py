@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the AlternativesGraph against the DataFrame scans it replaced.
+
+Builds the graph for indian_food_nutrition.csv and a synthetic dataset
+resampled from it, then looks up alternatives for every meal of random
+weekly plans: once with the CLI's old calorie-band scan over the whole
+DataFrame, once by walking the graph. Reports build time, graph size,
+time per lookup, how often a lookup finds three alternatives, and how far
+they are in calories and nutrients from the meal they replace.
+
+Usage: python bench_food_alternatives.py [profiles] [synthetic_rows]
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from bench_batch_planner import random_profiles
+from bench_meal_planner import load_dataset, synthetic_dataset
+import food_alternatives
+from food_alternatives import AlternativesGraph
+from food_catalog import FoodCatalog, MealSelection
+from main import WeeklyMealPlanner
+from meal_candidates import FoodCandidateIndex
+
+TOLERANCE = 0.3
+LIMIT = 3
+
+
+def scan(food_df, meal, vegetarian):
+    """Row labels the old _show_alternatives scan offered (first LIMIT instead of a random sample)"""
+    calories = meal.get('calories', 300)
+    alternatives = food_df[
+        (food_df['calories_(kcal)'] >= calories * (1 - TOLERANCE)) &
+        (food_df['calories_(kcal)'] <= calories * (1 + TOLERANCE))
+    ]
+    if vegetarian:
+        alternatives = alternatives[alternatives['veg_nonveg'] == 'Vegetarian']
+    alternatives = alternatives[alternatives['dish_name'] != meal['dish_name']]
+    return alternatives.index[:LIMIT].tolist()
+
+
+def walk(graph, meal):
+    """Rows the graph offers for a dataset meal"""
+    return [row for row, _distance in graph.alternatives(meal.row, LIMIT, TOLERANCE)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    system = load_dataset()
+    system._build_food_index()
+    profiles = random_profiles(system, count)
+    synthetic = synthetic_dataset(system.food_df, size)
+
+    for label, food_df in (
+        (f'dataset ({len(system.food_df)} rows)', system.food_df),
+        (f'synthetic ({size} rows)', synthetic.reset_index(drop=True)),
+    ):
+        catalog = FoodCatalog.from_frame(food_df)
+        food_index = FoodCandidateIndex(catalog)
+        # Time a cold build, not the graph _build_food_index left current
+        food_alternatives._current.clear()
+        started = time.perf_counter()
+        graph = AlternativesGraph.from_catalog(catalog)
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        assert AlternativesGraph.from_catalog(catalog) is graph
+        print(f"{label}: graph built in {built:.3f} s ({(time.perf_counter() - started) * 1e3:.1f} ms when the "
+              f"version is unchanged), {graph.nbytes / 1e6:.2f} MB, version {graph.version}")
+
+        meals = []
+        for profile in profiles:
+            plan = WeeklyMealPlanner(profile, food_df, food_index).generate_weekly_plan()
+            vegetarian = profile.get('food_type') in ('Vegetarian', 'Vegan')
+            meals.extend((meal, vegetarian) for day in plan.values() for meal in day.values()
+                         if isinstance(meal, MealSelection) and (not vegetarian or graph.groups[meal.row] == 'Vegetarian'))
+
+        for mode, lookup in (
+            ('DataFrame scan', lambda meal, vegetarian: scan(food_df, meal, vegetarian)),
+            ('graph walk', lambda meal, _vegetarian: walk(graph, meal)),
+        ):
+            started = time.perf_counter()
+            found = [lookup(meal, vegetarian) for meal, vegetarian in meals]
+            elapsed = (time.perf_counter() - started) / len(meals)
+            complete = sum(len(rows) >= LIMIT for rows in found) / len(meals)
+            calories = [abs(graph.calories[row] - graph.calories[meal.row]) / max(graph.calories[meal.row], 1)
+                        for (meal, _vegetarian), rows in zip(meals, found) for row in rows]
+            nutrients = [float(np.abs(graph.nutrients[row] - graph.nutrients[meal.row]).sum())
+                         for (meal, _vegetarian), rows in zip(meals, found) for row in rows]
+            print(f"  {mode}: {elapsed * 1e6:.1f} us/meal over {len(meals)} meals, {complete:.0%} with {LIMIT}, "
+                  f"calorie gap {statistics.mean(calories):.1%}, nutrient gap {statistics.mean(nutrients):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the faceted food query engine behind GET /api/foods.
+
+Builds a synthetic catalog by resampling indian_food_nutrition.csv rows
+(categories and flags kept, nutrient values jittered) to the requested
+size, then times random filter combinations - categorical values, flags,
+nutrient ranges and sorting - including facet counts and a 20-row page.
+Also pages through every sort, on the dataset and on a catalog with
+heavily tied keys, and checks each row comes back exactly once.
+
+Usage: python bench_food_facets.py [rows] [queries]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from food_facets import CATEGORY_COLUMNS, RANGE_COLUMNS, FoodFacetIndex
+from nutrition_index import load_food_rows
+
+
+def synthetic_columns(rows, size, seed=5):
+    rng = np.random.default_rng(seed)
+    template = rng.integers(0, len(rows), size)
+    categories = {
+        column: np.array([row[column] for row in rows], dtype=object)[template] for column in CATEGORY_COLUMNS
+    }
+    flag_columns = [column for column in rows[0] if column.startswith('is_')]
+    flags = {column: np.array([row[column] for row in rows], dtype=np.uint8)[template] for column in flag_columns}
+    jitter = rng.lognormal(0, 0.15, size)
+    numeric = {
+        column: np.array([row[column] for row in rows])[template] * jitter for column in RANGE_COLUMNS.values()
+    }
+    return categories, flags, numeric
+
+
+def random_query(index, rng):
+    args = {}
+    for column in rng.sample(CATEGORY_COLUMNS, rng.randint(0, 2)):
+        args[column] = ','.join(rng.sample(index.values[column], rng.randint(1, 2)))
+    for column in rng.sample(sorted(index.flags), rng.randint(0, 3)):
+        args[column] = rng.choice(['1', '0'])
+    if rng.random() < 0.5:
+        low = rng.uniform(0, 200)
+        args['calories_min'], args['calories_max'] = low, low + rng.uniform(20, 300)
+    if rng.random() < 0.3:
+        args['protein_min'] = rng.uniform(0, 15)
+    sort = rng.choice([None, None, 'calories', '-protein'])
+    return args, sort
+
+
+def bench(index, queries, seed=3):
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(queries):
+        args, sort = random_query(index, rng)
+        started = time.perf_counter()
+        index.query(args, offset=rng.choice([0, 0, 20, 200]), limit=20, sort=sort)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings
+
+
+def check_paging(index, per_page=20):
+    """Page through every sort order; each row must appear exactly once"""
+    for sort in (*RANGE_COLUMNS, *(f'-{name}' for name in RANGE_COLUMNS)):
+        seen = []
+        for offset in range(0, index.size, per_page):
+            seen.extend(index.query({}, offset=offset, limit=per_page, sort=sort)[1])
+        assert sorted(seen) == list(range(index.size)), f'sort={sort}: {len(set(seen))} of {index.size} rows'
+
+
+def tied_columns(rows, size, seed=7):
+    """Synthetic columns with nutrient values from a handful of levels, so sort keys tie heavily"""
+    categories, flags, numeric = synthetic_columns(rows, size, seed)
+    rng = np.random.default_rng(seed)
+    return categories, flags, {column: rng.integers(0, 5, size).astype(np.float64) for column in numeric}
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rows = load_food_rows()
+
+    for label, build in (
+        (f'dataset ({len(rows)} rows)', lambda: FoodFacetIndex.from_rows(rows)),
+        (f'synthetic ({size} rows)', lambda: FoodFacetIndex(size, *synthetic_columns(rows, size))),
+    ):
+        started = time.perf_counter()
+        index = build()
+        built = time.perf_counter() - started
+        timings = bench(index, queries)
+        print(f"{label}: built in {built * 1000:.0f} ms; query median {statistics.median(timings) * 1000:.2f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms")
+
+    check_paging(FoodFacetIndex.from_rows(rows))
+    check_paging(FoodFacetIndex(500, *tied_columns(rows, 500)))
+    print("paging: every sort returns each row exactly once (dataset and tied keys)")
+
+
+if __name__ == '__main__':
+    main()
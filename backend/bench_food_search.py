@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark of the dish search index behind /api/foods/search.
+
+Replays autocomplete traffic: every 1-8 character prefix of words from
+real dish names, plus multi-word and substring queries, with and without
+filters, and reports search latency percentiles. Index build time is
+reported separately since it is paid once per worker.
+
+Usage: python bench_food_search.py [queries]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from food_search import FoodSearchIndex
+from nutrition_index import load_food_rows
+
+FILTERS = [
+    {},
+    {'veg_nonveg': 'Vegetarian'},
+    {'is_vegan': '1', 'region': 'Pan Indian'},
+    {'meal_category': 'Breakfast', 'is_gluten_free': 'true'},
+]
+
+
+def make_queries(index, count):
+    rng = random.Random(11)
+    queries = []
+    for _ in range(count):
+        words = index.names[rng.randrange(len(index.names))].split()
+        roll = rng.random()
+        if roll < 0.6:
+            word = rng.choice(words)
+            query = word[:rng.randint(1, min(8, len(word)))]
+        elif roll < 0.85 and len(words) > 1:
+            query = f'{words[0]} {words[1][:rng.randint(1, len(words[1]))]}'
+        else:
+            word = rng.choice(words)
+            start = rng.randrange(len(word))
+            query = word[start:start + 4]
+        queries.append((query, rng.choice(FILTERS)))
+    return queries
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    started = time.perf_counter()
+    index = FoodSearchIndex(load_food_rows())
+    print(f"index: {len(index.rows)} dishes, {len(index._tokens)} tokens, "
+          f"built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    timings = []
+    for query, filters in make_queries(index, count):
+        started = time.perf_counter()
+        matches = index.search(query, filters)
+        [index.describe(row_id, match) for row_id, match in matches]
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{count} queries: median {statistics.median(timings) * 1e6:.0f} µs, "
+          f"p99 {timings[int(count * 0.99)] * 1e6:.0f} µs, max {timings[-1] * 1e6:.0f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark of day-level calorie fitting (WeeklyMealPlanner fit_days=True).
+
+Plans random profiles greedily and with DayFitter, against
+indian_food_nutrition.csv and a synthetic dataset resampled from it, and
+reports the mean distance of a day's calories and macros from the
+profile's targets, the share of fallback meals, and the planning time per
+day. Fallback meals carry made-up nutrients, so the distances are also
+given over the days where neither plan has one.
+
+Usage: python bench_meal_fitting.py [profiles] [synthetic_rows]
+"""
+
+import statistics
+import sys
+import time
+
+from bench_batch_planner import random_profiles
+from bench_meal_planner import load_dataset, synthetic_dataset
+from food_catalog import FoodCatalog
+from main import WeeklyMealPlanner
+from meal_candidates import FoodCandidateIndex
+
+# Daily summary key -> profile target key
+TARGETS = {
+    'total_calories': 'target_calories',
+    'total_protein': 'protein_target',
+    'total_carbs': 'carb_target',
+    'total_fats': 'fat_target',
+}
+
+
+def plan_days(food_df, food_index, profiles, fit_days):
+    """Per day: (relative deviation per target, fallback meals, meals); and seconds per day"""
+    days = []
+    elapsed = 0.0
+    for profile in profiles:
+        started = time.perf_counter()
+        planner = WeeklyMealPlanner(profile, food_df, food_index, fit_days=fit_days)
+        plan = planner.generate_weekly_plan()
+        elapsed += time.perf_counter() - started
+        for daily_plan in plan.values():
+            summary = planner.get_daily_summary(daily_plan)
+            deviations = {key: abs(summary[key] - profile[target]) / profile[target] for key, target in TARGETS.items()}
+            fallbacks = sum(meal.get('meal_category') == 'Fallback' for meal in daily_plan.values())
+            days.append((deviations, fallbacks, len(daily_plan)))
+    return days, elapsed / len(days)
+
+
+def describe(days):
+    return ', '.join(f"{key[len('total_'):]} {statistics.mean(day[0][key] for day in days):.1%}" for key in TARGETS)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    system = load_dataset()
+    system._build_food_index()
+    profiles = random_profiles(system, count)
+    synthetic = synthetic_dataset(system.food_df, size)
+
+    for label, food_df, food_index in (
+        (f'dataset ({len(system.food_df)} rows)', system.food_df, system.food_index),
+        (f'synthetic ({size} rows)', synthetic, FoodCandidateIndex(FoodCatalog.from_frame(synthetic))),
+    ):
+        greedy, greedy_time = plan_days(food_df, food_index, profiles, False)
+        fitted, fitted_time = plan_days(food_df, food_index, profiles, True)
+        clean = [i for i, (a, b) in enumerate(zip(greedy, fitted)) if not a[1] and not b[1]]
+        for name, days, per_day in (('greedy', greedy, greedy_time), ('fitted', fitted, fitted_time)):
+            fallbacks = sum(day[1] for day in days) / sum(day[2] for day in days)
+            print(f"{label} {name}: {per_day * 1e3:.2f} ms/day, {fallbacks:.1%} fallback meals; "
+                  f"mean daily deviation {describe(days)}; "
+                  f"without fallbacks ({len(clean)} days) {describe([days[i] for i in clean])}")
+
+
+if __name__ == '__main__':
+    main()
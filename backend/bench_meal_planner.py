@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark of WeeklyMealPlanner.generate_weekly_plan from main.py.
+
+Runs a few representative profiles against indian_food_nutrition.csv and
+against a synthetic dataset resampled from it (nutrient values jittered,
+dish names made unique), once with the original planner - DataFrame
+filtering, variety exclusion and ranking for every meal of every day -
+and once with the current one, and reports how many of the chosen
+dishes agree.
+
+Usage: python bench_meal_planner.py [synthetic_rows] [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from main import EnhancedFoodRecommendationSystem, WeeklyMealPlanner
+from food_catalog import FoodCatalog
+from meal_candidates import FoodCandidateIndex
+
+PROFILES = [
+    {'age': 30, 'gender': 'male', 'weight': 80, 'height': 178, 'activity_level': 'moderately_active',
+     'health_goal': 'weight_loss', 'meal_frequency': 3, 'food_type': 'Non-Vegetarian',
+     'regional_preferences': ['Pan Indian'], 'dietary_restrictions': [], 'dislikes': []},
+    {'age': 26, 'gender': 'female', 'weight': 58, 'height': 162, 'activity_level': 'lightly_active',
+     'health_goal': 'weight_maintenance', 'meal_frequency': 4, 'food_type': 'Vegetarian',
+     'regional_preferences': ['North Indian', 'South Indian'], 'dietary_restrictions': ['is_gluten_free'],
+     'dislikes': ['paneer', 'egg']},
+    {'age': 35, 'gender': 'male', 'weight': 72, 'height': 175, 'activity_level': 'very_active',
+     'health_goal': 'muscle_gain', 'meal_frequency': 6, 'food_type': 'Vegan',
+     'regional_preferences': ['Pan Indian'], 'dietary_restrictions': ['is_high_protein', 'is_nut_free'],
+     'dislikes': ['okra']},
+]
+
+
+class OriginalPlanner(WeeklyMealPlanner):
+    """The planner as it was before the candidate index: per-meal DataFrame filtering and ranking"""
+
+    def _filter_foods_by_criteria(self, meal_type, calorie_target, day_num):
+        filtered_df = self.food_df.copy()
+        food_type = self.user_profile.get('food_type', 'Non-Vegetarian')
+        if food_type in ['Vegetarian', 'Vegan']:
+            filtered_df = filtered_df[filtered_df['veg_nonveg'] == 'Vegetarian']
+        regional_prefs = self.user_profile.get('regional_preferences', ['Pan Indian'])
+        if regional_prefs and 'Pan Indian' not in regional_prefs:
+            filtered_df = filtered_df[filtered_df['region'].isin(regional_prefs)]
+        for restriction in self.user_profile.get('dietary_restrictions', []):
+            if restriction in filtered_df.columns:
+                filtered_df = filtered_df[filtered_df[restriction] == 1]
+        if 'meal_category' in filtered_df.columns:
+            category = 'Dessert' if meal_type.endswith('_snack') else 'Main Course'
+            category_foods = filtered_df[filtered_df['meal_category'] == category]
+            if len(category_foods) > 0:
+                filtered_df = category_foods
+        if calorie_target <= 0:
+            calorie_target = 300
+        calories = filtered_df['calories_(kcal)']
+        filtered_df = filtered_df[
+            (calories >= calorie_target * 0.6) & (calories <= calorie_target * 1.4) & (calories > 0)
+        ]
+        for dislike in self.user_profile.get('dislikes', []):
+            filtered_df = filtered_df[~filtered_df['dish_name'].str.contains(dislike, case=False, na=False)]
+        return filtered_df
+
+    def _score_foods(self, df, meal_type):
+        df = df.copy()
+        scores = np.zeros(len(df))
+        health_goal = self.user_profile.get('health_goal', 'weight_maintenance')
+        calories = df['calories_(kcal)'].fillna(0)
+        protein = df['protein_(g)'].fillna(0)
+        carbs = df['carbohydrates_(g)'].fillna(0)
+        fats = df['fats_(g)'].fillna(0)
+        fiber = df['fibre_(g)'].fillna(0)
+
+        def safe_divide(numerator, denominator, default=0):
+            return np.where(denominator > 0, numerator / denominator, default)
+
+        if health_goal == 'weight_loss':
+            scores += safe_divide(protein, calories, 0) * 100
+            scores += safe_divide(fiber, calories, 0) * 80
+            scores -= safe_divide(fats, calories, 0) * 40
+            scores += df['is_low_calorie'].fillna(0) * 30
+        elif health_goal == 'weight_gain':
+            scores += calories / 50
+            scores += protein * 3
+            scores += fats * 2
+        elif health_goal == 'muscle_gain':
+            scores += protein * 5
+            scores += safe_divide(protein, calories, 0) * 150
+            scores += df['is_high_protein'].fillna(0) * 50
+        if meal_type in ['pre_breakfast', 'pre_lunch']:
+            scores += (300 - calories) / 100
+            scores += carbs * 2
+        elif meal_type == 'breakfast':
+            scores += protein * 2
+            scores += fiber * 3
+        elif meal_type in ['mid_morning_snack', 'mid_afternoon_snack', 'evening_snack']:
+            scores += (200 - calories) / 100
+            scores += protein * 2
+        for restriction in self.user_profile.get('dietary_restrictions', []):
+            if restriction in df.columns:
+                scores += df[restriction].fillna(0) * 20
+        scores -= df['sodium_(mg)'].fillna(0) / 100
+        scores += df['calcium_(mg)'].fillna(0) / 100
+        scores += df['iron_(mg)'].fillna(0) * 10
+        scores += df['vitamin_c_(mg)'].fillna(0) / 10
+        df['score'] = scores
+        return df.sort_values('score', ascending=False)
+
+    def generate_weekly_plan(self):
+        weekly_plan = {}
+        used_foods_global = set()
+        for day_num, day in enumerate(self.days):
+            daily_plan = {}
+            used_foods_daily = set()
+            for meal_type, time in self.meal_schedule.items():
+                calorie_target = self.calorie_distribution.get(meal_type, 300)
+                options = self._filter_foods_by_criteria(meal_type, calorie_target, day_num)
+                if len(options) == 0:
+                    daily_plan[meal_type] = self._create_fallback_meal(meal_type, calorie_target)
+                    continue
+                available = options[~options['dish_name'].isin(used_foods_global.union(used_foods_daily))]
+                if len(available) == 0:
+                    available = options
+                meal_info = self._score_foods(available, meal_type).head(1).iloc[0]
+                daily_plan[meal_type] = {
+                    'time': time,
+                    'dish_name': meal_info['dish_name'],
+                    'calories': meal_info['calories_(kcal)'],
+                    'protein': meal_info['protein_(g)'],
+                    'carbs': meal_info['carbohydrates_(g)'],
+                    'fats': meal_info['fats_(g)'],
+                    'fiber': meal_info.get('fibre_(g)', 0),
+                    'sodium': meal_info.get('sodium_(mg)', 0),
+                    'calcium': meal_info.get('calcium_(mg)', 0),
+                    'iron': meal_info.get('iron_(mg)', 0),
+                    'vitamin_c': meal_info.get('vitamin_c_(mg)', 0),
+                    'target_calories': calorie_target,
+                    'meal_category': meal_info.get('meal_category', ''),
+                    'region': meal_info.get('region', ''),
+                    'veg_nonveg': meal_info.get('veg_nonveg', '')
+                }
+                used_foods_daily.add(meal_info['dish_name'])
+                used_foods_global.add(meal_info['dish_name'])
+            weekly_plan[day] = daily_plan
+            if (day_num + 1) % 3 == 0:
+                used_foods_global = set()
+        return weekly_plan
+
+
+def load_dataset():
+    system = EnhancedFoodRecommendationSystem()
+    system.food_df = pd.read_csv('indian_food_nutrition.csv')
+    system._preprocess_food_data()
+    return system
+
+
+def synthetic_dataset(food_df, size, seed=5):
+    rng = np.random.default_rng(seed)
+    df = food_df.iloc[rng.integers(0, len(food_df), size)].reset_index(drop=True)
+    jitter = rng.lognormal(0, 0.15, size)
+    for column in [column for column in df.columns if '_(' in column]:
+        df[column] = df[column] * jitter
+    df['dish_name'] = df['dish_name'] + ' #' + pd.Series(range(size)).astype(str)
+    return df
+
+
+def bench(planner_class, food_df, profiles, repeats, food_index=None):
+    timings = []
+    plans = []
+    for _ in range(repeats):
+        for profile in profiles:
+            started = time.perf_counter()
+            planner = planner_class(profile, food_df, food_index) if food_index else planner_class(profile, food_df)
+            plan = planner.generate_weekly_plan()
+            timings.append(time.perf_counter() - started)
+            plans.append(plan)
+    return timings, plans
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    system = load_dataset()
+    profiles = [system.create_comprehensive_profile(user_data) for user_data in PROFILES]
+
+    for label, food_df in (
+        (f'dataset ({len(system.food_df)} rows)', system.food_df),
+        (f'synthetic ({size} rows)', synthetic_dataset(system.food_df, size)),
+    ):
+        started = time.perf_counter()
+        catalog = FoodCatalog.from_frame(food_df)
+        food_index = FoodCandidateIndex(catalog)
+        built = time.perf_counter() - started
+
+        before, before_plans = bench(OriginalPlanner, food_df, profiles, repeats)
+        after, after_plans = bench(WeeklyMealPlanner, food_df, profiles, repeats, food_index)
+        same = sum(
+            before_plan[day][meal]['dish_name'] == after_plan[day][meal]['dish_name']
+            for before_plan, after_plan in zip(before_plans, after_plans)
+            for day in before_plan for meal in before_plan[day]
+        )
+        meals = sum(len(meals) for plan in before_plans for meals in plan.values())
+
+        print(f"{label}: DataFrame {food_df.memory_usage(deep=True).sum() / 1e6:.2f} MB, "
+              f"catalog arrays {catalog.nbytes / 1e6:.2f} MB")
+        print(f"{label}: index built in {built * 1000:.0f} ms; weekly plan median "
+              f"{statistics.median(before) * 1000:.1f} ms -> {statistics.median(after) * 1000:.1f} ms, "
+              f"max {max(before) * 1000:.1f} ms -> {max(after) * 1000:.1f} ms; "
+              f"{same}/{meals} meals unchanged")
+
+
+if __name__ == '__main__':
+    main()
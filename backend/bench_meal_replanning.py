@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark of PlanEditor's incremental replanning.
+
+Generates day-fitted weekly plans for random profiles, then replaces
+random meals with one of their alternatives (food_alternatives): with the
+running totals only, and with the rest of the day re-fitted around the
+new meal. Compares each against refreshing the summaries the old way
+(get_daily_summary over the week) and regenerating the whole week, checks
+the running totals against recomputed sums, and counts re-fitted meals
+that repeat a dish of another day of their variety window (as during
+generation, only slots whose every candidate is used do).
+
+Usage: python bench_meal_replanning.py [profiles] [edits_per_plan]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from bench_batch_planner import random_profiles
+from bench_meal_planner import load_dataset
+from food_alternatives import AlternativesGraph
+from main import WeeklyMealPlanner
+from plan_summary import SUMMARY_NUTRIENTS
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    system = load_dataset()
+    system._build_food_index()
+    graph = AlternativesGraph.from_catalog(system.food_catalog)
+    profiles = random_profiles(system, count)
+    rng = random.Random(0)
+
+    timings = {'generate week': [], 'summarize week': [], 'replace meal': [], 'replace + refit day': []}
+    drift = 0.0
+    refitted = repeated = 0
+    for profile in profiles:
+        planner = WeeklyMealPlanner(profile, system.food_df, system.food_index, fit_days=True)
+        started = time.perf_counter()
+        plan = planner.generate_weekly_plan()
+        timings['generate week'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        [planner.get_daily_summary(daily_plan) for daily_plan in plan.values()]
+        timings['summarize week'].append(time.perf_counter() - started)
+
+        editor = planner.edit_weekly_plan(plan)
+        # Builds the editor's DayFitter outside the timings
+        editor.reoptimize_day(planner.days[0])
+        for edit in range(edits):
+            day = rng.choice(planner.days)
+            meal_type = rng.choice(list(plan[day]))
+            meal = plan[day][meal_type]
+            entry = meal.row if hasattr(meal, 'row') else graph.nearest(meal['calories'], meal.get('veg_nonveg', ''))
+            options = [row for row, _distance in graph.alternatives(entry)] or [entry]
+            refit = edit % 2 == 1
+            started = time.perf_counter()
+            changed = editor.replace_meal(day, meal_type, rng.choice(options), reoptimize=refit)
+            timings['replace + refit day' if refit else 'replace meal'].append(time.perf_counter() - started)
+            others = editor.window_dishes(day)
+            refitted += len(changed) - 1
+            repeated += sum(plan[day][other]['dish_name'] in others for other in changed[1:])
+
+        for d, daily_plan in enumerate(plan.values()):
+            summary = planner.get_daily_summary(daily_plan)
+            expected = np.array([summary[f'total_{nutrient}'] for nutrient in SUMMARY_NUTRIENTS])
+            drift = max(drift, float(np.abs(editor.nutrients.day_totals[d] - expected).max()))
+        drift = max(drift, float(np.abs(editor.nutrients.week_totals - editor.nutrients.day_totals.sum(axis=0)).max()))
+
+    for label, values in timings.items():
+        print(f"{label}: {statistics.mean(values) * 1e3:.3f} ms (median {statistics.median(values) * 1e3:.3f} ms)")
+    print(f"largest difference between running and recomputed totals: {drift:.2e}")
+    print(f"re-fitted meals repeating a dish of their window: {repeated} of {refitted}")
+
+
+if __name__ == '__main__':
+    main()
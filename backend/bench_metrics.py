@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-request Prometheus instrumentation overhead.
+
+Compares the old raw-path labelling (three .labels() lookups per request,
+one new series per distinct URL) with the pre-bound route instruments in
+monitoring.py. Both run against private registries so the numbers only
+reflect instrumentation work.
+
+Usage: python bench_metrics.py [requests]
+"""
+
+import random
+import sys
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, Gauge
+
+from monitoring import GuardedMetric, RequestInstrumentation, UNMATCHED_ENDPOINT
+
+ROUTES = ['/api/health', '/api/options', '/api/diet-plan', '/api/diet-plan/quick']
+BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def make_metrics(registry):
+    count = Counter('requests_total', 'requests', ['method', 'endpoint', 'http_status'], registry=registry)
+    latency = Histogram('latency_seconds', 'latency', ['method', 'endpoint'], buckets=BUCKETS, registry=registry)
+    active = Gauge('active_requests', 'active', ['endpoint'], registry=registry)
+    return count, latency, active
+
+
+def make_traffic(n, probe_ratio):
+    """Mix of real routes and unique 404 probe paths"""
+    rng = random.Random(42)
+    traffic = []
+    for i in range(n):
+        if rng.random() < probe_ratio:
+            traffic.append((f'/wp-admin/probe-{i}.php', None, 404))
+        else:
+            route = rng.choice(ROUTES)
+            traffic.append((route, route, 200))
+    return traffic
+
+
+def series_count(registry):
+    return sum(len(metric.samples) for metric in registry.collect())
+
+
+def bench_raw_path(traffic):
+    registry = CollectorRegistry()
+    count, latency, active = make_metrics(registry)
+    started = time.perf_counter()
+    for path, _rule, status in traffic:
+        t0 = time.perf_counter()
+        active.labels(endpoint=path).inc()
+        latency.labels('GET', path).observe(time.perf_counter() - t0)
+        count.labels('GET', path, status).inc()
+        active.labels(endpoint=path).dec()
+    return time.perf_counter() - started, series_count(registry)
+
+
+def bench_prebound(traffic):
+    registry = CollectorRegistry()
+    count, latency, active = make_metrics(registry)
+    inst = RequestInstrumentation(count=GuardedMetric(count), latency=GuardedMetric(latency),
+                                  active=GuardedMetric(active))
+    for route in ROUTES + [UNMATCHED_ENDPOINT]:
+        inst.instruments('GET', route)
+    started = time.perf_counter()
+    for _path, rule, status in traffic:
+        route = inst.start('GET', rule if rule is not None else UNMATCHED_ENDPOINT)
+        inst.finish(route, time.perf_counter(), status)
+        route.active.dec()
+    return time.perf_counter() - started, series_count(registry)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"Per-request instrumentation overhead ({n} requests)")
+    print("-" * 70)
+    for probe_ratio in (0.0, 0.1, 0.5):
+        traffic = make_traffic(n, probe_ratio)
+        raw_time, raw_series = bench_raw_path(traffic)
+        bound_time, bound_series = bench_prebound(traffic)
+        print(f"probe ratio {probe_ratio:>4.0%} | raw path: {raw_time / n * 1e6:6.2f} µs/req, "
+              f"{raw_series:>7} samples | pre-bound: {bound_time / n * 1e6:6.2f} µs/req, "
+              f"{bound_series:>4} samples")
+
+
+if __name__ == '__main__':
+    main()
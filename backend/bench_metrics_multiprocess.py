@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Scrape cost of Prometheus multiprocess mode as the worker count grows.
+
+Spawns N short-lived "workers" that import monitoring.py against a shared
+PROMETHEUS_MULTIPROC_DIR and record a representative mix of request and
+diet plan metrics, then times how long /metrics takes to aggregate the
+resulting files.
+
+Usage: python bench_metrics_multiprocess.py [max_workers]
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+GOALS = ['Weight Loss', 'Muscle Gain', 'Weight Maintenance', 'Athletic Performance']
+DIET_PREFS = ['Vegetarian', 'Non-Vegetarian', 'Vegan', 'No Preference']
+ROUTES = ['/', '/api/health', '/api/options', '/api/diet-plan', '/api/diet-plan/quick', '/metrics']
+
+
+def simulate_worker():
+    import monitoring
+
+    instrumentation = monitoring.RequestInstrumentation()
+    for route in ROUTES + [monitoring.UNMATCHED_ENDPOINT]:
+        for status in (200, 404, 500):
+            inst = instrumentation.start('GET', route)
+            instrumentation.finish(inst, time.perf_counter(), status)
+            inst.active.dec()
+    for goal in GOALS:
+        for pref in DIET_PREFS:
+            monitoring.DIET_PLAN_REQUESTS.labels(goal=goal, diet_preference=pref, status='success').inc()
+            monitoring.DIET_PLAN_GENERATION_TIME.labels(goal=goal, diet_preference=pref).observe(12.0)
+    monitoring.CALORIE_TARGET_DISTRIBUTION.observe(2100)
+    monitoring.API_INITIALIZATION_STATUS.set(1)
+
+
+def measure(workers, rounds=20):
+    path = tempfile.mkdtemp(prefix='diet_api_metrics_')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = path
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        procs = [ctx.Process(target=simulate_worker) for _ in range(workers)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+
+        from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+        started = time.perf_counter()
+        for _ in range(rounds):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=path)
+            payload = generate_latest(registry)
+        elapsed = (time.perf_counter() - started) / rounds
+        return len(os.listdir(path)), elapsed, len(payload)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    print(f"{'workers':>8} {'files':>6} {'scrape':>10} {'bytes':>8}")
+    workers = 1
+    while workers <= max_workers:
+        files, elapsed, size = measure(workers)
+        print(f"{workers:>8} {files:>6} {elapsed * 1000:>8.1f}ms {size:>8}")
+        workers *= 4
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark of grounding generated plans in the nutrition dataset.
+
+Builds 7-day fake plans whose food names are perturbed the way model
+output drifts from dataset names (case, dropped words, the parenthetical
+alias alone, typos, dishes not in the dataset), then times ground_plan
+per plan with a cold and a warm lookup cache.
+
+Usage: python bench_nutrition_index.py [plans]
+"""
+
+import copy
+import random
+import statistics
+import sys
+import time
+
+from fake_gemini import build_plan
+from nutrition_index import NutritionIndex, ground_plan
+
+PROMPT = """
+- Fitness Goal: Muscle Gain
+- Age: {age} years
+- Current Weight: 75 kg
+- Meals Per Day: {meals}
+"""
+
+UNKNOWN = ['Grilled chicken breast', 'Quinoa salad bowl', 'Protein shake', 'Avocado toast', 'Greek yogurt']
+
+
+def perturb(name, rng):
+    roll = rng.random()
+    if roll < 0.3:
+        return name
+    if roll < 0.45:
+        return name.lower()
+    if roll < 0.6 and '(' in name:
+        return name[name.index('(') + 1:].rstrip(')')
+    if roll < 0.8 and len(name) > 6:
+        i = rng.randrange(1, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if roll < 0.9:
+        return ' '.join(name.split()[:3])
+    return rng.choice(UNKNOWN)
+
+
+def make_plans(count):
+    rng = random.Random(7)
+    plans = []
+    for i in range(count):
+        plan = build_plan(PROMPT.format(age=20 + i, meals=3 + i % 4))
+        for day in plan['meal_plan']:
+            for meal in day['meals']:
+                for item in meal['food_items']:
+                    item['item'] = perturb(item['item'], rng)
+        plans.append(plan)
+    return plans
+
+
+def time_plans(index, plans):
+    timings = []
+    for plan in copy.deepcopy(plans):
+        started = time.perf_counter()
+        ground_plan(plan, index, mode='replace')
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    started = time.perf_counter()
+    index = NutritionIndex.from_csv()
+    print(f"index: {len(index.rows)} dishes built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    plans = make_plans(count)
+    report = ground_plan(copy.deepcopy(plans[0]), index)
+    print(f"sample plan: {report.as_dict()}")
+
+    for label in ('cold cache', 'warm cache'):
+        if label == 'cold cache':
+            index.match.cache_clear()
+        timings = time_plans(index, plans)
+        print(f"{label}: median {statistics.median(timings) * 1000:.3f} ms/plan, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:.3f} ms/plan")
+
+    names = {item['item'] for plan in plans for day in plan['meal_plan']
+             for meal in day['meals'] for item in meal['food_items']}
+    index.match.cache_clear()
+    started = time.perf_counter()
+    for name in names:
+        index.match(name)
+    print(f"uncached lookup: {(time.perf_counter() - started) / len(names) * 1e6:.1f} µs/name "
+          f"over {len(names)} distinct names")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark of plan summaries from PlanNutrients against per-meal sums.
+
+Generates weekly plans for random profiles, then produces what the CLI
+display and detailed analysis need (every day's totals, the week's daily
+averages and the daily calorie deviations) three ways: summing the meals
+per nutrient as display_weekly_plan, _display_weekly_summary and
+_detailed_nutrition_analysis used to, building PlanNutrients from the
+plan, and reading the PlanSummary of the accumulators filled during
+generation. Checks the three agree.
+
+Usage: python bench_plan_summary.py [profiles]
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from bench_batch_planner import random_profiles
+from bench_meal_planner import load_dataset
+from main import WeeklyMealPlanner
+from plan_summary import SUMMARY_NUTRIENTS, PlanNutrients
+
+
+def summed(planner, weekly_plan):
+    """Day totals and averages summed meal by meal, as the CLI did (three passes over the week)"""
+    days = [planner.get_daily_summary(daily_plan) for daily_plan in weekly_plan.values()]
+    weekly = {nutrient: 0 for nutrient in SUMMARY_NUTRIENTS}
+    for daily_plan in weekly_plan.values():
+        summary = planner.get_daily_summary(daily_plan)
+        for nutrient in SUMMARY_NUTRIENTS:
+            weekly[nutrient] += summary[f'total_{nutrient}']
+    analysis = [{nutrient: sum(meal.get(nutrient, 0) for meal in daily_plan.values()) for nutrient in SUMMARY_NUTRIENTS}
+                for daily_plan in weekly_plan.values()]
+    averages = {nutrient: np.mean([day[nutrient] for day in analysis]) for nutrient in SUMMARY_NUTRIENTS}
+    return [day['total_calories'] for day in days], averages
+
+
+def read(summary):
+    return [summary.day(day)['total_calories'] for day in summary.days], \
+        {nutrient: summary.average(nutrient) for nutrient in SUMMARY_NUTRIENTS}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    system = load_dataset()
+    system._build_food_index()
+    timings = {'per-meal sums': [], 'PlanNutrients.from_plan': [], 'accumulated during generation': []}
+    largest = 0.0
+    for profile in random_profiles(system, count):
+        planner = WeeklyMealPlanner(profile, system.food_df, system.food_index, fit_days=True)
+        plan = planner.generate_weekly_plan()
+
+        started = time.perf_counter()
+        days, averages = summed(planner, plan)
+        timings['per-meal sums'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        rebuilt = read(PlanNutrients.from_plan(plan).summary(profile))
+        timings['PlanNutrients.from_plan'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        accumulated = read(planner.summarize(plan))
+        timings['accumulated during generation'].append(time.perf_counter() - started)
+
+        for other_days, other_averages in (rebuilt, accumulated):
+            largest = max(largest, max(abs(a - b) for a, b in zip(days, other_days)),
+                          max(abs(averages[n] - other_averages[n]) for n in SUMMARY_NUTRIENTS))
+
+    for label, values in timings.items():
+        print(f"{label}: {statistics.mean(values) * 1e3:.3f} ms per plan")
+    print(f"largest difference from per-meal sums: {largest:.2e}")
+
+
+if __name__ == '__main__':
+    main()
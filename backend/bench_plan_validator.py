@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark of plan validation and total recomputation.
+
+Validates synthetic 7-day plans from fake_gemini (3 and 6 meals a day),
+with the model's totals deliberately skewed so every plan takes the
+correction path, and reports per-plan latency percentiles.
+
+Usage: python bench_plan_validator.py [plans]
+"""
+
+import copy
+import json
+import statistics
+import sys
+import time
+
+from fake_gemini import build_plan
+from plan_validator import validate_plan
+
+PROMPT = """
+- Fitness Goal: {goal}
+- Diet Preference: No Preference
+- Age: {age} years
+- Gender: Male
+- Current Weight: 80 kg
+- Height: 178 cm
+- Activity Level: Moderately Active
+- Meals Per Day: {meals}
+"""
+
+
+def make_plans(meals_per_day, count=20):
+    plans = []
+    for i in range(count):
+        plan = build_plan(PROMPT.format(goal='Weight Loss', age=20 + i, meals=meals_per_day))
+        # Skew the model's totals the way real responses do
+        for day in plan['meal_plan']:
+            day['daily_total_calories'] += 120
+            for meal in day['meals']:
+                meal['total_meal_calories'] = str(meal['total_meal_calories'] + 35)
+        plan['weekly_summary']['average_protein'] += 12
+        plans.append(plan)
+    return plans
+
+
+def bench(plans, runs):
+    # Each run gets a fresh copy so corrections happen every time
+    copies = [copy.deepcopy(plans[i % len(plans)]) for i in range(runs)]
+    timings = []
+    for plan in copies:
+        started = time.perf_counter()
+        validate_plan(plan, correct=True)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for meals in (3, 6):
+        plans = make_plans(meals)
+        report = validate_plan(copy.deepcopy(plans[0]))
+        timings = sorted(bench(plans, runs))
+        size = len(json.dumps(plans[0]))
+        print(f"{meals} meals/day ({size / 1024:.0f} KB plan, {len(report.issues)} issues corrected): "
+              f"median {statistics.median(timings) * 1e6:.0f} µs, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark of WeekOptimizer (WeeklyMealPlanner.optimize_weekly_plan).
+
+Generates greedy and day-fitted plans for random profiles, against
+indian_food_nutrition.csv and a synthetic dataset resampled from it,
+optimizes each within a few wall-clock budgets, and reports the mean
+plan cost before and after, the iterations and moves made, the time
+taken, and whether the incrementally tracked cost matches the cost of
+the returned plan computed from scratch.
+
+Usage: python bench_week_optimizer.py [profiles] [synthetic_rows]
+"""
+
+import statistics
+import sys
+
+from bench_batch_planner import random_profiles
+from bench_meal_planner import load_dataset, synthetic_dataset
+from food_catalog import FoodCatalog
+from main import WeeklyMealPlanner
+from meal_candidates import FoodCandidateIndex
+from week_optimizer import WeekOptimizer
+
+BUDGETS_MS = (5, 20, 50)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    system = load_dataset()
+    system._build_food_index()
+    profiles = random_profiles(system, count)
+    synthetic = synthetic_dataset(system.food_df, size)
+
+    for label, food_df, food_index in (
+        (f'dataset ({len(system.food_df)} rows)', system.food_df, system.food_index),
+        (f'synthetic ({size} rows)', synthetic, FoodCandidateIndex(FoodCatalog.from_frame(synthetic))),
+    ):
+        # Dish codes are built once per dataset, on first use
+        food_index.name_codes()
+        for start, fit_days in (('greedy', False), ('fitted', True)):
+            planners = [WeeklyMealPlanner(profile, food_df, food_index, fit_days=fit_days) for profile in profiles]
+            plans = [planner.generate_weekly_plan() for planner in planners]
+            for budget in BUDGETS_MS:
+                results = [planner.optimize_weekly_plan(plan, budget) for planner, plan in zip(planners, plans)]
+                stats = [result[1] for result in results]
+                consistent = sum(
+                    abs(WeekOptimizer(planner).optimize(plan, 0)[1]['initial_cost'] - stat['cost']) < 1e-3
+                    for planner, (plan, stat) in zip(planners, results)
+                )
+                print(f"{label} {start}, {budget} ms: cost {statistics.mean(s['initial_cost'] for s in stats):.2f} -> "
+                      f"{statistics.mean(s['cost'] for s in stats):.2f}; "
+                      f"{statistics.mean(s['iterations'] for s in stats):.0f} iterations, "
+                      f"{statistics.mean(s['moves'] for s in stats):.1f} moves, "
+                      f"{statistics.mean(s['elapsed_ms'] for s in stats):.1f} ms (max {max(s['elapsed_ms'] for s in stats):.1f}); "
+                      f"{consistent}/{count} tracked costs match")
+
+
+if __name__ == '__main__':
+    main()
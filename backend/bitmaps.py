@@ -0,0 +1,19 @@
+"""
+Row bitmaps shared by the planner's candidate index and the API's facet index.
+
+A bitmap is a Python int with bit i set for row i: filters combine with
+big-int ANDs/ORs and a count is ``int.bit_count()``.
+"""
+
+import numpy as np
+
+
+def pack_bitmap(mask):
+    """Python int bitmap (bit i = row i) from a boolean array"""
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def unpack_bitmap(bitmap, size):
+    """Sorted row ids set in bitmap"""
+    data = np.frombuffer(bitmap.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, count=size, bitorder='little'))
@@ -0,0 +1,45 @@
+"""
+Blockwise top-k selection over row x dataset matrices.
+
+The batch planner (profiles x foods scores), DishSimilarity and the
+alternatives graph (dishes x dishes) each need the best k columns of a
+matrix too big to hold at once. They share:
+
+* ``row_blocks``: row ranges whose block stays under BLOCK_CELLS cells,
+* ``smallest_k``: per row, the k smallest values in order, found with
+  argpartition so only the k survivors are sorted; ties keep column
+  order,
+* ``standardize``: z-scored feature columns for distance and cosine
+  neighbors.
+"""
+
+import numpy as np
+
+# Rows x columns cells per block (float32: ~16 MB, float64: ~32 MB)
+BLOCK_CELLS = 1 << 22
+
+
+def row_blocks(rows, columns, cells=BLOCK_CELLS):
+    """(start, stop) ranges over rows with at most cells rows x columns per block"""
+    step = max(1, cells // max(1, columns))
+    for start in range(0, rows, step):
+        yield start, min(start + step, rows)
+
+
+def smallest_k(values, k):
+    """(columns, values) of each row's k smallest values, smallest first; ties keep column order"""
+    rows, size = values.shape
+    if k < size:
+        top = np.argpartition(values, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(size), (rows, 1))
+    top.sort(axis=1)
+    order = np.argsort(np.take_along_axis(values, top, axis=1), axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    return top, np.take_along_axis(values, top, axis=1)
+
+
+def standardize(features):
+    """Columns of a float matrix as z-scores; constant columns are only centered"""
+    spread = features.std(axis=0)
+    return (features - features.mean(axis=0)) / np.where(spread > 0, spread, 1)
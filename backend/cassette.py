@@ -0,0 +1,216 @@
+"""
+Record/replay of model responses for offline benchmarks.
+
+With ``MODEL_CASSETTE`` set to a file path, DietPlanGenerator wraps its
+model in a cassette:
+
+* ``MODEL_CASSETTE_MODE=record`` passes calls through to the real model
+  and appends one JSON line per call: prompt hash, raw response text,
+  chunk arrival times, token counts and total latency (or the API error).
+* ``MODEL_CASSETTE_MODE=replay`` (default) serves the recorded responses
+  without touching the network, streaming each chunk at its recorded
+  offset multiplied by ``MODEL_CASSETTE_TIME_SCALE`` (0 = no sleeping).
+  Several recordings of one prompt are served in turn, so a replay keeps
+  the recorded latency spread. A prompt that was never recorded raises
+  CassetteMiss, unless ``MODEL_CASSETTE_MISS=cycle``, which serves every
+  recording round-robin regardless of prompt (load tests with varied
+  profiles).
+
+Malformed responses are replayed byte for byte, so parser changes can be
+compared on exactly the outputs that produced JSON_PARSE_ERRORS.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from fake_gemini import FakeResponse, FakeUsageMetadata, _api_error
+
+MODEL_CASSETTE = os.environ.get('MODEL_CASSETTE')
+MODEL_CASSETTE_MODE = os.environ.get('MODEL_CASSETTE_MODE', 'replay').lower()
+MODEL_CASSETTE_TIME_SCALE = float(os.environ.get('MODEL_CASSETTE_TIME_SCALE', 1.0))
+MODEL_CASSETTE_MISS = os.environ.get('MODEL_CASSETTE_MISS', 'error').lower()
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a prompt with no recording"""
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def _chunk_text(chunk):
+    # Chunks carrying only a finish reason or safety ratings have no text
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+
+def _usage(response):
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None
+    return {
+        'prompt_token_count': usage.prompt_token_count,
+        'candidates_token_count': usage.candidates_token_count,
+        'total_token_count': usage.total_token_count,
+    }
+
+
+class CassetteWriter:
+    """Appends recordings as JSON lines; safe across threads and workers"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        # One write on an O_APPEND descriptor keeps concurrent writers' lines whole
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+class RecordingResponse:
+    """Wraps a streamed SDK response, recording chunk timing as it is consumed"""
+
+    def __init__(self, response, on_complete, started):
+        self._response = response
+        self._on_complete = on_complete
+        self._started = started
+        self._chunks = []
+
+    def __iter__(self):
+        try:
+            for chunk in self._response:
+                self._chunks.append((time.perf_counter() - self._started, _chunk_text(chunk)))
+                yield chunk
+        except Exception as e:
+            self._on_complete(error=e)
+            raise
+        self._on_complete(chunks=self._chunks, usage=_usage(self._response))
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class ModelCassette:
+    """Model wrapper recording to, or replaying from, a cassette file"""
+
+    def __init__(self, model=None, path=MODEL_CASSETTE, mode=MODEL_CASSETTE_MODE,
+                 time_scale=MODEL_CASSETTE_TIME_SCALE, miss=MODEL_CASSETTE_MISS):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown MODEL_CASSETTE_MODE {mode!r}; choose record or replay")
+        if mode == 'record' and model is None:
+            raise ValueError("Recording a cassette needs a model to record from")
+        self.model = model
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.miss = miss
+        self.model_name = getattr(model, 'model_name', None) or 'cassette'
+
+        if mode == 'record':
+            self._writer = CassetteWriter(path)
+        else:
+            self._lock = threading.Lock()
+            self._by_prompt = defaultdict(list)
+            with open(path, encoding='utf-8') as src:
+                for line in src:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._by_prompt[entry['prompt_hash']].append(entry)
+            if not self._by_prompt:
+                raise ValueError(f"Cassette {path} has no recordings")
+            self._turns = {key: itertools.cycle(entries) for key, entries in self._by_prompt.items()}
+            self._all = itertools.cycle([e for entries in self._by_prompt.values() for e in entries])
+
+    def __len__(self):
+        return sum(map(len, self._by_prompt.values())) if self.mode == 'replay' else 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if self.mode == 'record':
+            return self._record(prompt, stream, **kwargs)
+        return self._replay(prompt, stream)
+
+    # ============= RECORD =============
+
+    def _record(self, prompt, stream, **kwargs):
+        key = prompt_hash(prompt)
+        started = time.perf_counter()
+
+        def complete(chunks=None, usage=None, error=None):
+            entry = {
+                'prompt_hash': key,
+                'model': self.model_name,
+                'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'latency': round(time.perf_counter() - started, 6),
+            }
+            if error is not None:
+                entry['error'] = {'code': getattr(error, 'code', None), 'message': getattr(error, 'message', None) or str(error)}
+            else:
+                entry['text'] = ''.join(text for _offset, text in chunks)
+                entry['chunks'] = [[round(offset, 6), len(text)] for offset, text in chunks]
+                entry['usage'] = usage
+            self._writer.append(entry)
+
+        try:
+            response = self.model.generate_content(prompt, stream=stream, **kwargs)
+        except Exception as e:
+            complete(error=e)
+            raise
+        if stream:
+            return RecordingResponse(response, complete, started)
+        text = _chunk_text(response)
+        complete(chunks=[(time.perf_counter() - started, text)], usage=_usage(response))
+        return response
+
+    # ============= REPLAY =============
+
+    def _next_entry(self, prompt):
+        key = prompt_hash(prompt)
+        with self._lock:
+            turns = self._turns.get(key)
+            if turns is not None:
+                return next(turns)
+            if self.miss == 'cycle':
+                return next(self._all)
+        raise CassetteMiss(f"No recording for prompt {key[:12]} in {self.path}")
+
+    def _replay(self, prompt, stream):
+        entry = self._next_entry(prompt)
+        scale = self.time_scale
+
+        error = entry.get('error')
+        if error is not None:
+            if scale > 0:
+                time.sleep(entry['latency'] * scale)
+            code = error.get('code')
+            if isinstance(code, int):
+                raise _api_error(code, error['message'])
+            raise RuntimeError(error['message'])
+
+        text = entry['text']
+        chunks, delays, position, previous = [], [], 0, 0.0
+        for offset, length in entry['chunks']:
+            chunks.append(text[position:position + length])
+            delays.append(max(0.0, offset - previous) * scale)
+            position += length
+            previous = offset
+
+        usage = entry.get('usage')
+        if usage is not None:
+            usage = FakeUsageMetadata(usage['prompt_token_count'], usage['candidates_token_count'])
+        response = FakeResponse(chunks, delays, usage)
+        if not stream:
+            response.resolve()
+        return response
@@ -0,0 +1,213 @@
+"""
+Process-pool execution of the batch planner for large cohorts.
+
+CohortPlanner copies the food data a BatchMealPlanner needs - the
+catalog's column arrays, the dish names (as one UTF-8 blob plus offsets),
+the scoring feature matrix and the calorie sort order - into a single
+shared memory block once. Worker processes attach to that block by name
+and wrap the arrays in place, so nothing food-sized is pickled, per
+worker or per task.
+
+Profiles are sent to the workers in chunks. Workers return only the
+calorie targets and chosen dataset rows (small int arrays). At most
+``window`` chunks are in flight, so memory stays bounded however many
+profiles are streamed, and results come back in submission order:
+
+* ``iter_selections`` yields them as CohortPlan records (rows per day and
+  slot); the parent does no per-meal work, so throughput scales with the
+  workers,
+* ``iter_plans`` also builds each weekly plan dict, which the parent does
+  one profile at a time (about a fifth of the selection time), so it
+  scales only until the parent is busy building plans. Consumers that
+  can, take CohortPlan records and call ``weekly_plan()`` only for the
+  plans they need as dicts.
+"""
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch_planner import BatchMealPlanner
+from food_catalog import FoodCatalog
+from meal_candidates import FoodCandidateIndex
+
+COHORT_CHUNK = int(os.environ.get('COHORT_CHUNK', 1000))
+
+# Weeks have at most this many meal slots (six meals a day plus the two snacks)
+MAX_SLOTS = 8
+_ALIGN = 64
+
+
+def _layout(arrays):
+    """Offsets of each array in one block, 64-byte aligned"""
+    offsets, size = {}, 0
+    for key, array in arrays.items():
+        size = -(-size // _ALIGN) * _ALIGN
+        offsets[key] = (size, array.dtype.str, array.shape)
+        size += array.nbytes
+    return offsets, max(size, 1)
+
+
+def share_food_index(food_index):
+    """Copy food_index's arrays into a new SharedMemory block; returns (block, manifest)"""
+    catalog = food_index.catalog
+    arrays = {}
+    aliases = {}
+    seen = {}
+    for column, values in catalog.numeric.items():
+        if id(values) in seen:
+            aliases[column] = seen[id(values)]
+        else:
+            seen[id(values)] = column
+            arrays[('numeric', column)] = values
+    for column, (codes, _labels) in catalog.categories.items():
+        arrays[('codes', column)] = codes
+    for column, bits in catalog.flags.items():
+        arrays[('flags', column)] = bits
+    if catalog.names is not None:
+        encoded = [str(name).encode('utf-8') for name in catalog.names]
+        arrays[('names', 'offsets')] = np.cumsum([0] + [len(name) for name in encoded], dtype=np.int64)
+        arrays[('names', 'blob')] = np.frombuffer(b''.join(encoded) or b'\0', dtype=np.uint8)
+    arrays[('index', 'features')] = food_index.features
+    if food_index.calories is not None:
+        arrays[('index', 'calorie_order')] = food_index.calories[1]
+
+    offsets, size = _layout(arrays)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    for key, array in arrays.items():
+        offset, dtype, shape = offsets[key]
+        np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = array
+
+    manifest = {
+        'name': block.name,
+        'size': catalog.size,
+        'offsets': offsets,
+        'aliases': aliases,
+        'labels': {column: labels for column, (_codes, labels) in catalog.categories.items()},
+    }
+    return block, manifest
+
+
+def attach_food_index(manifest):
+    """(block, FoodCandidateIndex) over the arrays of a shared block, without copying them"""
+    # Pool workers share their parent's resource tracker, which unlinks the block if the parent dies
+    block = shared_memory.SharedMemory(name=manifest['name'])
+
+    views = {key: np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+             for key, (offset, dtype, shape) in manifest['offsets'].items()}
+    numeric = {column: views[kind, column] for kind, column in views if kind == 'numeric'}
+    for column, base in manifest['aliases'].items():
+        numeric[column] = numeric[base]
+    categories = {column: (views['codes', column], labels) for column, labels in manifest['labels'].items()}
+    flags = {column: views[kind, column] for kind, column in views if kind == 'flags'}
+    names = None
+    if ('names', 'blob') in views:
+        blob = views['names', 'blob'].tobytes()
+        offsets = views['names', 'offsets'].tolist()
+        names = [blob[start:stop].decode('utf-8') for start, stop in zip(offsets, offsets[1:])]
+
+    catalog = FoodCatalog(manifest['size'], names, numeric, categories, flags)
+    index = FoodCandidateIndex(catalog, features=views['index', 'features'],
+                               calorie_order=views.get(('index', 'calorie_order')))
+    return block, index
+
+
+# ============= WORKERS =============
+
+_worker = None
+
+
+def _init_worker(manifest):
+    global _worker
+    block, index = attach_food_index(manifest)
+    _worker = (block, BatchMealPlanner(index))
+
+
+def _plan_rows(profiles):
+    """Calorie targets (profiles x MAX_SLOTS) and chosen rows (profiles x days x MAX_SLOTS) for a chunk"""
+    planner = _worker[1]
+    schedules, targets, rows = planner.select_chunk(profiles)
+    packed_targets = np.zeros((len(profiles), MAX_SLOTS), dtype=np.int64)
+    days = len(rows[0]) if rows else 0
+    packed_rows = np.full((len(profiles), days, MAX_SLOTS), -2, dtype=np.int32)
+    for position, (schedule, target, week) in enumerate(zip(schedules, targets, rows)):
+        slots = len(schedule.slots)
+        packed_targets[position, :slots] = target
+        packed_rows[position, :, :slots] = week
+    return packed_targets, packed_rows
+
+
+class CohortPlan:
+    """One profile's selection as returned by a worker; the plan dict is built on demand"""
+
+    __slots__ = ('planner', 'schedule', 'targets', 'rows')
+
+    def __init__(self, planner, schedule, targets, rows):
+        self.planner = planner
+        self.schedule = schedule
+        self.targets = targets
+        self.rows = rows
+
+    @property
+    def meal_types(self):
+        return self.schedule.slots
+
+    def weekly_plan(self):
+        """The weekly plan dict, as BatchMealPlanner.plan builds it"""
+        return self.planner.materialize(self.schedule, self.targets.tolist(), self.rows.tolist())
+
+
+class CohortPlanner:
+    """Plan large cohorts on a process pool sharing one copy of the food data"""
+
+    def __init__(self, food_index, workers=None, chunk_size=COHORT_CHUNK, window=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.window = window or 2 * self.workers
+        self.planner = BatchMealPlanner(food_index)
+        self._block, manifest = share_food_index(food_index)
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(manifest,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._block.close()
+            self._block.unlink()
+
+    def iter_plans(self, profiles):
+        """Yield each profile's weekly plan in submission order"""
+        for selection in self.iter_selections(profiles):
+            yield selection.weekly_plan()
+
+    def iter_selections(self, profiles):
+        """Yield each profile's CohortPlan in submission order"""
+        profiles = iter(profiles)
+        pending = deque()
+        while True:
+            while len(pending) < self.window:
+                chunk = list(itertools.islice(profiles, self.chunk_size))
+                if not chunk:
+                    break
+                pending.append((chunk, self._pool.submit(_plan_rows, chunk)))
+            if not pending:
+                return
+            chunk, future = pending.popleft()
+            targets, rows = future.result()
+            for profile, target, week in zip(chunk, targets, rows):
+                schedule = self.planner._schedule(profile)
+                slots = len(schedule.slots)
+                yield CohortPlan(self.planner, schedule, target[:slots], week[:, :slots])
+
+    def plan(self, profiles):
+        return list(self.iter_plans(profiles))
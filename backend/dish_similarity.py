@@ -0,0 +1,123 @@
+"""
+Dish similarity neighbor lists for diversity-aware meal selection.
+
+Exact dish names are the planner's only notion of variety, so "Paneer
+butter masala" happily follows "Paneer tikka masala". DishSimilarity is
+built once per dataset and keeps, for every dish, its SIMILAR_TOP_K most
+similar dishes:
+
+* nutrient similarity is the cosine of the dishes' standardized nutrient
+  vectors (negative correlation counts as 0),
+* name similarity is the Jaccard index of their lowercase name tokens,
+  counted from token posting lists, so only dishes sharing a token are
+  ever compared by name,
+* the two are blended by NUTRIENT_SHARE, computed a block of dishes at a
+  time so memory stays bounded, and each block keeps only its top k.
+
+DiversityPenalty holds, per dish, its highest similarity to the dishes
+chosen so far; choosing a dish only touches that dish's k neighbors.
+The planner subtracts it from a candidate's relevance (maximal marginal
+relevance) instead of comparing candidates pairwise.
+"""
+
+import re
+
+import numpy as np
+
+from blockwise import BLOCK_CELLS, row_blocks, smallest_k, standardize
+from meal_candidates import NUTRIENT_FEATURES
+
+SIMILAR_TOP_K = 16
+
+# Weight of nutrient cosine against name-token Jaccard
+NUTRIENT_SHARE = 0.5
+
+STOP_TOKENS = frozenset(('a', 'and', 'in', 'of', 'on', 'the', 'with'))
+_TOKEN = re.compile(r'[a-z]+')
+
+
+def name_tokens(name):
+    """Lowercase word tokens of a dish name, without filler words"""
+    if not isinstance(name, str):
+        return frozenset()
+    return frozenset(_TOKEN.findall(name.lower())) - STOP_TOKENS
+
+
+class DishSimilarity:
+    """Top-k most similar dishes per dataset row"""
+
+    def __init__(self, food_index, k=SIMILAR_TOP_K, chunk_cells=BLOCK_CELLS):
+        self.size = food_index.size
+        self.k = max(0, min(k, self.size - 1))
+
+        columns = [food_index.feature_index[nutrient] for nutrient in NUTRIENT_FEATURES]
+        standardized = standardize(food_index.features[:, columns].astype(np.float64))
+        norms = np.linalg.norm(standardized, axis=1, keepdims=True)
+        self._unit = (standardized / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+        tokens = [name_tokens(name) for name in food_index.names]
+        self._token_counts = np.array([len(dish_tokens) for dish_tokens in tokens], dtype=np.float32)
+        postings = {}
+        for row, dish_tokens in enumerate(tokens):
+            for token in dish_tokens:
+                postings.setdefault(token, []).append(row)
+        # Tokens of a single dish never add to an intersection
+        self._postings = {token: np.array(rows) for token, rows in postings.items() if len(rows) > 1}
+        self._tokens = tokens
+
+        self.neighbors = np.zeros((self.size, self.k), dtype=np.int32)
+        self.scores = np.zeros((self.size, self.k), dtype=np.float32)
+        if self.k:
+            for start, stop in row_blocks(self.size, self.size, chunk_cells):
+                self._top_k(start, stop)
+        del self._unit, self._token_counts, self._postings, self._tokens
+
+    def _top_k(self, start, stop):
+        similarity = self._unit[start:stop] @ self._unit.T
+        np.maximum(similarity, 0, out=similarity)
+        similarity *= NUTRIENT_SHARE
+
+        shared = np.zeros((stop - start, self.size), dtype=np.float32)
+        chunk_tokens = set().union(*self._tokens[start:stop]) & self._postings.keys()
+        for token in chunk_tokens:
+            rows = self._postings[token]
+            inside = rows[(rows >= start) & (rows < stop)]
+            shared[np.ix_(inside - start, rows)] += 1
+        # Jaccard only where names share a token
+        dish, other = np.nonzero(shared)
+        common = shared[dish, other]
+        union = self._token_counts[dish + start] + self._token_counts[other] - common
+        similarity[dish, other] += (1 - NUTRIENT_SHARE) * common / union
+
+        # A dish is not its own neighbor
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -1
+        top, negated = smallest_k(-similarity, self.k)
+        self.neighbors[start:stop] = top
+        self.scores[start:stop] = -negated
+
+    @property
+    def nbytes(self):
+        return self.neighbors.nbytes + self.scores.nbytes
+
+    def similar(self, row):
+        """[(row, similarity)] of a dish's neighbors, most similar first"""
+        return list(zip(self.neighbors[row].tolist(), self.scores[row].tolist()))
+
+
+class DiversityPenalty:
+    """Per dish, the highest similarity to any dish chosen since the last reset"""
+
+    def __init__(self, similarity):
+        self.similarity = similarity
+        self.values = np.zeros(similarity.size, dtype=np.float32)
+
+    def add(self, row):
+        """Record a chosen dish; O(k)"""
+        neighbors = self.similarity.neighbors[row]
+        self.values[neighbors] = np.maximum(self.values[neighbors], self.similarity.scores[row])
+
+    def reset(self):
+        self.values.fill(0)
+
+    def __getitem__(self, rows):
+        return self.values[rows]
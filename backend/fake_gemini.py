@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini API, for load tests and offline runs.
+
+Two ways to use it:
+
+* in-process - set ``MODEL_BACKEND=fake`` and DietPlanGenerator uses
+  FakeGenerativeModel instead of ``genai.GenerativeModel``; no API key
+  or network needed.
+* as a server - ``python fake_gemini.py --port 8089`` speaks the Gemini
+  REST API (models list, generateContent, streamGenerateContent); point
+  the real SDK at it with ``GEMINI_API_ENDPOINT=http://localhost:8089``.
+
+Responses are schema-valid 7-day plans built from indian_food_nutrition.csv
+(deterministic per prompt), or recorded response texts from a fixtures
+directory. Behaviour is configured with ``FAKE_MODEL_PROFILE``: a preset
+name, a JSON object, or a path to a JSON file. A JSON profile may name a
+``preset`` and override any of these keys:
+
+    latency_median   median total generation time, seconds (lognormal)
+    latency_sigma    lognormal sigma of the generation time
+    ttft_fraction    share of the generation time before the first chunk
+    chunks           number of streamed chunks
+    rate_429         probability of a 429 RESOURCE_EXHAUSTED error
+    rate_500         probability of a 500 INTERNAL error
+    truncated_rate   probability of cutting the JSON off mid-document
+    fenced_rate      probability of wrapping the JSON in ```json fences
+    time_scale       multiplier applied to every sleep (0 = no sleeping)
+    fixtures         directory of recorded *.json / *.txt response texts
+    seed             seed for latency and failure sampling
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'indian_food_nutrition.csv')
+FAKE_MODEL_NAME = 'gemini-2.5-flash-lite'
+
+PRESETS = {
+    'instant': {'latency_median': 0.0, 'latency_sigma': 0.0, 'time_scale': 0.0},
+    'realistic': {'latency_median': 14.0, 'latency_sigma': 0.35, 'ttft_fraction': 0.06, 'chunks': 40},
+    'flaky': {
+        'latency_median': 14.0, 'latency_sigma': 0.5, 'ttft_fraction': 0.06, 'chunks': 40,
+        'rate_429': 0.05, 'rate_500': 0.02, 'truncated_rate': 0.05, 'fenced_rate': 0.3,
+    },
+}
+
+DEFAULT_PROFILE = {
+    'latency_median': 2.0,
+    'latency_sigma': 0.3,
+    'ttft_fraction': 0.1,
+    'chunks': 20,
+    'rate_429': 0.0,
+    'rate_500': 0.0,
+    'truncated_rate': 0.0,
+    'fenced_rate': 0.0,
+    'time_scale': 1.0,
+    'fixtures': None,
+    'seed': None,
+}
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MEAL_SLOTS = [
+    ('Breakfast', '8:00 AM', 0.25),
+    ('Lunch', '1:00 PM', 0.35),
+    ('Dinner', '8:00 PM', 0.30),
+    ('Evening Snack', '5:00 PM', 0.10),
+    ('Mid-Morning Snack', '10:30 AM', 0.08),
+    ('Pre-Workout Snack', '6:30 AM', 0.07),
+]
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2, 'lightly active': 1.375, 'moderately active': 1.55,
+    'very active': 1.725, 'extremely active': 1.9,
+}
+GOAL_ADJUSTMENTS = {'weight loss': -500, 'muscle gain': 300, 'athletic performance': 200}
+
+_PROFILE_LINE = re.compile(r'^- ([A-Za-z ]+): (.*)$', re.MULTILINE)
+_CONTINUATION_KEYS = re.compile(r'Return ONLY a JSON object with the keys (.*), using the structure above')
+_CONTINUATION_DAYS = re.compile(r'"meal_plan" must contain only days ([\d, ]+)')
+
+
+def load_profile(spec=None):
+    """Resolve a profile spec (preset name, JSON text or JSON file) into settings"""
+    spec = spec if spec is not None else os.environ.get('FAKE_MODEL_PROFILE', '')
+    overrides = {}
+    if spec in PRESETS:
+        overrides = dict(PRESETS[spec])
+    elif spec.strip().startswith('{'):
+        overrides = json.loads(spec)
+    elif spec:
+        with open(spec, encoding='utf-8') as src:
+            overrides = json.load(src)
+
+    profile = dict(DEFAULT_PROFILE)
+    preset = overrides.pop('preset', None)
+    if preset:
+        profile.update(PRESETS[preset])
+    unknown = set(overrides) - set(DEFAULT_PROFILE)
+    if unknown:
+        raise ValueError(f"Unknown fake model profile keys: {', '.join(sorted(unknown))}")
+    profile.update(overrides)
+    return profile
+
+
+# ============= PLAN SYNTHESIS =============
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+
+def _load_dataset():
+    global _dataset
+    with _dataset_lock:
+        if _dataset is None:
+            with open(DATASET_PATH, encoding='utf-8') as src:
+                rows = [row for row in csv.DictReader(src) if float(row['calories_(kcal)'] or 0) > 0]
+            _dataset = {
+                'all': rows,
+                'veg': [row for row in rows if row['veg_nonveg'] == 'Vegetarian'],
+                'vegan': [row for row in rows if row['is_vegan'] == '1'],
+            }
+    return _dataset
+
+
+def parse_prompt_profile(prompt):
+    """Pull the user profile fields back out of DietPlanGenerator's prompt"""
+    return {key.strip().lower(): value.strip() for key, value in _PROFILE_LINE.findall(prompt)}
+
+
+def _number(value, default):
+    try:
+        return float(str(value).split()[0])
+    except (ValueError, IndexError):
+        return default
+
+
+def _food_item(row, scale):
+    return {
+        'item': row['dish_name'],
+        'quantity': f"{round(100 * scale)} g",
+        'calories': round(float(row['calories_(kcal)']) * scale),
+        'protein': round(float(row['protein_(g)']) * scale, 1),
+        'carbs': round(float(row['carbohydrates_(g)']) * scale, 1),
+        'fats': round(float(row['fats_(g)']) * scale, 1),
+    }
+
+
+def _meal(row, slot, time_label, target, rng):
+    calories = float(row['calories_(kcal)'])
+    scale = min(max(target / calories, 0.5), 3.0)
+    item = _food_item(row, scale)
+    return {
+        'meal_type': slot,
+        'time': time_label,
+        'meal_name': row['dish_name'],
+        'food_items': [item],
+        'total_meal_calories': item['calories'],
+        'ingredients': [
+            {'ingredient': word.lower(), 'quantity': str(rng.randint(1, 4) * 25), 'unit': 'grams'}
+            for word in re.findall(r'[A-Za-z]{4,}', row['dish_name'])[:4]
+        ] or [{'ingredient': row['dish_name'].lower(), 'quantity': '100', 'unit': 'grams'}],
+        'recipe_steps': [
+            {'step_number': 1, 'instruction': f"Prepare the ingredients for {row['dish_name']}."},
+            {'step_number': 2, 'instruction': 'Cook on medium heat until done, stirring occasionally.'},
+            {'step_number': 3, 'instruction': 'Adjust seasoning and serve warm.'},
+        ],
+        'cooking_time': f"{rng.choice([10, 15, 20, 30, 40])} minutes",
+        'difficulty_level': rng.choice(['Easy', 'Medium', 'Hard']),
+        'notes': f"{row['region']} dish, {row['veg_nonveg'].lower()}.",
+    }
+
+
+def build_plan(prompt):
+    """A schema-valid 7-day plan for the profile in prompt, deterministic per prompt"""
+    profile = parse_prompt_profile(prompt)
+    rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+    dataset = _load_dataset()
+
+    diet = profile.get('diet preference', '').lower()
+    pool = dataset['vegan'] if diet == 'vegan' else dataset['veg'] if diet == 'vegetarian' else dataset['all']
+
+    weight = _number(profile.get('current weight'), 70)
+    height = _number(profile.get('height'), 170)
+    age = _number(profile.get('age'), 30)
+    male = profile.get('gender', 'M').upper().startswith('M')
+    bmr = 10 * weight + 6.25 * height - 5 * age + (5 if male else -161)
+    tdee = bmr * ACTIVITY_MULTIPLIERS.get(profile.get('activity level', '').lower(), 1.55)
+    adjustment = GOAL_ADJUSTMENTS.get(profile.get('fitness goal', '').lower(), 0)
+    target = round(tdee + adjustment)
+
+    meals_per_day = int(min(max(_number(profile.get('meals per day'), 3), 3), len(MEAL_SLOTS)))
+    slots = MEAL_SLOTS[:meals_per_day]
+    share_total = sum(share for _slot, _time, share in slots)
+
+    meal_plan = []
+    for day, day_name in enumerate(DAY_NAMES, 1):
+        meals = [
+            _meal(rng.choice(pool), slot, time_label, target * share / share_total, rng)
+            for slot, time_label, share in slots
+        ]
+        meal_plan.append({
+            'day': day,
+            'day_name': day_name,
+            'meals': meals,
+            'daily_total_calories': sum(meal['total_meal_calories'] for meal in meals),
+        })
+
+    protein_g = round(target * 0.25 / 4)
+    carbs_g = round(target * 0.45 / 4)
+    fats_g = round(target * 0.30 / 9)
+    day_items = [[item for meal in day['meals'] for item in meal['food_items']] for day in meal_plan]
+    total_calories = sum(day['daily_total_calories'] for day in meal_plan)
+
+    return {
+        'daily_calorie_target': target,
+        'bmr': round(bmr),
+        'tdee': round(tdee),
+        'calorie_adjustment': adjustment,
+        'macronutrient_breakdown': {
+            'protein_grams': protein_g, 'protein_percentage': 25,
+            'carbs_grams': carbs_g, 'carbs_percentage': 45,
+            'fats_grams': fats_g, 'fats_percentage': 30,
+        },
+        'meal_plan': meal_plan,
+        'snack_options': [
+            {'snack_name': row['dish_name'], 'ingredients': [row['dish_name'].lower()],
+             'calories': round(float(row['calories_(kcal)'])), 'protein': round(float(row['protein_(g)']), 1)}
+            for row in rng.sample(pool, 3)
+        ],
+        'hydration_guidelines': {
+            'daily_water_liters': round(weight * 0.035, 1),
+            'water_intake_schedule': [
+                {'timing': 'Morning', 'liters': 0.75}, {'timing': 'Afternoon', 'liters': 1.0},
+                {'timing': 'Evening', 'liters': 0.75},
+            ],
+        },
+        'meal_timing': {
+            'breakfast_time': '8:00 AM', 'lunch_time': '1:00 PM', 'dinner_time': '8:00 PM',
+            'snack_timings': ['10:30 AM', '5:00 PM'],
+        },
+        'nutrition_tips': [
+            'Eat slowly and stop when you are about 80% full.',
+            'Include a source of protein in every meal.',
+            'Prefer whole grains over refined grains.',
+            'Add a portion of vegetables to lunch and dinner.',
+            'Limit added sugar and deep-fried snacks.',
+        ],
+        'supplement_recommendations': [
+            {'supplement_name': 'Vitamin D3', 'dosage': '1000 IU', 'timing': 'With breakfast',
+             'benefit': 'Supports bone health'},
+        ],
+        'dietary_restrictions_applied': {
+            'allergies_excluded': [a for a in [profile.get('food allergies', 'None')] if a != 'None'],
+            'dislikes_excluded': [d for d in [profile.get('dislikes', 'None')] if d != 'None'],
+        },
+        'weekly_summary': {
+            'total_calories': total_calories,
+            'average_daily_calories': round(total_calories / 7),
+            'average_protein': round(sum(i['protein'] for items in day_items for i in items) / 7, 1),
+            'average_carbs': round(sum(i['carbs'] for items in day_items for i in items) / 7, 1),
+            'average_fats': round(sum(i['fats'] for items in day_items for i in items) / 7, 1),
+        },
+    }
+
+
+# ============= MODEL STAND-IN =============
+
+
+class FakeModelError(Exception):
+    """Error raised in place of an API failure when google.api_core is unavailable"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def _api_error(code, message):
+    try:
+        from google.api_core import exceptions
+    except ImportError:  # pragma: no cover - google-generativeai always ships it
+        return FakeModelError(code, message)
+    return exceptions.from_http_status(code, message)
+
+
+class FakeUsageMetadata:
+    __slots__ = ('prompt_token_count', 'candidates_token_count', 'total_token_count')
+
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class FakeChunk:
+    __slots__ = ('text', 'usage_metadata')
+
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeResponse:
+    """Mimics the SDK response: ``.text``, ``.usage_metadata`` and chunk iteration"""
+
+    def __init__(self, chunks, delays, usage_metadata):
+        self._chunks = chunks
+        self._delays = delays
+        self._consumed = False
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        for text, delay in zip(self._chunks, self._delays):
+            if delay > 0:
+                time.sleep(delay)
+            yield FakeChunk(text, self.usage_metadata)
+        self._consumed = True
+
+    def resolve(self):
+        if not self._consumed:
+            for _chunk in self:
+                pass
+
+    @property
+    def text(self):
+        self.resolve()
+        return ''.join(self._chunks)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeGenerativeModel:
+    """Drop-in for ``genai.GenerativeModel`` driven by a latency/failure profile"""
+
+    def __init__(self, profile=None, model_name=FAKE_MODEL_NAME):
+        self.profile = load_profile() if profile is None else load_profile(profile) if isinstance(profile, str) else profile
+        self.model_name = model_name
+        self._rng = random.Random(self.profile['seed'])
+        self._rng_lock = threading.Lock()
+        self._fixtures = self._load_fixtures(self.profile['fixtures'])
+
+    @staticmethod
+    def _load_fixtures(directory):
+        if not directory:
+            return []
+        texts = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(('.json', '.txt')):
+                with open(os.path.join(directory, name), encoding='utf-8') as src:
+                    texts.append(src.read())
+        return texts
+
+    def response_text(self, prompt):
+        if self._fixtures:
+            digest = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+            return self._fixtures[digest % len(self._fixtures)]
+        plan = build_plan(prompt)
+        keys = _CONTINUATION_KEYS.search(prompt)
+        if keys:
+            # Follow-up for a truncated plan: answer only the parts asked for
+            days = _CONTINUATION_DAYS.search(prompt)
+            wanted = {int(day) for day in re.findall(r'\d+', days.group(1))} if days else set()
+            plan = {key: plan[key] for key in re.findall(r'"(\w+)"', keys.group(1)) if key in plan}
+            if 'meal_plan' in plan:
+                plan['meal_plan'] = [day for day in plan['meal_plan'] if day['day'] in wanted]
+        return json.dumps(plan, indent=2)
+
+    def plan_call(self, prompt):
+        """Sample one call: (error code or None, chunks, per-chunk delays, usage)"""
+        p = self.profile
+        with self._rng_lock:
+            rng = random.Random(self._rng.random())
+
+        scale = p['time_scale']
+        total = 0.0
+        if p['latency_median'] > 0:
+            total = math.exp(rng.gauss(math.log(p['latency_median']), p['latency_sigma']))
+        total *= scale
+        ttft = total * p['ttft_fraction']
+
+        roll = rng.random()
+        if roll < p['rate_429']:
+            return 429, ttft, None, None, None
+        if roll < p['rate_429'] + p['rate_500']:
+            return 500, ttft, None, None, None
+
+        text = self.response_text(prompt)
+        if rng.random() < p['truncated_rate']:
+            text = text[:int(len(text) * rng.uniform(0.3, 0.95))]
+        if rng.random() < p['fenced_rate']:
+            text = f"```json\n{text}\n```"
+
+        n = max(1, min(int(p['chunks']), len(text)))
+        size = math.ceil(len(text) / n)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        gap = (total - ttft) / max(1, len(chunks) - 1)
+        delays = [ttft] + [gap] * (len(chunks) - 1)
+        usage = FakeUsageMetadata(estimate_tokens(prompt), estimate_tokens(text))
+        return None, ttft, chunks, delays, usage
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        error, ttft, chunks, delays, usage = self.plan_call(prompt)
+        if error is not None:
+            if ttft > 0:
+                time.sleep(ttft)
+            raise _api_error(error, 'RESOURCE_EXHAUSTED' if error == 429 else 'INTERNAL')
+        response = FakeResponse(chunks, delays, usage)
+        if not stream:
+            response.resolve()
+        return response
+
+
+# ============= REST SERVER =============
+
+
+def _candidate(text, usage, finish=True):
+    body = {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}]}
+    if finish:
+        body['candidates'][0]['finishReason'] = 'STOP'
+        body['usageMetadata'] = {
+            'promptTokenCount': usage.prompt_token_count,
+            'candidatesTokenCount': usage.candidates_token_count,
+            'totalTokenCount': usage.total_token_count,
+        }
+    body['modelVersion'] = FAKE_MODEL_NAME
+    return body
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Serves the subset of the Gemini REST API that DietPlanGenerator uses"""
+
+    model = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'models': [{
+                'name': f'models/{FAKE_MODEL_NAME}',
+                'version': '001',
+                'displayName': 'Fake Gemini',
+                'inputTokenLimit': 1048576,
+                'outputTokenLimit': 65536,
+                'supportedGenerationMethods': ['generateContent', 'countTokens'],
+            }]})
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        prompt = ''.join(
+            part.get('text', '')
+            for content in request.get('contents', [])
+            for part in content.get('parts', [])
+        )
+
+        if url.path.endswith(':generateContent'):
+            self._generate(prompt)
+        elif url.path.endswith(':streamGenerateContent'):
+            self._stream(prompt, parse_qs(url.query).get('alt', ['json'])[0] == 'sse')
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+    def _error(self, code, ttft):
+        if ttft > 0:
+            time.sleep(ttft)
+        status = 'RESOURCE_EXHAUSTED' if code == 429 else 'INTERNAL'
+        self._send_json(code, {'error': {'code': code, 'message': f'Fake {status}', 'status': status}})
+
+    def _generate(self, prompt):
+        error, ttft, chunks, delays, usage = self.model.plan_call(prompt)
+        if error is not None:
+            return self._error(error, ttft)
+        time.sleep(sum(delays))
+        self._send_json(200, _candidate(''.join(chunks), usage))
+
+    def _stream(self, prompt, sse):
+        error, ttft, chunks, delays, usage = self.model.plan_call(prompt)
+        if error is not None:
+            return self._error(error, ttft)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json; charset=UTF-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write(data):
+            payload = data.encode('utf-8')
+            self.wfile.write(f'{len(payload):x}\r\n'.encode('ascii') + payload + b'\r\n')
+            self.wfile.flush()
+
+        last = len(chunks) - 1
+        try:
+            for i, (text, delay) in enumerate(zip(chunks, delays)):
+                if delay > 0:
+                    time.sleep(delay)
+                body = json.dumps(_candidate(text, usage, finish=i == last))
+                if sse:
+                    write(f'data: {body}\r\n\r\n')
+                else:
+                    write(('[' if i == 0 else ',\r\n') + body + (']' if i == last else ''))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream, as a cancelled or hedged call does
+            self.close_connection = True
+
+
+def serve(port=8089, profile=None, host='127.0.0.1'):
+    FakeGeminiHandler.model = FakeGenerativeModel(profile)
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Gemini stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--profile', default=None,
+                        help='preset name (%s), JSON object or JSON file' % ', '.join(PRESETS))
+    args = parser.parse_args()
+
+    server = serve(args.port, args.profile, args.host)
+    print(f"🧪 Fake Gemini API listening on http://{args.host}:{args.port}")
+    print(f"   Point the API at it with GEMINI_API_ENDPOINT=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
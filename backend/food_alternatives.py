@@ -0,0 +1,193 @@
+"""
+Nearest-neighbor graph of dishes for instant meal alternatives.
+
+AlternativesGraph is built once per dataset version:
+
+* every dish is a point in standardized nutrient space (calories,
+  protein, carbs, fats, fiber as z-scores; calories weighted up so
+  swaps stay close in energy),
+* dishes are partitioned by veg_nonveg and each dish keeps its
+  ALTERNATIVES_K nearest dishes of its own partition, found blockwise by
+  exact distance, so a vegetarian dish only ever links to vegetarian
+  ones,
+* a request walks one dish's neighbor row and keeps the neighbors within
+  the calorie tolerance: O(k), no scan of the dataset.
+
+The dataset version is a hash of the graph's inputs, so the graph is
+rebuilt only when they change. ``alternatives_graph`` keeps the current
+graph per process and, with ALTERNATIVES_CACHE_DIR set, in an .npz file
+that later processes load instead of rebuilding.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from blockwise import row_blocks, smallest_k, standardize
+
+ALTERNATIVES_K = 10
+
+# Neighbors farther than this from a dish's calories are not offered as swaps
+ALTERNATIVE_CALORIE_TOLERANCE = 0.3
+
+# Feature -> (catalog column, weight in the distance)
+GRAPH_FEATURES = {
+    'calories': ('calories_(kcal)', 2.0),
+    'protein': ('protein_(g)', 1.0),
+    'carbs': ('carbohydrates_(g)', 1.0),
+    'fats': ('fats_(g)', 1.0),
+    'fiber': ('fibre_(g)', 1.0),
+}
+
+GROUP_COLUMN = 'veg_nonveg'
+
+ALTERNATIVES_CACHE_DIR = os.environ.get('ALTERNATIVES_CACHE_DIR')
+
+
+def dataset_version(names, groups, nutrients):
+    """Short content hash of the graph inputs (and of the graph parameters)"""
+    digest = hashlib.sha256()
+    digest.update(repr((ALTERNATIVES_K, GRAPH_FEATURES)).encode('utf-8'))
+    digest.update('\0'.join(str(name) for name in names).encode('utf-8'))
+    digest.update('\0'.join(str(group) for group in groups).encode('utf-8'))
+    digest.update(np.ascontiguousarray(nutrients, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class AlternativesGraph:
+    """Per dish, its nearest dishes of the same veg_nonveg group"""
+
+    def __init__(self, names, groups, nutrients, k=ALTERNATIVES_K, neighbors=None, distances=None, version=None):
+        self.names = list(names)
+        self.groups = list(groups)
+        self.nutrients = np.asarray(nutrients, dtype=np.float64)
+        self.calories = self.nutrients[:, 0]
+        self.size = len(self.names)
+        self.version = version or dataset_version(self.names, self.groups, self.nutrients)
+        self.k = k
+
+        # Per group: its rows sorted by calories, for dishes outside the graph (see nearest)
+        self._by_calories = {}
+        codes, labels = {}, []
+        group_codes = np.empty(self.size, dtype=np.int64)
+        for row, group in enumerate(self.groups):
+            group_codes[row] = codes.setdefault(group, len(labels))
+            if group_codes[row] == len(labels):
+                labels.append(group)
+        for code, group in enumerate(labels):
+            rows = np.flatnonzero(group_codes == code)
+            self._by_calories[group] = rows[np.argsort(self.calories[rows], kind='stable')]
+
+        if neighbors is None:
+            neighbors, distances = self._build(group_codes, len(labels))
+        self.neighbors = neighbors
+        self.distances = distances
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Graph over dataset rows as dicts (nutrition_index.load_food_rows)"""
+        nutrients = np.array([[row.get(column) or 0 for column, _weight in GRAPH_FEATURES.values()] for row in rows],
+                             dtype=np.float64).reshape(len(rows), len(GRAPH_FEATURES))
+        return alternatives_graph([row['dish_name'] for row in rows], [row.get(GROUP_COLUMN, '') for row in rows],
+                                  nutrients)
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """Graph over a FoodCatalog"""
+        columns = [catalog.numeric_column(column) if column in catalog else np.zeros(catalog.size, dtype=np.float32)
+                   for column, _weight in GRAPH_FEATURES.values()]
+        nutrients = np.stack(columns, axis=1).astype(np.float64)
+        if GROUP_COLUMN in catalog.categories:
+            codes, labels = catalog.categories[GROUP_COLUMN]
+            groups = [labels[code] or '' for code in codes.tolist()]
+        else:
+            groups = [''] * catalog.size
+        return alternatives_graph(catalog.names or [''] * catalog.size, groups, nutrients)
+
+    def _build(self, group_codes, group_count):
+        weights = np.array([weight for _column, weight in GRAPH_FEATURES.values()])
+        points = standardize(self.nutrients) * weights
+
+        neighbors = np.full((self.size, self.k), -1, dtype=np.int32)
+        distances = np.full((self.size, self.k), np.inf, dtype=np.float32)
+        for code in range(group_count):
+            rows = np.flatnonzero(group_codes == code)
+            k = min(self.k, len(rows) - 1)
+            if k <= 0:
+                continue
+            members = points[rows]
+            squared = (members ** 2).sum(axis=1)
+            for start, stop in row_blocks(len(rows), len(rows)):
+                block = squared[start:stop, None] + squared[None, :] - 2 * members[start:stop] @ members.T
+                # A dish is not its own alternative
+                block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+                top, top_distances = smallest_k(block, k)
+                neighbors[rows[start:stop], :k] = rows[top]
+                distances[rows[start:stop], :k] = np.sqrt(np.maximum(top_distances, 0))
+        return neighbors, distances
+
+    @property
+    def nbytes(self):
+        return self.neighbors.nbytes + self.distances.nbytes
+
+    def alternatives(self, row, limit=None, tolerance=ALTERNATIVE_CALORIE_TOLERANCE):
+        """[(row, distance)] of the dish's nearest other dishes within the calorie tolerance, closest first"""
+        calories = self.calories[row]
+        name = self.names[row]
+        found = []
+        for neighbor, distance in zip(self.neighbors[row].tolist(), self.distances[row].tolist()):
+            if neighbor < 0:
+                break
+            if self.names[neighbor] == name or abs(self.calories[neighbor] - calories) > tolerance * calories:
+                continue
+            found.append((neighbor, distance))
+            if limit is not None and len(found) >= limit:
+                break
+        return found
+
+    def nearest(self, calories, group):
+        """Row of the group's dish closest in calories (entry point for meals not in the dataset), or None"""
+        rows = self._by_calories.get(group)
+        if rows is None or not len(rows):
+            return None
+        values = self.calories[rows]
+        position = int(np.searchsorted(values, calories))
+        if position == len(rows) or (position > 0 and calories - values[position - 1] <= values[position] - calories):
+            position -= 1
+        return int(rows[position])
+
+    # ============= CACHE =============
+
+    def save(self, path):
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as dst:
+            np.savez(dst, neighbors=self.neighbors, distances=self.distances)
+        os.replace(tmp, path)
+
+
+_current = {}
+
+
+def alternatives_graph(names, groups, nutrients):
+    """The graph for this data: the current one if its version matches, else loaded from the cache or built"""
+    version = dataset_version(names, groups, nutrients)
+    graph = _current.get(version)
+    if graph is not None:
+        return graph
+
+    path = os.path.join(ALTERNATIVES_CACHE_DIR, f'alternatives-{version}.npz') if ALTERNATIVES_CACHE_DIR else None
+    if path and os.path.exists(path):
+        with np.load(path) as cached:
+            graph = AlternativesGraph(names, groups, nutrients, neighbors=cached['neighbors'],
+                                      distances=cached['distances'], version=version)
+    else:
+        graph = AlternativesGraph(names, groups, nutrients, version=version)
+        if path:
+            os.makedirs(ALTERNATIVES_CACHE_DIR, exist_ok=True)
+            graph.save(path)
+
+    # Only the current dataset's graph is kept
+    _current.clear()
+    _current[version] = graph
+    return graph
@@ -0,0 +1,205 @@
+"""
+Compact columnar store of the food dataset for the meal planner.
+
+FoodCatalog keeps one array per column instead of a pandas DataFrame:
+
+* numeric columns as contiguous float32 arrays; a ``*_per_100g`` column
+  that equals its base column (every one in indian_food_nutrition.csv)
+  shares the base array instead of a copy,
+* categorical columns as uint8/uint16 codes plus a label table,
+* is_* flag columns as packed bits,
+* dish names as a plain list.
+
+A planned meal is a MealSelection: a row number into the catalog plus the
+slot's time and calorie target, read through the same keys the planner's
+meal dicts always had.
+"""
+
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+
+NAME_COLUMN = 'dish_name'
+
+# Meal key -> catalog column, in the order plans list them
+MEAL_FIELDS = {
+    'dish_name': 'dish_name',
+    'calories': 'calories_(kcal)',
+    'protein': 'protein_(g)',
+    'carbs': 'carbohydrates_(g)',
+    'fats': 'fats_(g)',
+    'fiber': 'fibre_(g)',
+    'sodium': 'sodium_(mg)',
+    'calcium': 'calcium_(mg)',
+    'iron': 'iron_(mg)',
+    'vitamin_c': 'vitamin_c_(mg)',
+    'meal_category': 'meal_category',
+    'region': 'region',
+    'veg_nonveg': 'veg_nonveg',
+}
+
+# Keys of a planned meal, in the order the planner always built them
+MEAL_KEYS = ('time', *list(MEAL_FIELDS)[:10], 'target_calories', *list(MEAL_FIELDS)[10:])
+
+_PER_100G = '_per_100g'
+_DELETED = object()
+
+
+class FoodCatalog:
+    """Columnar, read-only food dataset"""
+
+    def __init__(self, size, names, numeric, categories, flags):
+        """numeric: {column: float32 array}, categories: {column: (codes, labels)}, flags: {column: packed bits}"""
+        self.size = size
+        self.names = names
+        self.numeric = numeric
+        self.categories = categories
+        self.flags = flags
+        self.columns = frozenset((*numeric, *categories, *flags, *((NAME_COLUMN,) if names is not None else ())))
+
+    @classmethod
+    def from_frame(cls, food_df):
+        size = len(food_df)
+        names = food_df[NAME_COLUMN].tolist() if NAME_COLUMN in food_df.columns else None
+        numeric, categories, flags = {}, {}, {}
+        for column in food_df.columns:
+            if column == NAME_COLUMN:
+                continue
+            series = food_df[column]
+            if column.startswith('is_'):
+                bits = series.fillna(0).to_numpy() != 0
+                flags[column] = np.packbits(bits, bitorder='little')
+            elif pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+                numeric[column] = np.ascontiguousarray(series.to_numpy(dtype=np.float32, na_value=np.nan))
+            else:
+                codes, labels = pd.factorize(series)
+                # Code 0 is reserved for missing values
+                dtype = np.uint8 if len(labels) < 255 else np.uint16 if len(labels) < 65535 else np.uint32
+                categories[column] = ((codes + 1).astype(dtype), [None, *labels.tolist()])
+
+        for column in list(numeric):
+            base = numeric.get(column[:-len(_PER_100G)]) if column.endswith(_PER_100G) else None
+            if base is not None and np.array_equal(base, numeric[column], equal_nan=True):
+                numeric[column] = base
+        return cls(size, names, numeric, categories, flags)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays (shared arrays counted once)"""
+        arrays = {id(array): array for array in self.numeric.values()}
+        arrays.update((id(codes), codes) for codes, _labels in self.categories.values())
+        arrays.update((id(bits), bits) for bits in self.flags.values())
+        return sum(array.nbytes for array in arrays.values())
+
+    # ============= COLUMNS =============
+
+    def flag(self, column):
+        """Boolean array of an is_* column"""
+        return np.unpackbits(self.flags[column], count=self.size, bitorder='little').astype(bool)
+
+    def equals(self, column, value):
+        """Boolean array of rows where column == value"""
+        if column == NAME_COLUMN:
+            return np.fromiter((name == value for name in self.names), dtype=bool, count=self.size)
+        if column in self.flags:
+            return self.flag(column) == value
+        if column in self.categories:
+            codes, labels = self.categories[column]
+            try:
+                return codes == labels.index(value, 1)
+            except ValueError:
+                return np.zeros(self.size, dtype=bool)
+        return self.numeric[column] == value
+
+    def numeric_column(self, column):
+        """float32 array of a numeric or flag column, missing values as 0"""
+        if column in self.flags:
+            return self.flag(column).astype(np.float32)
+        return np.nan_to_num(self.numeric[column])
+
+    # ============= ROWS =============
+
+    def value(self, column, row):
+        """Plain Python value of one cell"""
+        if column == NAME_COLUMN:
+            return self.names[row]
+        numeric = self.numeric.get(column)
+        if numeric is not None:
+            # Shortest decimal that round-trips the float32, so 401.05 reads back as 401.05
+            return float(str(numeric[row]))
+        category = self.categories.get(column)
+        if category is not None:
+            codes, labels = category
+            return labels[codes[row]]
+        bits = self.flags[column]
+        return int(bits[row >> 3] >> (row & 7) & 1)
+
+
+class MealSelection(MutableMapping):
+    """A planned meal backed by a catalog row; edits are kept as overrides"""
+
+    __slots__ = ('catalog', 'row', 'time', 'target_calories', '_changes')
+
+    def __init__(self, catalog, row, time, target_calories):
+        self.catalog = catalog
+        self.row = int(row)
+        self.time = time
+        self.target_calories = target_calories
+        self._changes = None
+
+    @property
+    def edited(self):
+        """Whether any key was changed from the catalog row"""
+        return bool(self._changes)
+
+    def _base(self, key):
+        if key == 'time':
+            return self.time
+        if key == 'target_calories':
+            return self.target_calories
+        column = MEAL_FIELDS.get(key)
+        if column is None:
+            raise KeyError(key)
+        if column not in self.catalog:
+            # Optional dataset columns read as they did from a pandas row
+            return '' if key in ('meal_category', 'region', 'veg_nonveg') else 0
+        return self.catalog.value(column, self.row)
+
+    def __getitem__(self, key):
+        if self._changes and key in self._changes:
+            value = self._changes[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        return self._base(key)
+
+    def __setitem__(self, key, value):
+        if self._changes is None:
+            self._changes = {}
+        self._changes[key] = value
+
+    def __delitem__(self, key):
+        self[key]  # KeyError if absent
+        self[key] = _DELETED
+
+    def __iter__(self):
+        changes = self._changes or {}
+        for key in MEAL_KEYS:
+            if changes.get(key) is not _DELETED:
+                yield key
+        for key, value in changes.items():
+            if key not in MEAL_KEYS and value is not _DELETED:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _key in self)
+
+    def __repr__(self):
+        return f'MealSelection({dict(self)!r})'
@@ -0,0 +1,196 @@
+"""
+Faceted filtering of the food catalog for GET /api/foods.
+
+FoodFacetIndex is column-oriented and built once per worker:
+
+* one bitmap per categorical value (veg_nonveg, region, meal_category,
+  carb_category) and per is_* flag, held as a Python int with bit i set
+  for row i, so combining filters is a chain of big-int ANDs/ORs and a
+  count is ``int.bit_count()``,
+* per numeric column, the row ids sorted by value next to the sorted
+  values; a range filter is two binary searches and the slice in
+  between, packed into a bitmap.
+
+Facet counts are disjunctive: an attribute's counts apply every filter
+except the attribute's own, so the client can see what picking another
+value would return. Nothing is copied per request beyond the bitmaps and
+the page of row ids.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from bitmaps import pack_bitmap, unpack_bitmap
+from food_search import InvalidSearch
+
+CATEGORY_COLUMNS = ('veg_nonveg', 'region', 'meal_category', 'carb_category')
+
+# Query parameter prefix -> per-100 g dataset column
+RANGE_COLUMNS = {
+    'calories': 'calories_(kcal)_per_100g',
+    'protein': 'protein_(g)_per_100g',
+    'carbs': 'carbohydrates_(g)_per_100g',
+    'fats': 'fats_(g)_per_100g',
+}
+
+# Query args of the route itself rather than filters
+PAGING_ARGS = ('page', 'per_page', 'sort')
+
+_FLAG_VALUES = {'1': True, 'true': True, 'yes': True, '0': False, 'false': False, 'no': False}
+RANGE_CACHE_SIZE = 256
+
+
+class FoodFacetIndex:
+    """Bitmap and sorted-array indexes over a columnar food catalog"""
+
+    def __init__(self, size, categories, flags, numeric):
+        """categories: {column: sequence of str}, flags: {column: 0/1 array}, numeric: {column: array}"""
+        self.size = size
+        self.all = (1 << size) - 1
+
+        self.values = {}
+        self.bitmaps = {}
+        for column, values in categories.items():
+            labels, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+            self.values[column] = [label for label in labels.tolist() if label]
+            self.bitmaps[column] = {
+                label.lower(): pack_bitmap(codes == code)
+                for code, label in enumerate(labels.tolist()) if label
+            }
+
+        self.flags = {column: pack_bitmap(np.asarray(bits) != 0) for column, bits in flags.items()}
+
+        self.numeric = {}
+        self.sorted = {}
+        for column, values in numeric.items():
+            values = np.asarray(values, dtype=np.float64)
+            order = np.argsort(values, kind='stable')
+            self.numeric[column] = values
+            self.sorted[column] = (values[order], order)
+        self._ranges = OrderedDict()
+
+    @classmethod
+    def from_rows(cls, rows):
+        flag_columns = [column for column in rows[0] if column.startswith('is_')] if rows else []
+        return cls(
+            len(rows),
+            {column: [row[column] for row in rows] for column in CATEGORY_COLUMNS},
+            {column: np.fromiter((row[column] for row in rows), dtype=np.uint8, count=len(rows))
+             for column in flag_columns},
+            {column: np.fromiter((row[column] for row in rows), dtype=np.float64, count=len(rows))
+             for column in RANGE_COLUMNS.values()},
+        )
+
+    # ============= FILTERS =============
+
+    def range_bitmap(self, column, low=None, high=None):
+        key = (column, low, high)
+        cached = self._ranges.get(key)
+        if cached is not None:
+            self._ranges.move_to_end(key)
+            return cached
+
+        values, order = self.sorted[column]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[start:stop]] = True
+        bitmap = pack_bitmap(mask)
+
+        self._ranges[key] = bitmap
+        if len(self._ranges) > RANGE_CACHE_SIZE:
+            self._ranges.popitem(last=False)
+        return bitmap
+
+    def compile(self, args):
+        """Turn query args into {filter name: bitmap}; unknown args raise InvalidSearch"""
+        known = {*CATEGORY_COLUMNS, *self.flags, *PAGING_ARGS}
+        known.update(f'{name}_{bound}' for name in RANGE_COLUMNS for bound in ('min', 'max'))
+        unknown = sorted(arg for arg in args if arg not in known)
+        if unknown:
+            raise InvalidSearch(f"Unknown parameter {', '.join(map(repr, unknown))}")
+
+        filters = {}
+        for column in CATEGORY_COLUMNS:
+            if column not in args:
+                continue
+            bitmap = 0
+            for value in str(args[column]).split(','):
+                bitmap |= self.bitmaps[column].get(value.strip().lower(), 0)
+            filters[column] = bitmap
+
+        for column, flag_bitmap in self.flags.items():
+            if column not in args:
+                continue
+            wanted = _FLAG_VALUES.get(str(args[column]).lower())
+            if wanted is None:
+                raise InvalidSearch(f'{column} must be true or false')
+            filters[column] = flag_bitmap if wanted else self.all & ~flag_bitmap
+
+        for name, column in RANGE_COLUMNS.items():
+            low, high = args.get(f'{name}_min'), args.get(f'{name}_max')
+            if low is None and high is None:
+                continue
+            try:
+                low = None if low is None else float(low)
+                high = None if high is None else float(high)
+            except ValueError:
+                raise InvalidSearch(f'{name}_min and {name}_max must be numbers')
+            filters[name] = self.range_bitmap(column, low, high)
+        return filters
+
+    @staticmethod
+    def combine(filters, base, skip=None):
+        for name, bitmap in filters.items():
+            if name != skip:
+                base &= bitmap
+        return base
+
+    # ============= QUERY =============
+
+    def facet_counts(self, filters, result):
+        facets = {}
+        for column, bitmaps in self.bitmaps.items():
+            # Disjunctive: ignore the attribute's own filter
+            base = self.combine(filters, self.all, skip=column) if column in filters else result
+            counts = {}
+            for label in self.values[column]:
+                count = (base & bitmaps[label.lower()]).bit_count()
+                if count:
+                    counts[label] = count
+            facets[column] = counts
+        flags = {column[3:]: (result & bitmap).bit_count() for column, bitmap in self.flags.items()}
+        return facets, flags
+
+    def query(self, args, offset=0, limit=20, sort=None):
+        """(total, page of row ids, facets, flag counts) for the filters in args"""
+        column = None
+        if sort:
+            column = RANGE_COLUMNS.get(sort.lstrip('-'))
+            if column is None:
+                raise InvalidSearch(f"sort must be one of {', '.join(RANGE_COLUMNS)} (prefix - for descending)")
+        filters = self.compile(args)
+        result = self.combine(filters, self.all)
+        total = result.bit_count()
+
+        page = np.empty(0, dtype=np.int64)
+        if total and offset < total:
+            ids = unpack_bitmap(result, self.size)
+            if column is not None:
+                keys = self.numeric[column][ids]
+                if sort.startswith('-'):
+                    keys = -keys
+                # Ties are ordered by row id (ids ascend, the sort is stable), so pages never overlap
+                end = offset + limit
+                if end < len(ids):
+                    # Only the requested page needs ordering: rows up to the end-th key, with all its ties
+                    kth = np.partition(keys, end - 1)[end - 1]
+                    if not np.isnan(kth):
+                        head = np.flatnonzero(keys <= kth)
+                        ids, keys = ids[head], keys[head]
+                ids = ids[np.argsort(keys, kind='stable')]
+            page = ids[offset:offset + limit]
+
+        facets, flags = self.facet_counts(filters, result)
+        return total, page.tolist(), facets, flags
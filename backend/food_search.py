@@ -0,0 +1,146 @@
+"""
+Dish search and autocomplete over indian_food_nutrition.csv.
+
+FoodSearchIndex is built once per worker from the dataset rows:
+
+* a sorted array of (token, row id) pairs over the normalized dish names;
+  every query word is a prefix range found with two bisects, and rows
+  must match all words ("paneer ma" -> paneer masala dishes),
+* the normalized names themselves, scanned for substring matches when
+  the prefix lookup does not fill the page ("dosa" inside "masaladosa"),
+* one frozenset of row ids per filter value (veg_nonveg, region,
+  meal_category, carb_category and every is_* flag).
+
+Results are ranked: whole-name prefix, then word prefix, then substring;
+shorter names first within each group.
+"""
+
+import re
+from bisect import bisect_left
+
+MAX_QUERY_LENGTH = 100
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+CATEGORY_FILTERS = ('veg_nonveg', 'region', 'meal_category', 'carb_category')
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_FLAG_VALUES = {'1': '1', 'true': '1', 'yes': '1', '0': '0', 'false': '0', 'no': '0'}
+
+# Row fields returned for each match
+RESULT_FIELDS = {
+    'calories_per_100g': 'calories_(kcal)_per_100g',
+    'protein_per_100g': 'protein_(g)_per_100g',
+    'carbs_per_100g': 'carbohydrates_(g)_per_100g',
+    'fats_per_100g': 'fats_(g)_per_100g',
+    'fibre_per_100g': 'fibre_(g)_per_100g',
+}
+
+
+class InvalidSearch(ValueError):
+    """Raised for a malformed search query or filter"""
+
+
+def _words(text):
+    return _TOKEN.findall(text.lower())
+
+
+class FoodSearchIndex:
+    """Prefix/substring dish search with categorical and flag filters"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.names = [' '.join(_words(row['dish_name'])) for row in rows]
+        self._compact = [name.replace(' ', '') for name in self.names]
+        # Word-prefix lookup: parallel sorted arrays of tokens and row ids
+        pairs = sorted({(token, row_id) for row_id, name in enumerate(self.names) for token in name.split()})
+        self._tokens = [token for token, _row_id in pairs]
+        self._token_rows = [row_id for _token, row_id in pairs]
+
+        self.flags = sorted(column for column in rows[0] if column.startswith('is_')) if rows else []
+        self._filters = {}
+        for column in (*CATEGORY_FILTERS, *self.flags):
+            values = {}
+            for row_id, row in enumerate(rows):
+                values.setdefault(str(row[column]).lower(), set()).add(row_id)
+            self._filters[column] = {value: frozenset(ids) for value, ids in values.items()}
+        self.facets = {column: sorted({row[column] for row in rows if row[column]}) for column in CATEGORY_FILTERS}
+
+    def _prefix_rows(self, prefix):
+        tokens = self._tokens
+        lo = bisect_left(tokens, prefix)
+        hi = bisect_left(tokens, prefix + '\uffff', lo)
+        return set(self._token_rows[lo:hi])
+
+    @property
+    def filter_names(self):
+        return tuple(self._filters)
+
+    def filter_rows(self, filters):
+        """Row ids passing every filter, or None when no filter is given"""
+        allowed = None
+        for column, value in filters.items():
+            index = self._filters.get(column)
+            if index is None:
+                raise InvalidSearch(f'Unknown filter {column!r}')
+            value = str(value).lower()
+            if column.startswith('is_'):
+                # Validated as in food_facets, so both catalog routes reject the same values
+                value = _FLAG_VALUES.get(value)
+                if value is None:
+                    raise InvalidSearch(f'{column} must be true or false')
+            ids = index.get(value, frozenset())
+            allowed = ids if allowed is None else allowed & ids
+        return allowed
+
+    def search(self, query, filters=None, limit=DEFAULT_LIMIT):
+        """Ranked (row id, match kind) pairs for query"""
+        if len(query) > MAX_QUERY_LENGTH:
+            raise InvalidSearch(f'Query longer than {MAX_QUERY_LENGTH} characters')
+        words = _words(query)
+        if not words:
+            raise InvalidSearch('Query must contain a letter or digit')
+        allowed = self.filter_rows(filters or {})
+
+        matched = None
+        for word in words:
+            rows = self._prefix_rows(word)
+            matched = rows if matched is None else matched & rows
+            if not matched:
+                break
+        if allowed is not None:
+            matched &= allowed
+
+        phrase = ' '.join(words)
+        names = self.names
+        ranked = sorted(
+            matched,
+            key=lambda row_id: (not names[row_id].startswith(phrase), len(names[row_id]), names[row_id])
+        )
+        results = [(row_id, 'prefix') for row_id in ranked[:limit]]
+
+        if len(results) < limit:
+            # Substring fallback, ignoring word boundaries and spaces
+            needle = phrase.replace(' ', '')
+            compact = self._compact
+            candidates = range(len(names)) if allowed is None else sorted(allowed)
+            extra = [row_id for row_id in candidates if row_id not in matched and needle in compact[row_id]]
+            extra.sort(key=lambda row_id: (len(names[row_id]), names[row_id]))
+            results.extend((row_id, 'substring') for row_id in extra[:limit - len(results)])
+        return results
+
+    def describe(self, row_id, match=None):
+        row = self.rows[row_id]
+        result = {
+            'id': row_id,
+            'dish_name': row['dish_name'],
+            'veg_nonveg': row['veg_nonveg'],
+            'region': row['region'],
+            'meal_category': row['meal_category'],
+        }
+        for key, column in RESULT_FIELDS.items():
+            result[key] = round(row[column], 2)
+        result['flags'] = [flag[3:] for flag in self.flags if row[flag]]
+        if match is not None:
+            result['match'] = match
+        return result
@@ -0,0 +1,224 @@
+"""
+Tolerant parsing of model output for generate_diet_plan.
+
+A response that does not parse as strict JSON is not thrown away:
+
+* ``strip_fences`` takes the JSON out of a markdown fence, even one that
+  opens in the middle of the text, and drops any prose before it,
+* ``repair_json`` fixes what the model typically gets wrong in one pass:
+  trailing commas, ``key: value`` pairs inside ``[...]`` (the
+  ``["timing": "liters"]`` shape) and output cut off by truncation, which
+  is rolled back to the last complete value and closed,
+* ``salvage`` keeps the complete days of a truncated plan and lists the
+  days and sections that still have to be generated, and
+  ``continuation_prompt`` / ``merge_parts`` ask the model for just those.
+"""
+
+import json
+import re
+
+DAYS_PER_PLAN = 7
+
+# Top-level sections of the plan, in the order the prompt asks for them
+PLAN_SECTIONS = (
+    'daily_calorie_target', 'bmr', 'tdee', 'calorie_adjustment', 'macronutrient_breakdown',
+    'meal_plan', 'snack_options', 'hydration_guidelines', 'meal_timing', 'nutrition_tips',
+    'supplement_recommendations', 'dietary_restrictions_applied', 'weekly_summary',
+)
+
+_FENCE = re.compile(r'```(?:json|JSON)?[ \t]*\r?\n?(.*?)(?:```|\Z)', re.DOTALL)
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_LITERAL = re.compile(r'[^,\]}:\s"]+')
+_SPACE = re.compile(r'\s*')
+
+
+def strip_fences(text):
+    """The JSON document in text, without markdown fences or leading prose"""
+    text = text.strip()
+    if '```' in text:
+        for block in _FENCE.finditer(text):
+            inner = block.group(1).strip()
+            if inner.startswith(('{', '[')):
+                return inner
+    start = text.find('{')
+    return text[start:] if start > 0 else text
+
+
+class _Frame:
+    __slots__ = ('kind', 'index', 'expect_key')
+
+    def __init__(self, kind, index):
+        self.kind = kind
+        self.index = index
+        self.expect_key = kind == '{'
+
+
+def _drop_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+
+def repair_json(text):
+    """Repair common defects; returns (text, truncated) or (None, True) if nothing survives"""
+    start = text.find('{')
+    if start < 0:
+        return None, True
+
+    out = []
+    stack = []
+    # (output length, container kinds) after the most recent complete value
+    checkpoint = None
+    i, n = start, len(text)
+
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            match = _STRING.match(text, i)
+            if match is None:
+                break  # unterminated string: truncated
+            out.append(match.group())
+            i = match.end()
+            frame = stack[-1] if stack else None
+            if frame is not None and frame.kind == '[':
+                after = _SPACE.match(text, i).end()
+                if after < n and text[after] == ':':
+                    # "key": value inside [...] - the list is really an object
+                    out[frame.index] = '{'
+                    frame.kind = '{'
+                    frame.expect_key = True
+            if frame is not None and frame.expect_key:
+                frame.expect_key = False
+            else:
+                checkpoint = (len(out), [f.kind for f in stack])
+        elif ch == '{' or ch == '[':
+            stack.append(_Frame(ch, len(out)))
+            out.append(ch)
+            i += 1
+        elif ch == '}' or ch == ']':
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            frame = stack.pop()
+            out.append('}' if frame.kind == '{' else ']')
+            i += 1
+            if not stack:
+                return ''.join(out), False
+            checkpoint = (len(out), [f.kind for f in stack])
+        elif ch == ',':
+            out.append(ch)
+            if stack and stack[-1].kind == '{':
+                stack[-1].expect_key = True
+            i += 1
+        elif ch == ':' or ch.isspace():
+            out.append(ch)
+            i += 1
+        else:
+            match = _LITERAL.match(text, i)
+            if match.end() >= n:
+                break  # a number cut short may be missing digits
+            out.append(match.group())
+            i = match.end()
+            checkpoint = (len(out), [f.kind for f in stack])
+
+    if checkpoint is None:
+        return None, True
+    length, kinds = checkpoint
+    del out[length:]
+    _drop_trailing_comma(out)
+    out.extend('}' if kind == '{' else ']' for kind in reversed(kinds))
+    return ''.join(out), True
+
+
+def loads_tolerant(text):
+    """Parse model output; returns (obj, status) with status clean, repaired or truncated
+
+    Re-raises the strict parser's JSONDecodeError when repair does not help.
+    """
+    text = strip_fences(text)
+    try:
+        return json.loads(text), 'clean'
+    except json.JSONDecodeError as e:
+        error = e
+
+    repaired, truncated = repair_json(text)
+    if repaired is None:
+        raise error
+    try:
+        obj = json.loads(repaired, strict=False)
+    except json.JSONDecodeError:
+        raise error
+    if not isinstance(obj, dict):
+        raise error
+    return obj, 'truncated' if truncated else 'repaired'
+
+
+def _complete_day(day):
+    # daily_total_calories follows meals in the requested layout, so it is
+    # only present when the day's meals were emitted in full
+    return (
+        isinstance(day, dict) and isinstance(day.get('day'), int)
+        and isinstance(day.get('meals'), list) and day['meals']
+        and 'daily_total_calories' in day
+    )
+
+
+def salvage(plan):
+    """Drop incomplete days from a truncated plan; returns (missing days, missing sections)"""
+    days = plan.get('meal_plan')
+    complete = [day for day in days if _complete_day(day)] if isinstance(days, list) else []
+    plan['meal_plan'] = complete
+
+    planned = {day['day'] for day in complete}
+    missing_days = [day for day in range(1, DAYS_PER_PLAN + 1) if day not in planned]
+
+    present = [key for key in plan if key in PLAN_SECTIONS]
+    # The section the output was cut off in may be partial
+    if present and present[-1] != 'meal_plan':
+        del plan[present[-1]]
+    missing_sections = [key for key in PLAN_SECTIONS if key not in plan and key != 'meal_plan']
+    return missing_days, missing_sections
+
+
+def continuation_prompt(prompt, plan, missing_days, missing_sections):
+    """Follow-up prompt asking only for the parts a truncated response lost"""
+    planned = [
+        f"Day {day['day']}: " + ', '.join(str(meal.get('meal_name', '')) for meal in day['meals'] if isinstance(meal, dict))
+        for day in plan.get('meal_plan', [])
+    ]
+    keys = (['"meal_plan"'] if missing_days else []) + [f'"{key}"' for key in missing_sections]
+    lines = [
+        prompt.rstrip(),
+        '',
+        'Your previous response was cut off. Part of the plan is already done:',
+        *(planned or ['(no complete days)']),
+        '',
+        f"Return ONLY a JSON object with the keys {', '.join(keys)}, using the structure above.",
+    ]
+    if missing_days:
+        lines.append(
+            f"\"meal_plan\" must contain only days {', '.join(map(str, missing_days))}, "
+            "and must not repeat the meals already planned."
+        )
+    return '\n'.join(lines)
+
+
+def merge_parts(plan, extra, missing_days, missing_sections):
+    """Fill plan from a continuation response; returns the parts still missing"""
+    wanted = set(missing_days)
+    days = extra.get('meal_plan')
+    if isinstance(days, list):
+        for day in days:
+            if _complete_day(day) and day['day'] in wanted:
+                plan['meal_plan'].append(day)
+                wanted.discard(day['day'])
+    plan['meal_plan'].sort(key=lambda day: day['day'])
+
+    still_missing = []
+    for key in missing_sections:
+        if key in extra:
+            plan[key] = extra[key]
+        else:
+            still_missing.append(key)
+    return sorted(wanted), still_missing
@@ -10,6 +10,16 @@ import re
 import warnings
 from datetime import datetime, timedelta
 import json
+
+from dish_similarity import DishSimilarity, DiversityPenalty
+from food_alternatives import AlternativesGraph
+from food_catalog import FoodCatalog, MealSelection
+from meal_candidates import CandidatePool, FoodCandidateIndex
+from meal_fitting import DayFitter
+from meal_replanning import PlanEditor
+from plan_summary import SUMMARY_NUTRIENTS, PlanNutrients, meal_nutrients
+from week_optimizer import WEEK_BUDGET_MS, WeekOptimizer
+
 warnings.filterwarnings('ignore')
 
 class UserDataCollector:
@@ -235,9 +245,37 @@ class UserDataCollector:
 class WeeklyMealPlanner:
     """Generate comprehensive weekly meal schedules using real dataset"""
     
-    def __init__(self, user_profile, food_df):
+    # Standard distributions based on meal importance
+    CALORIE_DISTRIBUTIONS = {
+        3: {'breakfast': 0.25, 'lunch': 0.40, 'dinner': 0.35},
+        4: {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30, 'evening_snack': 0.10},
+        5: {'pre_breakfast': 0.08, 'breakfast': 0.22, 'pre_lunch': 0.10, 
+            'lunch': 0.35, 'dinner': 0.25},
+        6: {'pre_breakfast': 0.08, 'breakfast': 0.20, 'mid_morning_snack': 0.07,
+            'pre_lunch': 0.08, 'lunch': 0.30, 'mid_afternoon_snack': 0.07,
+            'evening_snack': 0.10, 'dinner': 0.20}
+    }
+    
+    # Candidate calorie range as fractions of the meal's target (±40% for more flexibility)
+    CALORIE_BAND = (0.6, 1.4)
+    
+    # With a DishSimilarity: weight of a dish's score against its similarity to dishes already chosen
+    MMR_RELEVANCE = 0.7
+    
+    def __init__(self, user_profile, food_df, food_index=None, fit_days=False, optimize_ms=None, similarity=None):
         self.user_profile = user_profile
         self.food_df = food_df
+        # Catalog and bitmap index over food_df; build them once per dataset and share them between planners
+        self.food_index = food_index or FoodCandidateIndex(FoodCatalog.from_frame(food_df))
+        # Choose each day's meals together to fit the day's calorie and macro targets (see meal_fitting)
+        self.fit_days = fit_days
+        # Wall-clock budget for improving the generated week by local search (see week_optimizer)
+        self.optimize_ms = optimize_ms
+        self.optimization = None
+        # DishSimilarity of food_index: penalize dishes similar to the ones already chosen (maximal marginal relevance)
+        self.similarity = similarity
+        # Nutrient accumulators of the last plan generated or summarized (see plan_summary)
+        self.plan_nutrients = None
         self.days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         
         # Meal timing based on user preferences
@@ -280,17 +318,7 @@ class WeeklyMealPlanner:
     def _calculate_calorie_distribution(self):
         """Calculate calorie distribution across meals"""
         target_calories = self.user_profile['target_calories']
-        
-        # Standard distributions based on meal importance
-        distributions = {
-            3: {'breakfast': 0.25, 'lunch': 0.40, 'dinner': 0.35},
-            4: {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30, 'evening_snack': 0.10},
-            5: {'pre_breakfast': 0.08, 'breakfast': 0.22, 'pre_lunch': 0.10, 
-                'lunch': 0.35, 'dinner': 0.25},
-            6: {'pre_breakfast': 0.08, 'breakfast': 0.20, 'mid_morning_snack': 0.07,
-                'pre_lunch': 0.08, 'lunch': 0.30, 'mid_afternoon_snack': 0.07,
-                'evening_snack': 0.10, 'dinner': 0.20}
-        }
+        distributions = self.CALORIE_DISTRIBUTIONS
         
         meal_freq = self.user_profile.get('meal_frequency', 3)
         if meal_freq in distributions:
@@ -308,29 +336,50 @@ class WeeklyMealPlanner:
         
         return calorie_dist
     
-    def _filter_foods_by_criteria(self, meal_type, calorie_target, day_num):
-        """Filter foods based on meal type and dietary restrictions using real dataset"""
-        filtered_df = self.food_df.copy()
+    def _candidate_rows(self, meal_type, calorie_target, band=None):
+        """Dataset row positions passing the meal type and dietary filters, in dataset order"""
+        index = self.food_index
+        candidates = self._preference_candidates(meal_type)
+        
+        # Filter by calorie range (±40% of target for more flexibility)
+        # Ensure calorie_target is valid
+        if calorie_target <= 0:
+            calorie_target = 300  # Default fallback value
+        
+        low, high = band or self.CALORIE_BAND
+        calorie_min = calorie_target * low
+        calorie_max = calorie_target * high
+        
+        # Ensure calories column exists and has valid values (positive calories only)
+        if index.calories is not None:
+            candidates &= index.calorie_band(calorie_min, calorie_max)
+        
+        return index.rows(candidates)
+    
+    def _preference_candidates(self, meal_type):
+        """Bitmap of the foods the user's preferences allow for a meal type, before the calorie range"""
+        index = self.food_index
+        candidates = index.all
         
         # Apply food type restrictions (vegetarian/non-vegetarian)
         food_type = self.user_profile.get('food_type', 'Non-Vegetarian')
         if food_type in ['Vegetarian', 'Vegan']:
-            filtered_df = filtered_df[filtered_df['veg_nonveg'] == 'Vegetarian']
+            candidates &= index.equals('veg_nonveg', 'Vegetarian')
         
         # Apply regional preferences
         regional_prefs = self.user_profile.get('regional_preferences', ['Pan Indian'])
         if regional_prefs and 'Pan Indian' not in regional_prefs:
-            filtered_df = filtered_df[filtered_df['region'].isin(regional_prefs)]
+            candidates &= index.isin('region', regional_prefs)
         
         # Apply dietary restrictions based on dataset columns
         restrictions = self.user_profile.get('dietary_restrictions', [])
         for restriction in restrictions:
-            if restriction in filtered_df.columns:
+            if restriction in index.columns:
                 # For binary restriction columns, filter for True values
-                filtered_df = filtered_df[filtered_df[restriction] == 1]
+                candidates &= index.equals(restriction, 1)
         
         # Filter by meal category if available
-        if 'meal_category' in filtered_df.columns:
+        if 'meal_category' in index.columns:
             # Map our meal types to dataset categories
             meal_category_map = {
                 'breakfast': 'Main Course',  # Most breakfast items are in Main Course
@@ -344,185 +393,164 @@ class WeeklyMealPlanner:
             }
             
             if meal_type in meal_category_map:
-                category = meal_category_map[meal_type]
-                category_foods = filtered_df[filtered_df['meal_category'] == category]
-                if len(category_foods) > 0:
-                    filtered_df = category_foods
-        
-        # Filter by calorie range (±40% of target for more flexibility)
-        # Ensure calorie_target is valid
-        if calorie_target <= 0:
-            calorie_target = 300  # Default fallback value
-        
-        calorie_min = calorie_target * 0.6
-        calorie_max = calorie_target * 1.4
-        
-        # Ensure calories column exists and has valid values
-        if 'calories_(kcal)' in filtered_df.columns:
-            filtered_df = filtered_df[
-                (filtered_df['calories_(kcal)'] >= calorie_min) & 
-                (filtered_df['calories_(kcal)'] <= calorie_max) &
-                (filtered_df['calories_(kcal)'] > 0)  # Ensure positive calories
-            ]
+                category_foods = candidates & index.equals('meal_category', meal_category_map[meal_type])
+                if category_foods:
+                    candidates = category_foods
         
         # Remove foods user dislikes
         dislikes = self.user_profile.get('dislikes', [])
-        for dislike in dislikes:
-            if 'dish_name' in filtered_df.columns:
-                filtered_df = filtered_df[~filtered_df['dish_name'].str.contains(dislike, case=False, na=False)]
-        
-        return filtered_df
-    def _get_meal_variety(self, meal_type, options, day_num, used_foods):
-        """Ensure variety in meal selection across the week"""
-        if len(options) == 0:
-            return options
-        
-        # Remove already used foods for variety
-        available_options = options[~options['dish_name'].isin(used_foods)]
+        if dislikes and 'dish_name' in index.columns:
+            candidates &= ~index.disliked(dislikes)
         
-        if len(available_options) == 0:
-            available_options = options  # Fall back to original if no variety possible
-        
-        # Score foods based on user goals
-        scored_options = self._score_foods(available_options, meal_type)
-        
-        return scored_options.head(1)
+        return candidates
     
-    def _score_foods(self, df, meal_type):
-        """Score foods based on user health goals and nutritional content"""
-        if len(df) == 0:
-            return df
-        
-        df = df.copy()
-        scores = np.zeros(len(df))
+    def _candidate_pool(self, meal_type, calorie_target):
+        """Scored candidate foods for a meal slot"""
+        rows = self._candidate_rows(meal_type, calorie_target)
+        return CandidatePool.score(self.food_index, rows, self._score_weights(meal_type))
+    
+    def _get_meal_variety(self, pool, used_foods_global, used_foods_daily, penalty=None):
+        """Row of the best-scored dish not used yet, falling back to the best one"""
+        if penalty is not None:
+            return pool.pick_diverse(penalty, self.MMR_RELEVANCE, used_foods_daily, used_foods_global)
+        return pool.pick(used_foods_daily, used_foods_global)
+    
+    def _score_weights(self, meal_type):
+        """Score weights over the food features based on user health goals and nutritional content"""
         health_goal = self.user_profile.get('health_goal', 'weight_maintenance')
+        terms = {}
         
-        # Base nutritional scoring using actual dataset columns
-        calories = df['calories_(kcal)'].fillna(0)
-        protein = df['protein_(g)'].fillna(0)
-        carbs = df['carbohydrates_(g)'].fillna(0)
-        fats = df['fats_(g)'].fillna(0)
-        fiber = df['fibre_(g)'].fillna(0)
-        
-        # Safe division - avoid division by zero
-        def safe_divide(numerator, denominator, default=0):
-            return np.where(denominator > 0, numerator / denominator, default)
+        def add(feature, weight):
+            terms[feature] = terms.get(feature, 0) + weight
         
+        # Per-kcal ratios are 0 for foods without calories
         if health_goal == 'weight_loss':
-            scores += safe_divide(protein, calories, 0) * 100  # High protein efficiency
-            scores += safe_divide(fiber, calories, 0) * 80     # High fiber for satiety
-            scores -= safe_divide(fats, calories, 0) * 40      # Lower fat preference
-            # Bonus for low-calorie foods
-            if 'is_low_calorie' in df.columns:
-                scores += df['is_low_calorie'].fillna(0) * 30
+            add('protein_per_kcal', 100)  # High protein efficiency
+            add('fiber_per_kcal', 80)     # High fiber for satiety
+            add('fats_per_kcal', -40)     # Lower fat preference
+            add('is_low_calorie', 30)     # Bonus for low-calorie foods
             
         elif health_goal == 'weight_gain':
-            scores += calories / 50  # Higher calories preferred
-            scores += protein * 3    # Good protein content
-            scores += fats * 2       # Healthy fats for calories
+            add('calories', 1 / 50)  # Higher calories preferred
+            add('protein', 3)        # Good protein content
+            add('fats', 2)           # Healthy fats for calories
             
         elif health_goal == 'muscle_gain':
-            scores += protein * 5    # Very high protein preference
-            scores += safe_divide(protein, calories, 0) * 150
-            # Bonus for high-protein foods
-            if 'is_high_protein' in df.columns:
-                scores += df['is_high_protein'].fillna(0) * 50
+            add('protein', 5)             # Very high protein preference
+            add('protein_per_kcal', 150)
+            add('is_high_protein', 50)    # Bonus for high-protein foods
             
         # Meal-specific adjustments
         if meal_type in ['pre_breakfast', 'pre_lunch']:
-            scores += (300 - calories) / 100  # Prefer lighter options
-            scores += carbs * 2               # Quick energy
+            add('constant', 3)           # (300 - calories) / 100: prefer lighter options
+            add('calories', -1 / 100)
+            add('carbs', 2)              # Quick energy
             
         elif meal_type == 'breakfast':
-            scores += protein * 2    # Good protein to start day
-            scores += fiber * 3      # Fiber for sustained energy
+            add('protein', 2)    # Good protein to start day
+            add('fiber', 3)      # Fiber for sustained energy
             
         elif meal_type in ['mid_morning_snack', 'mid_afternoon_snack', 'evening_snack']:
-            scores += (200 - calories) / 100  # Prefer lighter snacks
-            scores += protein * 2    # Protein for satiety
+            add('constant', 2)           # (200 - calories) / 100: prefer lighter snacks
+            add('calories', -1 / 100)
+            add('protein', 2)            # Protein for satiety
         
         # Apply dietary restriction bonuses
-        restrictions = self.user_profile.get('dietary_restrictions', [])
-        for restriction in restrictions:
-            if restriction in df.columns:
-                scores += df[restriction].fillna(0) * 20
+        for restriction in self.user_profile.get('dietary_restrictions', []):
+            add(restriction, 20)
         
         # Penalize high sodium for health-conscious users
-        if 'sodium_(mg)' in df.columns:
-            sodium = df['sodium_(mg)'].fillna(0)
-            scores -= sodium / 100
+        add('sodium', -1 / 100)
         
         # Boost foods with high nutrients
-        if 'calcium_(mg)' in df.columns:
-            scores += df['calcium_(mg)'].fillna(0) / 100
-        if 'iron_(mg)' in df.columns:
-            scores += df['iron_(mg)'].fillna(0) * 10
-        if 'vitamin_c_(mg)' in df.columns:
-            scores += df['vitamin_c_(mg)'].fillna(0) / 10
-        
-        df['score'] = scores
-        return df.sort_values('score', ascending=False)
+        add('calcium', 1 / 100)
+        add('iron', 10)
+        add('vitamin_c', 1 / 10)
+        
+        return self.food_index.weights(terms)
 
     def generate_weekly_plan(self):
         """Generate complete weekly meal plan"""
         weekly_plan = {}
         used_foods_global = set()  # Track foods used globally for maximum variety
         
+        # Candidates depend only on the slot, so each pool is filtered and ranked once per plan
+        pools = {}
+        nutrients = PlanNutrients(self.days, list(self.meal_schedule), weekly_plan)
+        fitter = DayFitter(self) if self.fit_days else None
+        penalty = DiversityPenalty(self.similarity) if self.similarity is not None else None
+        
         for day in self.days:
             daily_plan = {}
             used_foods_daily = set()  # Track foods used in a single day
+            fitted_rows = fitter.fit_day(used_foods_global, penalty) if fitter else None
             
-            for meal_type, time in self.meal_schedule.items():
+            for position, (meal_type, time) in enumerate(self.meal_schedule.items()):
                 calorie_target = self.calorie_distribution.get(meal_type, 300)
                 
-                # Get available foods for this meal
-                available_foods = self._filter_foods_by_criteria(
-                    meal_type, calorie_target, self.days.index(day)
-                )
-                
-                if len(available_foods) > 0:
+                if fitted_rows is not None:
+                    row = fitted_rows[position]
+                else:
+                    # Get available foods for this meal
+                    if meal_type not in pools:
+                        pools[meal_type] = self._candidate_pool(meal_type, calorie_target)
+                    available_foods = pools[meal_type]
+                    
                     # Select meal with variety consideration
-                    selected_meal = self._get_meal_variety(
-                        meal_type, available_foods, 
-                        self.days.index(day), 
-                        used_foods_global.union(used_foods_daily)
-                    )
+                    row = None
+                    if len(available_foods) > 0:
+                        row = self._get_meal_variety(available_foods, used_foods_global, used_foods_daily, penalty)
+                
+                if row is not None:
+                    daily_plan[meal_type] = MealSelection(self.food_index.catalog, row, time, calorie_target)
+                    dish_name = self.food_index.names[row]
                     
-                    if len(selected_meal) > 0:
-                        meal_info = selected_meal.iloc[0]
-                        daily_plan[meal_type] = {
-                            'time': time,
-                            'dish_name': meal_info['dish_name'],
-                            'calories': meal_info['calories_(kcal)'],
-                            'protein': meal_info['protein_(g)'],
-                            'carbs': meal_info['carbohydrates_(g)'],
-                            'fats': meal_info['fats_(g)'],
-                            'fiber': meal_info.get('fibre_(g)', 0),
-                            'sodium': meal_info.get('sodium_(mg)', 0),
-                            'calcium': meal_info.get('calcium_(mg)', 0),
-                            'iron': meal_info.get('iron_(mg)', 0),
-                            'vitamin_c': meal_info.get('vitamin_c_(mg)', 0),
-                            'target_calories': calorie_target,
-                            'meal_category': meal_info.get('meal_category', ''),
-                            'region': meal_info.get('region', ''),
-                            'veg_nonveg': meal_info.get('veg_nonveg', '')
-                        }
-                        
-                        used_foods_daily.add(meal_info['dish_name'])
-                        used_foods_global.add(meal_info['dish_name'])
-                    else:
-                        daily_plan[meal_type] = self._create_fallback_meal(meal_type, calorie_target)
+                    used_foods_daily.add(dish_name)
+                    used_foods_global.add(dish_name)
+                    if penalty is not None:
+                        penalty.add(row)
                 else:
                     daily_plan[meal_type] = self._create_fallback_meal(meal_type, calorie_target)
+                nutrients.set(day, meal_type, daily_plan[meal_type])
             
             weekly_plan[day] = daily_plan
             
             # Reset global tracking every 3 days for some repetition
             if (self.days.index(day) + 1) % 3 == 0:
                 used_foods_global = set()
-        
+                if penalty is not None:
+                    penalty.reset()
+        
+        if self.optimize_ms:
+            generated = weekly_plan
+            weekly_plan, self.optimization = self.optimize_weekly_plan(weekly_plan, self.optimize_ms)
+            nutrients.plan = weekly_plan
+            for day, daily_plan in weekly_plan.items():
+                for meal_type, meal in daily_plan.items():
+                    if meal is not generated[day][meal_type]:
+                        nutrients.set(day, meal_type, meal)
+        
+        self.plan_nutrients = nutrients
         return weekly_plan
     
+    def optimize_weekly_plan(self, weekly_plan, budget_ms=WEEK_BUDGET_MS):
+        """Improve a weekly plan by swapping meals within budget_ms; returns (plan, stats)"""
+        return WeekOptimizer(self).optimize(weekly_plan, budget_ms)
+    
+    def plan_nutrients_of(self, weekly_plan):
+        """PlanNutrients of a plan: the ones filled while generating it, else built from its meals once"""
+        if self.plan_nutrients is None or self.plan_nutrients.plan is not weekly_plan:
+            self.plan_nutrients = PlanNutrients.from_plan(weekly_plan)
+        return self.plan_nutrients
+    
+    def summarize(self, weekly_plan):
+        """PlanSummary of a plan (changes must go through edit_weekly_plan to be reflected)"""
+        return self.plan_nutrients_of(weekly_plan).summary(self.user_profile)
+    
+    def edit_weekly_plan(self, weekly_plan):
+        """PlanEditor of a generated plan: single-meal changes with running totals and day-level replanning"""
+        return PlanEditor(self, weekly_plan)
+    
     def _create_fallback_meal(self, meal_type, calorie_target):
         """Create fallback meal when no suitable food found"""
         fallback_meals = {
@@ -556,30 +584,12 @@ class WeeklyMealPlanner:
         return fallback
     
     def get_daily_summary(self, daily_plan):
-        """Calculate daily nutritional summary"""
-        total_calories = sum(meal.get('calories', 0) for meal in daily_plan.values())
-        total_protein = sum(meal.get('protein', 0) for meal in daily_plan.values())
-        total_carbs = sum(meal.get('carbs', 0) for meal in daily_plan.values())
-        total_fats = sum(meal.get('fats', 0) for meal in daily_plan.values())
-        total_fiber = sum(meal.get('fiber', 0) for meal in daily_plan.values())
-        total_sodium = sum(meal.get('sodium', 0) for meal in daily_plan.values())
-        total_calcium = sum(meal.get('calcium', 0) for meal in daily_plan.values())
-        total_iron = sum(meal.get('iron', 0) for meal in daily_plan.values())
-        total_vitamin_c = sum(meal.get('vitamin_c', 0) for meal in daily_plan.values())
-        
-        return {
-            'total_calories': total_calories,
-            'total_protein': total_protein,
-            'total_carbs': total_carbs,
-            'total_fats': total_fats,
-            'total_fiber': total_fiber,
-            'total_sodium': total_sodium,
-            'total_calcium': total_calcium,
-            'total_iron': total_iron,
-            'total_vitamin_c': total_vitamin_c,
-            'target_calories': self.user_profile['target_calories'],
-            'calorie_difference': total_calories - self.user_profile['target_calories']
-        }
+        """Calculate daily nutritional summary (for any day's meals; planned weeks are summarized by summarize)"""
+        totals = sum((meal_nutrients(meal) for meal in daily_plan.values()), np.zeros(len(SUMMARY_NUTRIENTS)))
+        summary = {f'total_{nutrient}': float(value) for nutrient, value in zip(SUMMARY_NUTRIENTS, totals)}
+        summary['target_calories'] = self.user_profile['target_calories']
+        summary['calorie_difference'] = summary['total_calories'] - self.user_profile['target_calories']
+        return summary
     
     def display_weekly_plan(self, weekly_plan):
         """Display formatted weekly meal plan"""
@@ -593,6 +603,7 @@ class WeeklyMealPlanner:
         print(f"Regional Preferences: {', '.join(self.user_profile.get('regional_preferences', ['Pan Indian']))}")
         print()
         
+        plan_summary = self.summarize(weekly_plan)
         for day, daily_plan in weekly_plan.items():
             print(f"\n📅 {day.upper()}")
             print("-" * 70)
@@ -610,7 +621,7 @@ class WeeklyMealPlanner:
                 print(f"       | {'':18} | P:{protein:>4.1f}g | {region} | {veg_status}")
             
             # Daily summary
-            summary = self.get_daily_summary(daily_plan)
+            summary = plan_summary.day(day)
             print(f"       | {'DAILY TOTAL':<18} | {'':<30} | {summary['total_calories']:>3.0f} kcal")
             print(f"       | {'Nutrients':<18} | P:{summary['total_protein']:>4.1f}g C:{summary['total_carbs']:>4.1f}g F:{summary['total_fats']:>4.1f}g Fiber:{summary['total_fiber']:>4.1f}g")
             
@@ -621,36 +632,19 @@ class WeeklyMealPlanner:
                 print(f"       | {status:<18} | Target: {summary['target_calories']:.0f} kcal | Diff: {diff:+.0f} kcal")
         
         # Weekly summary
-        self._display_weekly_summary(weekly_plan)
+        self._display_weekly_summary(plan_summary)
     
-    def _display_weekly_summary(self, weekly_plan):
+    def _display_weekly_summary(self, plan_summary):
         """Display weekly nutritional summary"""
-        weekly_totals = {
-            'calories': 0, 'protein': 0, 'carbs': 0, 'fats': 0, 
-            'fiber': 0, 'sodium': 0, 'calcium': 0, 'iron': 0, 'vitamin_c': 0
-        }
+        avg_daily_calories = plan_summary.average('calories')
+        avg_daily_protein = plan_summary.average('protein')
+        avg_daily_fiber = plan_summary.average('fiber')
+        avg_daily_sodium = plan_summary.average('sodium')
+        avg_daily_calcium = plan_summary.average('calcium')
+        avg_daily_iron = plan_summary.average('iron')
+        avg_daily_vitamin_c = plan_summary.average('vitamin_c')
         
-        for daily_plan in weekly_plan.values():
-            summary = self.get_daily_summary(daily_plan)
-            weekly_totals['calories'] += summary['total_calories']
-            weekly_totals['protein'] += summary['total_protein']
-            weekly_totals['carbs'] += summary['total_carbs']
-            weekly_totals['fats'] += summary['total_fats']
-            weekly_totals['fiber'] += summary['total_fiber']
-            weekly_totals['sodium'] += summary['total_sodium']
-            weekly_totals['calcium'] += summary['total_calcium']
-            weekly_totals['iron'] += summary['total_iron']
-            weekly_totals['vitamin_c'] += summary['total_vitamin_c']
-        
-        avg_daily_calories = weekly_totals['calories'] / 7
-        avg_daily_protein = weekly_totals['protein'] / 7
-        avg_daily_fiber = weekly_totals['fiber'] / 7
-        avg_daily_sodium = weekly_totals['sodium'] / 7
-        avg_daily_calcium = weekly_totals['calcium'] / 7
-        avg_daily_iron = weekly_totals['iron'] / 7
-        avg_daily_vitamin_c = weekly_totals['vitamin_c'] / 7
-        
-        target_calories = self.user_profile['target_calories']
+        target_calories = plan_summary.target_calories
         
         print("\n" + "="*80)
         print("WEEKLY NUTRITIONAL SUMMARY")
@@ -662,7 +656,7 @@ class WeeklyMealPlanner:
         print(f"Average Daily Calcium: {avg_daily_calcium:.0f}mg")
         print(f"Average Daily Iron: {avg_daily_iron:.1f}mg")
         print(f"Average Daily Vitamin C: {avg_daily_vitamin_c:.1f}mg")
-        print(f"Weekly Calorie Difference: {(avg_daily_calories - target_calories) * 7:.0f} kcal")
+        print(f"Weekly Calorie Difference: {plan_summary.weekly_calorie_difference:.0f} kcal")
         
         # Recommendations based on nutritional analysis
         print("\n📝 NUTRITIONAL RECOMMENDATIONS:")
@@ -702,6 +696,10 @@ class EnhancedFoodRecommendationSystem:
         self.user_profiler = UserProfiler()
         self.data_collector = UserDataCollector()
         self.food_df = None
+        self.food_catalog = None
+        self.food_index = None
+        self.dish_similarity = None
+        self.food_alternatives = None
     
     def initialize_system(self, food_data_path='indian_food_nutrition.csv'):
         """Initialize system with real dataset"""
@@ -717,12 +715,21 @@ class EnhancedFoodRecommendationSystem:
             
             print(f"Dataset contains {len(self.food_df)} food items")
             self._preprocess_food_data()
+            self._build_food_index()
             self._analyze_dataset()
             
         except FileNotFoundError:
             print("❌ Dataset file not found. Creating minimal sample data...")
             self.food_df = self._create_minimal_sample_data()
             self._preprocess_food_data()
+            self._build_food_index()
+    
+    def _build_food_index(self):
+        """Columnar catalog and candidate index the meal planner works from"""
+        self.food_catalog = FoodCatalog.from_frame(self.food_df)
+        self.food_index = FoodCandidateIndex(self.food_catalog)
+        self.dish_similarity = DishSimilarity(self.food_index)
+        self.food_alternatives = AlternativesGraph.from_catalog(self.food_catalog)
     
     def _analyze_dataset(self):
         """Analyze and display dataset information"""
@@ -823,14 +830,19 @@ class EnhancedFoodRecommendationSystem:
         self._display_user_profile(user_profile)
         
         # Generate weekly meal plan
-        meal_planner = WeeklyMealPlanner(user_profile, self.food_df)
+        meal_planner = WeeklyMealPlanner(user_profile, self.food_df, self.food_index, fit_days=True,
+                                         optimize_ms=WEEK_BUDGET_MS, similarity=self.dish_similarity)
         weekly_plan = meal_planner.generate_weekly_plan()
         
         # Display results
         meal_planner.display_weekly_plan(weekly_plan)
+        if meal_planner.optimization:
+            stats = meal_planner.optimization
+            print(f"\n🔧 PLAN OPTIMIZATION: quality cost {stats['initial_cost']:.2f} → {stats['cost']:.2f} "
+                  f"({stats['moves']} swaps over {stats['iterations']} iterations, {stats['elapsed_ms']:.0f} ms)")
         
         # Offer additional features
-        self._offer_additional_features(user_profile, weekly_plan)
+        self._offer_additional_features(user_profile, weekly_plan, meal_planner.edit_weekly_plan(weekly_plan))
         
         return user_profile, weekly_plan
     
@@ -944,7 +956,7 @@ class EnhancedFoodRecommendationSystem:
         
         return fat_calories / 9  # 9 calories per gram of fat
     
-    def _offer_additional_features(self, user_profile, weekly_plan):
+    def _offer_additional_features(self, user_profile, weekly_plan, editor):
         """Offer additional features and customizations"""
         print("\n🔧 ADDITIONAL FEATURES AVAILABLE:")
         print("-" * 40)
@@ -962,13 +974,13 @@ class EnhancedFoodRecommendationSystem:
                 if choice.lower() == 'q':
                     break
                 elif choice == '1':
-                    self._modify_meals(weekly_plan)
+                    self._modify_meals(editor)
                 elif choice == '2':
                     self._generate_shopping_list(weekly_plan)
                 elif choice == '3':
-                    self._detailed_nutrition_analysis(weekly_plan, user_profile)
+                    self._detailed_nutrition_analysis(editor.summary(), user_profile)
                 elif choice == '4':
-                    self._export_meal_plan(weekly_plan, user_profile)
+                    self._export_meal_plan(weekly_plan, user_profile, editor.summary())
                 elif choice == '5':
                     self._suggest_recipes(user_profile)
                 elif choice == '6':
@@ -980,8 +992,9 @@ class EnhancedFoodRecommendationSystem:
                 print("\nExiting...")
                 break
     
-    def _modify_meals(self, weekly_plan):
+    def _modify_meals(self, editor):
         """Allow user to modify specific meals"""
+        weekly_plan = editor.plan
         print("\n📝 MEAL MODIFICATION")
         print("Available days:", ", ".join(weekly_plan.keys()))
         
@@ -1003,41 +1016,43 @@ class EnhancedFoodRecommendationSystem:
             print(f"\nCurrent meal: {weekly_plan[day][selected_meal]['dish_name']}")
             
             # Show alternatives from dataset
-            current_calories = weekly_plan[day][selected_meal]['calories']
-            alternatives = self.food_df[
-                (self.food_df['calories_(kcal)'] >= current_calories * 0.8) &
-                (self.food_df['calories_(kcal)'] <= current_calories * 1.2)
-            ].head(5)
+            current_meal = weekly_plan[day][selected_meal]
+            alternatives = self._meal_alternatives(current_meal, 5, 0.2)
             
             if len(alternatives) > 0:
                 print("\nSuggested alternatives:")
-                for i, (_, food) in enumerate(alternatives.iterrows(), 1):
-                    print(f"{i}. {food['dish_name']} ({food['calories_(kcal)']:.0f} kcal)")
+                for i, row in enumerate(alternatives, 1):
+                    print(f"{i}. {self.food_alternatives.names[row]} ({self.food_alternatives.calories[row]:.0f} kcal)")
                 
                 alt_choice = input("Select alternative (number) or enter custom dish name: ").strip()
                 
                 if alt_choice.isdigit() and 1 <= int(alt_choice) <= len(alternatives):
-                    selected_alt = alternatives.iloc[int(alt_choice) - 1]
-                    weekly_plan[day][selected_meal].update({
-                        'dish_name': selected_alt['dish_name'],
-                        'calories': selected_alt['calories_(kcal)'],
-                        'protein': selected_alt['protein_(g)'],
-                        'carbs': selected_alt['carbohydrates_(g)'],
-                        'fats': selected_alt['fats_(g)']
-                    })
-                    print(f"✅ Updated {selected_meal} to {selected_alt['dish_name']}")
+                    refit = input(f"Re-plan the rest of {day} around it? (y/n): ").strip().lower() == 'y'
+                    changed = editor.replace_meal(day, selected_meal, alternatives[int(alt_choice) - 1], reoptimize=refit)
+                    print(f"✅ Updated {selected_meal} to {weekly_plan[day][selected_meal]['dish_name']}")
+                    self._report_day_changes(editor, day, changed[1:])
                 elif alt_choice:
-                    weekly_plan[day][selected_meal]['dish_name'] = alt_choice
+                    editor.edit_meal(day, selected_meal, {'dish_name': alt_choice})
                     print(f"✅ Updated {selected_meal} to {alt_choice}")
             else:
                 new_dish = input("Enter new dish name: ").strip()
                 if new_dish:
-                    weekly_plan[day][selected_meal]['dish_name'] = new_dish
+                    editor.edit_meal(day, selected_meal, {'dish_name': new_dish})
                     print(f"✅ Updated {selected_meal} to {new_dish}")
             
         except (ValueError, IndexError):
             print("Invalid selection.")
     
+    def _report_day_changes(self, editor, day, changed):
+        """Print the meals replanning changed and the day's updated totals"""
+        for meal_type in changed:
+            meal = editor.plan[day][meal_type]
+            print(f"   ↻ {meal_type.replace('_', ' ').title()}: {meal['dish_name']} ({meal['calories']:.0f} kcal)")
+        summary = editor.day_summary(day)
+        print(f"   {day} total: {summary['total_calories']:.0f} kcal (Target: {summary['target_calories']:.0f} kcal, "
+              f"Diff: {summary['calorie_difference']:+.0f} kcal), P:{summary['total_protein']:.1f}g "
+              f"C:{summary['total_carbs']:.1f}g F:{summary['total_fats']:.1f}g")
+    
     def _generate_shopping_list(self, weekly_plan):
         """Generate comprehensive grocery shopping list"""
         print("\n🛒 COMPREHENSIVE GROCERY SHOPPING LIST")
@@ -1102,38 +1117,21 @@ class EnhancedFoodRecommendationSystem:
         print(f"  • Onions: 1 kg")
         print(f"  • Tomatoes: 1 kg")
         
-    def _detailed_nutrition_analysis(self, weekly_plan, user_profile):
+    def _detailed_nutrition_analysis(self, plan_summary, user_profile):
         """Provide detailed nutritional analysis"""
         print("\n📊 DETAILED NUTRITIONAL ANALYSIS")
         print("=" * 60)
         
-        # Calculate daily averages
-        daily_totals = []
-        for day, daily_plan in weekly_plan.items():
-            day_total = {
-                'day': day,
-                'calories': sum(meal.get('calories', 0) for meal in daily_plan.values()),
-                'protein': sum(meal.get('protein', 0) for meal in daily_plan.values()),
-                'carbs': sum(meal.get('carbs', 0) for meal in daily_plan.values()),
-                'fats': sum(meal.get('fats', 0) for meal in daily_plan.values()),
-                'fiber': sum(meal.get('fiber', 0) for meal in daily_plan.values()),
-                'sodium': sum(meal.get('sodium', 0) for meal in daily_plan.values()),
-                'calcium': sum(meal.get('calcium', 0) for meal in daily_plan.values()),
-                'iron': sum(meal.get('iron', 0) for meal in daily_plan.values()),
-                'vitamin_c': sum(meal.get('vitamin_c', 0) for meal in daily_plan.values())
-            }
-            daily_totals.append(day_total)
-        
-        # Calculate averages
-        avg_calories = np.mean([d['calories'] for d in daily_totals])
-        avg_protein = np.mean([d['protein'] for d in daily_totals])
-        avg_carbs = np.mean([d['carbs'] for d in daily_totals])
-        avg_fats = np.mean([d['fats'] for d in daily_totals])
-        avg_fiber = np.mean([d['fiber'] for d in daily_totals])
-        avg_sodium = np.mean([d['sodium'] for d in daily_totals])
-        avg_calcium = np.mean([d['calcium'] for d in daily_totals])
-        avg_iron = np.mean([d['iron'] for d in daily_totals])
-        avg_vitamin_c = np.mean([d['vitamin_c'] for d in daily_totals])
+        # Daily averages over the plan
+        avg_calories = plan_summary.average('calories')
+        avg_protein = plan_summary.average('protein')
+        avg_carbs = plan_summary.average('carbs')
+        avg_fats = plan_summary.average('fats')
+        avg_fiber = plan_summary.average('fiber')
+        avg_sodium = plan_summary.average('sodium')
+        avg_calcium = plan_summary.average('calcium')
+        avg_iron = plan_summary.average('iron')
+        avg_vitamin_c = plan_summary.average('vitamin_c')
         
         # Display analysis - use safe division
         target_calories = user_profile['target_calories']
@@ -1206,12 +1204,13 @@ class EnhancedFoodRecommendationSystem:
         
         # Display daily variations
         print(f"\n📈 DAILY VARIATIONS:")
-        for day_data in daily_totals:
-            cal_diff = day_data['calories'] - target_calories
+        for day in plan_summary.days:
+            day_data = plan_summary.day(day)
+            cal_diff = day_data['calorie_difference']
             status = "⚠️ " if abs(cal_diff) > 100 else "✅ "
-            print(f"  {day_data['day']:<10}: {day_data['calories']:>4.0f} kcal {status}({cal_diff:+.0f})")
+            print(f"  {day:<10}: {day_data['total_calories']:>4.0f} kcal {status}({cal_diff:+.0f})")
     
-    def _export_meal_plan(self, weekly_plan, user_profile):
+    def _export_meal_plan(self, weekly_plan, user_profile, plan_summary):
         """Export meal plan to file"""
         print("\n💾 EXPORT MEAL PLAN")
         
@@ -1247,7 +1246,7 @@ class EnhancedFoodRecommendationSystem:
                         f.write(f"{time} - {meal_display}: {dish} ({calories:.0f} kcal, {protein:.1f}g protein)\n")
                     
                     # Daily total
-                    daily_calories = sum(meal.get('calories', 0) for meal in daily_plan.values())
+                    daily_calories = plan_summary.day(day)['total_calories']
                     f.write(f"Daily Total: {daily_calories:.0f} kcal\n\n")
             
             print(f"✅ Meal plan exported to: {filename}")
@@ -1312,35 +1311,47 @@ class EnhancedFoodRecommendationSystem:
         
         print(f"\nAlternative meals for {day}:")
         
+        # Apply user preferences
+        food_type = user_profile.get('food_type', 'Non-Vegetarian')
+        group = 'Vegetarian' if food_type in ['Vegetarian', 'Vegan'] else None
+        graph = self.food_alternatives
+        
         for meal_type, current_meal in weekly_plan[day].items():
-            current_calories = current_meal.get('calories', 300)
-            
-            # Find alternatives with similar calories
-            alternatives = self.food_df[
-                (self.food_df['calories_(kcal)'] >= current_calories * 0.7) &
-                (self.food_df['calories_(kcal)'] <= current_calories * 1.3)
-            ]
-            
-            # Apply user preferences
-            food_type = user_profile.get('food_type', 'Non-Vegetarian')
-            if food_type in ['Vegetarian', 'Vegan']:
-                alternatives = alternatives[alternatives['veg_nonveg'] == 'Vegetarian']
-            
-            # Remove current meal from alternatives
-            alternatives = alternatives[alternatives['dish_name'] != current_meal['dish_name']]
+            # Nearest dishes with similar calories, current meal excluded
+            alternatives = self._meal_alternatives(current_meal, 3, 0.3, group)
             
             if len(alternatives) >= 3:
-                sample_alternatives = alternatives.sample(3)
-                
                 meal_display = meal_type.replace('_', ' ').title()
                 print(f"\n{meal_display} (Current: {current_meal['dish_name']}):")
                 
-                for i, (_, alt) in enumerate(sample_alternatives.iterrows(), 1):
-                    print(f"  {i}. {alt['dish_name']} ({alt['calories_(kcal)']:.0f} kcal, {alt['protein_(g)']:.1f}g protein)")
+                for i, row in enumerate(alternatives, 1):
+                    protein = graph.nutrients[row, 1]
+                    print(f"  {i}. {graph.names[row]} ({graph.calories[row]:.0f} kcal, {protein:.1f}g protein)")
             else:
                 meal_display = meal_type.replace('_', ' ').title()
                 print(f"\n{meal_display}: Limited alternatives available")
 
+    def _meal_alternatives(self, meal, limit, tolerance, group=None):
+        """Rows of up to limit dishes to offer instead of a meal, nearest first, from the alternatives graph
+
+        Dishes come from the meal's veg_nonveg group (or group), within tolerance of its calories.
+        """
+        graph = self.food_alternatives
+        calories = meal.get('calories', 300) or 0
+        group = group or meal.get('veg_nonveg') or ''
+        if isinstance(meal, MealSelection) and not meal.edited and graph.groups[meal.row] == group:
+            found = graph.alternatives(meal.row, limit + 1, tolerance)
+        else:
+            # Meals not taken from the dataset enter the graph at the group's dish closest in calories
+            entry = graph.nearest(calories, group)
+            if entry is None:
+                return []
+            found = [(entry, 0.0), *graph.alternatives(entry, tolerance=tolerance)]
+            found = [(row, distance) for row, distance in found
+                     if abs(graph.calories[row] - calories) <= tolerance * calories]
+        rows = [row for row, _distance in found if graph.names[row] != meal.get('dish_name')]
+        return rows[:limit]
+
 class UserProfiler:
     """Calculate BMI, BMR, TDEE and other health metrics"""
     
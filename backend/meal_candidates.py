@@ -0,0 +1,232 @@
+"""
+Bitmap candidate index for WeeklyMealPlanner.
+
+Built once per food dataset (a FoodCatalog), FoodCandidateIndex answers
+the planner's candidate filtering (``WeeklyMealPlanner._candidate_rows``)
+with a few big-int ANDs instead of a chain of DataFrame copies:
+
+* equality bitmaps (bit i = row i) for veg_nonveg, region, meal_category
+  and any restriction column, built on first use and then kept,
+* the calorie column sorted once, so a calorie band is two binary
+  searches,
+* dislike patterns compiled once and matched against the dish names a
+  single time per distinct dislike list.
+
+Candidates come back as row positions in dataset order, the same rows
+the pandas filters used to produce.
+
+For scoring, the index also holds a float32 feature matrix (one row per
+food: nutrients, per-kcal ratios, is_* flags). The planner expresses its
+goal and meal-type rules as a weight vector over ``feature_names``, so
+scoring a candidate pool is one matrix-vector product, and CandidatePool
+keeps only the best few candidates ordered (argpartition) instead of
+sorting the whole pool.
+"""
+
+import re
+
+import numpy as np
+
+from bitmaps import pack_bitmap, unpack_bitmap
+from food_catalog import FoodCatalog
+
+# Scoring feature -> dataset column; missing optional columns score as 0
+NUTRIENT_FEATURES = {
+    'calories': 'calories_(kcal)',
+    'protein': 'protein_(g)',
+    'carbs': 'carbohydrates_(g)',
+    'fats': 'fats_(g)',
+    'fiber': 'fibre_(g)',
+    'sodium': 'sodium_(mg)',
+    'calcium': 'calcium_(mg)',
+    'iron': 'iron_(mg)',
+    'vitamin_c': 'vitamin_c_(mg)',
+}
+
+# Per-kcal ratios, 0 for foods without calories
+RATIO_FEATURES = ('protein_per_kcal', 'fiber_per_kcal', 'fats_per_kcal')
+
+# Candidates ordered up front per pool; enough for a week of variety exclusions
+POOL_TOP_K = 32
+
+
+class FoodCandidateIndex:
+    """Per-dataset bitmaps answering the planner's candidate filters"""
+
+    def __init__(self, catalog, features=None, calorie_order=None):
+        """features and calorie_order may be passed in precomputed (e.g. attached from shared memory)"""
+        if not isinstance(catalog, FoodCatalog):
+            catalog = FoodCatalog.from_frame(catalog)
+        self.catalog = catalog
+        self.size = len(catalog)
+        self.all = (1 << self.size) - 1
+        self.columns = catalog.columns
+        self.names = catalog.names if catalog.names is not None else [None] * self.size
+        self._equals = {}
+        self._dislikes = {}
+        self._names = None
+
+        self.calories = None
+        if 'calories_(kcal)' in self.columns:
+            values = catalog.numeric['calories_(kcal)']
+            order = np.argsort(values, kind='stable') if calorie_order is None else calorie_order
+            self.calories = (values[order], order)
+
+        self.flag_columns = list(catalog.flags)
+        self.feature_names = ('constant', *NUTRIENT_FEATURES, *RATIO_FEATURES, *self.flag_columns)
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.features = self._feature_matrix() if features is None else features
+
+    def _feature_matrix(self):
+        catalog = self.catalog
+        features = np.zeros((self.size, len(self.feature_names)), dtype=np.float32)
+        features[:, 0] = 1
+        column = self.feature_index
+        for name, source in NUTRIENT_FEATURES.items():
+            if source in self.columns:
+                features[:, column[name]] = catalog.numeric_column(source)
+        calories = features[:, column['calories']]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name in RATIO_FEATURES:
+                nutrient = features[:, column[name[:-len('_per_kcal')]]]
+                features[:, column[name]] = np.where(calories > 0, nutrient / calories, 0)
+        for name in self.flag_columns:
+            features[:, column[name]] = catalog.numeric_column(name)
+        return features
+
+    def weights(self, terms):
+        """Weight vector over feature_names from {feature: weight}; unknown features are ignored"""
+        weights = np.zeros(len(self.feature_names), dtype=np.float32)
+        for name, weight in terms.items():
+            position = self.feature_index.get(name)
+            if position is not None:
+                weights[position] += weight
+        return weights
+
+    def equals(self, column, value):
+        """Rows where column == value"""
+        key = (column, value)
+        bitmap = self._equals.get(key)
+        if bitmap is None:
+            bitmap = self._equals[key] = pack_bitmap(self.catalog.equals(column, value))
+        return bitmap
+
+    def isin(self, column, values):
+        bitmap = 0
+        for value in values:
+            bitmap |= self.equals(column, value)
+        return bitmap
+
+    def calorie_band(self, low, high):
+        """Rows with low <= calories <= high and calories > 0"""
+        values, order = self.calories
+        start = max(np.searchsorted(values, low, side='left'), np.searchsorted(values, 0, side='right'))
+        stop = np.searchsorted(values, high, side='right')
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[start:stop]] = True
+        return pack_bitmap(mask)
+
+    def disliked(self, dislikes):
+        """Rows whose dish name contains any dislike (case-insensitive regex, like str.contains)"""
+        key = tuple(dislikes)
+        bitmap = self._dislikes.get(key)
+        if bitmap is None:
+            patterns = [re.compile(dislike, re.IGNORECASE) for dislike in key]
+            names = self.names
+            mask = np.fromiter(
+                (isinstance(name, str) and any(p.search(name) for p in patterns) for name in names),
+                dtype=bool, count=len(names)
+            )
+            bitmap = self._dislikes[key] = pack_bitmap(mask)
+        return bitmap
+
+    def _name_table(self):
+        """(dish name -> rows, row -> dish code), built on first use; a dish's code is its first row"""
+        if self._names is None:
+            rows = {}
+            codes = np.empty(self.size, dtype=np.int64)
+            for row, dish in enumerate(self.names):
+                same = rows.setdefault(dish, [])
+                codes[row] = same[0] if same else row
+                same.append(row)
+            self._names = (rows, codes)
+        return self._names
+
+    def named(self, name):
+        """Row positions of every food called name, in dataset order"""
+        return self._name_table()[0].get(name, ())
+
+    def name_codes(self):
+        """Per row, an integer shared by every row with the same dish name"""
+        return self._name_table()[1]
+
+    def rows(self, bitmap):
+        """Row positions set in bitmap, in dataset order"""
+        return unpack_bitmap(bitmap, self.size)
+
+    def mask(self, bitmap):
+        """Boolean array of bitmap (negative bitmaps from ``&= ~x`` included)"""
+        data = np.frombuffer((bitmap & self.all).to_bytes((self.size + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, count=self.size, bitorder='little').astype(bool)
+
+
+class CandidatePool:
+    """A meal slot's candidate rows with their scores, consumed best first"""
+
+    __slots__ = ('rows', 'scores', 'names', '_order')
+
+    def __init__(self, rows, scores, names):
+        self.rows = rows
+        self.scores = scores
+        self.names = names
+        self._order = None
+
+    @classmethod
+    def score(cls, index, rows, weights):
+        return cls(rows, index.features[rows] @ weights, index.names)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def ranked(self, k):
+        """Pool offsets of the k best scores, best first; ties keep dataset order"""
+        scores = self.scores
+        if k >= len(scores):
+            return np.argsort(-scores, kind='stable')
+        top = np.argpartition(-scores, k - 1)[:k]
+        top.sort()
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def pick(self, *used):
+        """Row of the best candidate whose dish name is in none of the used sets, else the best row"""
+        if self._order is None:
+            self._order = self.ranked(POOL_TOP_K)
+        names = self.names
+        while True:
+            for offset in self._order:
+                row = self.rows[offset]
+                if not any(names[row] in seen for seen in used):
+                    return row
+            if len(self._order) == len(self.rows):
+                return self.rows[self._order[0]]
+            self._order = self.ranked(len(self._order) * 4)
+
+    def pick_diverse(self, penalty, relevance, *used):
+        """Maximal marginal relevance among the top unused candidates (see dish_similarity)
+
+        Maximizes relevance * (score scaled to 0..1 over the pool) - (1 - relevance) * penalty[row];
+        falls back to ``pick`` when every top candidate is already used.
+        """
+        if self._order is None:
+            self._order = self.ranked(POOL_TOP_K)
+        names = self.names
+        offsets = [offset for offset in self._order
+                   if not any(names[self.rows[offset]] in seen for seen in used)]
+        if not offsets:
+            return self.pick(*used)
+        scores = self.scores[offsets]
+        low, high = self.scores.min(), self.scores.max()
+        scaled = (scores - low) / (high - low) if high > low else np.ones(len(offsets))
+        rows = self.rows[offsets]
+        marginal = relevance * scaled - (1 - relevance) * penalty[rows]
+        return rows[int(np.argmax(marginal))]
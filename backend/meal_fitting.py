@@ -0,0 +1,209 @@
+"""
+Day-level calorie fitting for WeeklyMealPlanner.
+
+The greedy planner takes each slot's best-scored dish within ±40% of the
+slot's calorie share, so a day's total is off target_calories by the sum
+of every slot's error. DayFitter chooses a whole day at once instead:
+
+* a slot's candidates are the foods its preferences allow within a wider
+  calorie band (FIT_BAND), minus the dishes variety excludes,
+* a candidate costs its score shortfall against the slot's best dish
+  plus its distance from the slot's share of the protein, carb and fat
+  targets, and with a DiversityPenalty its similarity to the dishes chosen
+  earlier in the variety window,
+* calories are rounded onto a FIT_GRID_KCAL grid; only the cheapest
+  candidate of a grid cell can be part of a best day, so a slot keeps at
+  most one candidate per cell,
+* a DP over the slots (one gather and min over candidates x cells per
+  slot) gives the cheapest way to reach every day total, and the day
+  chosen is the cheapest once its distance from target_calories is added.
+
+Slots with no candidates at all keep the planner's fallback meal, whose
+calories count towards the day total, and so do slots held fixed when a
+day is fitted again around meals already in place.
+"""
+
+import numpy as np
+
+# Candidate calorie range as fractions of the slot's target when fitting a whole day
+FIT_BAND = (0.25, 2.0)
+
+FIT_GRID_KCAL = 10
+
+# Day totals considered, as a multiple of target_calories
+FIT_MAX_TOTAL = 1.6
+
+# Cost weights: missing target_calories by 100%, missing a daily macro target
+# by 100%, and a slot's worst candidate instead of its best
+CALORIE_WEIGHT = 4.0
+MACRO_WEIGHT = 1.0
+SCORE_WEIGHT = 0.25
+
+# Cost of a candidate as similar as can be to a dish already chosen in the variety window
+DIVERSITY_WEIGHT = 0.5
+
+# Scoring feature -> profile key of its daily target in grams
+MACRO_TARGETS = {'protein': 'protein_target', 'carbs': 'carb_target', 'fats': 'fat_target'}
+
+
+class _SlotCandidates:
+    """One slot's candidate rows with their grid cells and costs"""
+
+    __slots__ = ('rows', 'cells', 'costs', 'order')
+
+    def __init__(self, rows, cells, costs):
+        self.rows = rows
+        self.cells = cells
+        self.costs = costs
+        # By cell, then cost; lexsort is stable, so ties keep dataset order
+        self.order = np.lexsort((costs, cells))
+
+    def cheapest_per_cell(self, index, excluded, extra=None):
+        """(offsets, costs) of the cheapest candidate per grid cell among dishes not excluded (all if every one is)
+
+        extra: an additional cost per candidate, e.g. a diversity penalty
+        """
+        keep = np.ones(len(self.rows), dtype=bool)
+        for name in excluded:
+            rows = np.asarray(index.named(name), dtype=self.rows.dtype)
+            if len(rows):
+                # Both row lists are in dataset order
+                offsets = np.minimum(np.searchsorted(self.rows, rows), len(self.rows) - 1)
+                keep[offsets[self.rows[offsets] == rows]] = False
+        if not keep.any():
+            keep[:] = True
+        costs, order = self.costs, self.order
+        if extra is not None and extra.any():
+            costs = costs + extra
+            order = np.lexsort((costs, self.cells))
+        kept = order[keep[order]]
+        first = np.ones(len(kept), dtype=bool)
+        first[1:] = self.cells[kept[1:]] != self.cells[kept[:-1]]
+        kept = kept[first]
+        return kept, costs[kept]
+
+
+class DayFitter:
+    """Chooses a day's meals jointly to fit the calorie and macro targets"""
+
+    def __init__(self, planner):
+        self.planner = planner
+        self.index = planner.food_index
+        self.names = self.index.names
+        profile = planner.user_profile
+        self.target = float(profile['target_calories'])
+        self.slots = []
+        # Per slot: the fallback meal's calories where there are no candidates, else 0
+        self.fallback_calories = []
+        for meal_type in planner.meal_schedule:
+            calorie_target = planner.calorie_distribution.get(meal_type, 300)
+            slot = self._slot(meal_type, calorie_target, profile)
+            self.fallback_calories.append(
+                planner._create_fallback_meal(meal_type, calorie_target)['calories'] if slot is None else 0.0)
+            self.slots.append(slot)
+        fixed = sum(self.fallback_calories)
+        self.base = int(round(fixed / FIT_GRID_KCAL))
+        self.grid = np.arange(int(max(self.target * FIT_MAX_TOTAL, fixed + self.target) // FIT_GRID_KCAL) + 1)
+        self.calorie_cost = CALORIE_WEIGHT * np.abs(self.grid * FIT_GRID_KCAL - self.target) / max(self.target, 1)
+
+    def _slot(self, meal_type, calorie_target, profile):
+        planner = self.planner
+        index = planner.food_index
+        rows = planner._candidate_rows(meal_type, calorie_target, FIT_BAND)
+        if len(rows) == 0:
+            return None
+        features = index.features[rows]
+        scores = features @ planner._score_weights(meal_type)
+        spread = float(scores.max() - scores.min()) or 1.0
+        costs = SCORE_WEIGHT * (scores.max() - scores) / spread
+
+        share = calorie_target / max(self.target, 1)
+        for feature, key in MACRO_TARGETS.items():
+            daily = profile.get(key) or 0
+            if daily > 0:
+                amount = features[:, index.feature_index[feature]]
+                costs = costs + MACRO_WEIGHT * np.abs(amount - share * daily) / daily
+
+        calories = features[:, index.feature_index['calories']]
+        cells = np.rint(calories / FIT_GRID_KCAL).astype(np.int64)
+        return _SlotCandidates(np.asarray(rows), cells, costs.astype(np.float64))
+
+    def fit_day(self, used_foods_global=(), penalty=None, fixed=None):
+        """Row per slot for one day (None where the fallback meal applies), avoiding used dishes
+
+        penalty: a dish_similarity.DiversityPenalty, added to candidate costs with DIVERSITY_WEIGHT
+        fixed: {slot position: calories} of meals kept as they are; their slots come back as None
+        """
+        fixed = fixed or {}
+        slots = [None if position in fixed else slot for position, slot in enumerate(self.slots)]
+        base = self.base
+        if fixed:
+            # A fixed slot's own calories replace its fallback meal's
+            kept = sum(calories for position, calories in enumerate(self.fallback_calories) if position not in fixed)
+            base = int(round((kept + sum(fixed.values())) / FIT_GRID_KCAL))
+        excluded = [set(used_foods_global) for _slot in slots]
+        extra = [DIVERSITY_WEIGHT * penalty[slot.rows] if slot is not None and penalty is not None else None
+                 for slot in slots]
+        candidates = [slot.cheapest_per_cell(self.index, names, more) if slot is not None else None
+                      for slot, names, more in zip(slots, excluded, extra)]
+        while True:
+            rows = self._solve(slots, candidates, base)
+            # A dish chosen for two slots stays in the first and is excluded from the later ones
+            seen = set()
+            changed = False
+            for position, row in enumerate(rows):
+                if row is None:
+                    continue
+                name = self.names[row]
+                if name in seen and name not in excluded[position]:
+                    excluded[position].add(name)
+                    candidates[position] = slots[position].cheapest_per_cell(
+                        self.index, excluded[position], extra[position])
+                    changed = True
+                seen.add(name)
+            if not changed:
+                return rows
+
+    def _solve(self, slots, candidates, base):
+        """Best row per slot given each slot's (offsets, costs), at most one per grid cell, from base cells"""
+        grid = self.grid
+        size = len(grid)
+        totals = np.full(size, np.inf)
+        totals[min(base, size - 1)] = 0.0
+
+        choices = []
+        for slot, slot_candidates in zip(slots, candidates):
+            if slot is None:
+                choices.append(None)
+                continue
+            offsets, costs = slot_candidates
+            on_grid = slot.cells[offsets] < size
+            if not on_grid.any():
+                # Every candidate overshoots the grid: keep the cheapest, outside the DP
+                choices.append((offsets[np.argmin(costs)], None, None))
+                continue
+            offsets, costs = offsets[on_grid], costs[on_grid]
+            source = grid[None, :] - slot.cells[offsets][:, None]
+            reached = np.where(source >= 0, totals[np.maximum(source, 0)], np.inf) + costs[:, None]
+            best = reached.argmin(axis=0)
+            totals = reached[best, grid]
+            choices.append((offsets, costs, best))
+
+        final = totals + self.calorie_cost
+        cell = int(np.argmin(final))
+        rows = [None] * len(slots)
+        for position in range(len(slots) - 1, -1, -1):
+            slot, choice = slots[position], choices[position]
+            if choice is None:
+                continue
+            offsets, costs, best = choice
+            if best is None:
+                offset = offsets
+            elif np.isfinite(final[cell]):
+                offset = offsets[best[cell]]
+                cell -= int(slot.cells[offset])
+            else:
+                # No combination stays on the grid: the slot's cheapest candidate
+                offset = offsets[np.argmin(costs)]
+            rows[position] = int(slot.rows[offset])
+        return rows
@@ -0,0 +1,149 @@
+"""
+Incremental editing of a generated weekly plan.
+
+PlanEditor wraps a plan WeeklyMealPlanner generated and keeps, next to it:
+
+* the plan's PlanNutrients (plan_summary), the accumulators generation
+  filled; changing a meal updates one slot, its day row and the week
+  row, whatever else the plan holds,
+* the dish names of every variety window (the planner's three-day
+  windows) as counts, so the dishes a day must avoid are known at any
+  time instead of replaying generation.
+
+``replace_meal`` puts another dish in one slot and ``edit_meal`` changes
+keys of a meal in place (a custom dish name). With ``reoptimize`` the
+rest of that day is fitted again around the edited meal (DayFitter with
+the meal held fixed), avoiding every dish used on the window's other
+days so that they stay valid; no other day is touched.
+"""
+
+from collections import Counter
+from collections.abc import Mapping
+
+from dish_similarity import DiversityPenalty
+from food_catalog import MealSelection
+from meal_fitting import DayFitter
+from week_optimizer import VARIETY_DAYS
+
+
+class PlanEditor:
+    """A weekly plan with running nutrient totals and variety state, edited one meal at a time"""
+
+    def __init__(self, planner, weekly_plan):
+        self.planner = planner
+        self.plan = weekly_plan
+        self.days = list(weekly_plan)
+        self._days = {day: d for d, day in enumerate(self.days)}
+        self.nutrients = planner.plan_nutrients_of(weekly_plan)
+
+        self.windows = [Counter() for _start in range(0, len(self.days), VARIETY_DAYS)]
+        for d, day in enumerate(self.days):
+            for meal in weekly_plan[day].values():
+                self.windows[d // VARIETY_DAYS][meal.get('dish_name')] += 1
+        self._fitter = None
+
+    # ============= EDITS =============
+
+    def replace_meal(self, day, meal_type, meal, reoptimize=False):
+        """Put meal (a dataset row or a meal mapping) in a slot; returns the slots that changed
+
+        reoptimize: fit the day's other meals again around it (see reoptimize_day)
+        """
+        current = self.plan[day][meal_type]
+        if not isinstance(meal, Mapping):
+            # The slot's time and target come from the planner: fallback meals carry neither
+            meal = MealSelection(self.planner.food_index.catalog, meal, self.planner.meal_schedule[meal_type],
+                                 self.planner.calorie_distribution.get(meal_type, 300))
+        self.plan[day][meal_type] = meal
+        self._account(day, meal_type, current.get('dish_name'))
+        changed = [meal_type]
+        if reoptimize:
+            changed.extend(self.reoptimize_day(day, keep=(meal_type,)))
+        return changed
+
+    def edit_meal(self, day, meal_type, changes, reoptimize=False):
+        """Update keys of a planned meal in place (e.g. a custom dish name); returns the slots that changed"""
+        meal = self.plan[day][meal_type]
+        name = meal.get('dish_name')
+        meal.update(changes)
+        self._account(day, meal_type, name)
+        changed = [meal_type]
+        if reoptimize:
+            changed.extend(self.reoptimize_day(day, keep=(meal_type,)))
+        return changed
+
+    def _account(self, day, meal_type, old_name):
+        """Bring the totals and window counts up to date with one slot's new meal"""
+        meal = self.plan[day][meal_type]
+        self.nutrients.set(day, meal_type, meal)
+
+        window = self.windows[self._days[day] // VARIETY_DAYS]
+        window[old_name] -= 1
+        if not window[old_name]:
+            del window[old_name]
+        window[meal.get('dish_name')] += 1
+
+    # ============= REPLANNING =============
+
+    def window_dishes(self, day):
+        """Dish names used on the other days of the day's variety window"""
+        counts = self.windows[self._days[day] // VARIETY_DAYS].copy()
+        counts.subtract(meal.get('dish_name') for meal in self.plan[day].values())
+        return {name for name, count in counts.items() if count > 0}
+
+    def reoptimize_day(self, day, keep=()):
+        """Fit one day's meals again, holding the keep slots and hand-edited meals; returns the slots that changed"""
+        planner = self.planner
+        if self._fitter is None:
+            self._fitter = DayFitter(planner)
+        daily_plan = self.plan[day]
+        used = self.window_dishes(day)
+
+        fixed = {}
+        for position, meal_type in enumerate(planner.meal_schedule):
+            meal = daily_plan.get(meal_type)
+            if meal is None:
+                continue
+            if meal_type in keep or self._hand_made(meal):
+                fixed[position] = meal.get('calories', 0) or 0
+                used.add(meal.get('dish_name'))
+
+        penalty = None
+        if planner.similarity is not None:
+            penalty = DiversityPenalty(planner.similarity)
+            d = self._days[day]
+            window = range(d - d % VARIETY_DAYS, min(d - d % VARIETY_DAYS + VARIETY_DAYS, len(self.days)))
+            for other in window:
+                for meal_type, meal in self.plan[self.days[other]].items():
+                    if isinstance(meal, MealSelection) and (other != d or meal_type in keep):
+                        penalty.add(meal.row)
+
+        rows = self._fitter.fit_day(used, penalty, fixed)
+        changed = []
+        for position, (meal_type, time) in enumerate(planner.meal_schedule.items()):
+            row = rows[position]
+            current = daily_plan.get(meal_type)
+            if row is None or current is None or (isinstance(current, MealSelection) and current.row == row):
+                continue
+            daily_plan[meal_type] = MealSelection(planner.food_index.catalog, row, time,
+                                                  planner.calorie_distribution.get(meal_type, 300))
+            self._account(day, meal_type, current.get('dish_name'))
+            changed.append(meal_type)
+        return changed
+
+    @staticmethod
+    def _hand_made(meal):
+        """Whether a meal was edited or entered by hand rather than planned"""
+        if isinstance(meal, MealSelection):
+            return meal.edited
+        return meal.get('meal_category') != 'Fallback'
+
+    # ============= TOTALS =============
+
+    def summary(self):
+        """PlanSummary of the plan as edited so far"""
+        return self.nutrients.summary(self.planner.user_profile)
+
+    def day_summary(self, day):
+        """get_daily_summary of one day, read from the running totals"""
+        return self.summary().day(day)
@@ -0,0 +1,328 @@
+"""
+Prometheus metrics and request instrumentation for the Diet Plan API.
+
+Request metrics are labelled with the matched route rule (e.g.
+``/api/diet-plan``) instead of the raw request path, so probe URLs cannot
+create new time series. Unmatched paths share the ``<unmatched>`` bucket.
+Label children are bound once per route and reused on every request, and
+every labelled metric sits behind a series-count guard that drops label
+combinations beyond ``METRICS_MAX_SERIES``.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (see gunicorn.conf.py) every
+worker writes its samples to mmap-backed files in that directory and
+``generate_metrics`` aggregates all of them on scrape.
+"""
+
+import os
+import threading
+import time
+
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, Gauge, generate_latest, multiprocess
+)
+
+UNMATCHED_ENDPOINT = '<unmatched>'
+OTHER_METHOD = 'OTHER'
+KNOWN_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+# Upper bound on label combinations per metric
+MAX_SERIES_PER_METRIC = int(os.environ.get('METRICS_MAX_SERIES', 500))
+
+# Shared directory for per-worker metric files; unset means single-process mode
+MULTIPROCESS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+class _NullChild:
+    """No-op stand-in returned once a metric has hit its series limit"""
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+_NULL_CHILD = _NullChild()
+
+
+class GuardedMetric:
+    """Wraps a labelled metric, caching children and capping their number"""
+
+    def __init__(self, metric, limit=None):
+        self._metric = metric
+        self._labelnames = metric._labelnames
+        self._limit = MAX_SERIES_PER_METRIC if limit is None else limit
+        self._children = {}
+        self._lock = threading.Lock()
+        self._dropped = None
+
+    def labels(self, *labelvalues, **labelkwargs):
+        if labelkwargs:
+            labelvalues = tuple(labelkwargs[name] for name in self._labelnames)
+        key = tuple(str(value) for value in labelvalues)
+
+        child = self._children.get(key)
+        if child is not None:
+            return child
+
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                if len(self._children) >= self._limit:
+                    self._record_drop()
+                    return _NULL_CHILD
+                child = self._metric.labels(*key)
+                self._children[key] = child
+        return child
+
+    @property
+    def series_count(self):
+        return len(self._children)
+
+    def _record_drop(self):
+        if self._dropped is None:
+            self._dropped = METRICS_DROPPED_SERIES.labels(metric=self._metric._name)
+        self._dropped.inc()
+
+    def __getattr__(self, name):
+        return getattr(self._metric, name)
+
+
+# ============= PROMETHEUS METRICS =============
+
+METRICS_DROPPED_SERIES = Counter(
+    'metrics_dropped_series_total',
+    'Label combinations dropped by the series-count guard',
+    ['metric']
+)
+
+# Request metrics
+REQUEST_COUNT = GuardedMetric(Counter(
+    'flask_app_requests_total',
+    'Total HTTP requests',
+    ['method', 'endpoint', 'http_status']
+))
+
+REQUEST_LATENCY = GuardedMetric(Histogram(
+    'flask_app_request_latency_seconds',
+    'HTTP request latency',
+    ['method', 'endpoint'],
+    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+))
+
+REQUEST_STAGE_LATENCY = GuardedMetric(Histogram(
+    'request_stage_seconds',
+    'Latency of individual request stages (validation, model, parse, serialize, ...)',
+    ['stage'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+             1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+))
+
+LOG_RECORDS_DROPPED = GuardedMetric(Counter(
+    'log_records_dropped_total',
+    'Log records dropped before reaching stdout',
+    ['reason']
+))
+
+RESPONSE_SERIALIZATION_TIME = GuardedMetric(Histogram(
+    'response_serialization_seconds',
+    'Time spent encoding JSON response bodies',
+    ['endpoint'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+))
+
+RESPONSE_BYTES = GuardedMetric(Histogram(
+    'response_bytes',
+    'Response body size on the wire',
+    ['endpoint', 'encoding'],
+    buckets=(256, 1024, 4096, 16384, 32768, 65536, 131072, 262144, 524288)
+))
+
+# Diet plan specific metrics
+DIET_PLAN_REQUESTS = GuardedMetric(Counter(
+    'diet_plan_requests_total',
+    'Total diet plan generation requests',
+    ['goal', 'diet_preference', 'status']
+))
+
+DIET_PLAN_GENERATION_TIME = GuardedMetric(Histogram(
+    'diet_plan_generation_seconds',
+    'Time taken to generate diet plan',
+    ['goal', 'diet_preference'],
+    buckets=(1.0, 2.0, 5.0, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0)
+))
+
+DIET_PLAN_FAILURES = GuardedMetric(Counter(
+    'diet_plan_failures_total',
+    'Total diet plan generation failures',
+    ['error_type', 'goal']
+))
+
+# API health metrics
+API_INITIALIZATION_STATUS = Gauge(
+    'api_initialization_status',
+    'API initialization status (1=success, 0=failure)',
+    multiprocess_mode='livemin'
+)
+
+ACTIVE_REQUESTS = GuardedMetric(Gauge(
+    'active_requests',
+    'Number of requests currently being processed',
+    ['endpoint'],
+    multiprocess_mode='livesum'
+))
+
+# Model metrics
+MODEL_API_CALLS = GuardedMetric(Counter(
+    'gemini_api_calls_total',
+    'Total Gemini API calls',
+    ['model_name', 'status']
+))
+
+JSON_PARSE_ERRORS = Counter(
+    'json_parse_errors_total',
+    'Total JSON parsing errors from AI responses'
+)
+
+JSON_REPAIRED = Counter(
+    'json_repaired_total',
+    'AI responses that parsed after local JSON repair'
+)
+
+JSON_SALVAGED = Counter(
+    'json_salvaged_total',
+    'Truncated AI responses completed by regenerating only the missing parts'
+)
+
+JSON_UNRECOVERABLE = Counter(
+    'json_unrecoverable_total',
+    'AI responses that could not be repaired or salvaged'
+)
+
+PLAN_VALIDATION_ISSUES = GuardedMetric(Counter(
+    'plan_validation_issues_total',
+    'Schema and total-consistency issues found in generated plans',
+    ['kind', 'action']
+))
+
+FOOD_ITEM_MATCHES = GuardedMetric(Counter(
+    'food_item_matches_total',
+    'Generated food items matched to the nutrition dataset',
+    ['match']
+))
+
+# User profile metrics
+USER_PROFILE_DISTRIBUTION = GuardedMetric(Counter(
+    'user_profile_requests',
+    'Distribution of user profiles',
+    ['goal', 'diet_preference', 'activity_level', 'gender']
+))
+
+CALORIE_TARGET_DISTRIBUTION = Histogram(
+    'calorie_target_distribution',
+    'Distribution of calorie targets generated',
+    buckets=(1000, 1500, 2000, 2500, 3000, 3500, 4000, 5000)
+)
+
+# ============= END METRICS =============
+
+
+def generate_metrics():
+    """Render the exposition for /metrics, aggregating workers in multiprocess mode"""
+    if not MULTIPROCESS_DIR:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROCESS_DIR)
+    return generate_latest(registry)
+
+
+class RouteInstruments:
+    """Metric children pre-bound for one (method, route rule) pair"""
+
+    __slots__ = ('method', 'endpoint', 'latency', 'active', '_count', '_statuses')
+
+    def __init__(self, method, endpoint, count=REQUEST_COUNT, latency=REQUEST_LATENCY,
+                 active=ACTIVE_REQUESTS):
+        self.method = method
+        self.endpoint = endpoint
+        self.latency = latency.labels(method, endpoint)
+        self.active = active.labels(endpoint)
+        self._count = count
+        self._statuses = {}
+
+    def count(self, status_code):
+        child = self._statuses.get(status_code)
+        if child is None:
+            child = self._count.labels(self.method, self.endpoint, status_code)
+            self._statuses[status_code] = child
+        return child
+
+
+class RequestInstrumentation:
+    """Flask hooks recording request latency, counts and in-flight requests"""
+
+    def __init__(self, app=None, count=REQUEST_COUNT, latency=REQUEST_LATENCY,
+                 active=ACTIVE_REQUESTS):
+        self._metrics = (count, latency, active)
+        self._routes = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def bind_routes(self):
+        """Pre-bind children for every registered route rule and method"""
+        for rule in self.app.url_map.iter_rules():
+            for method in rule.methods:
+                self.instruments(method, rule.rule)
+        for method in ('GET', 'POST'):
+            self.instruments(method, UNMATCHED_ENDPOINT)
+
+    def instruments(self, method, endpoint):
+        key = (method, endpoint)
+        inst = self._routes.get(key)
+        if inst is None:
+            with self._lock:
+                inst = self._routes.get(key)
+                if inst is None:
+                    inst = RouteInstruments(method, endpoint, *self._metrics)
+                    self._routes[key] = inst
+        return inst
+
+    def start(self, method, endpoint):
+        inst = self.instruments(method, endpoint)
+        inst.active.inc()
+        return inst
+
+    def finish(self, inst, started, status_code):
+        inst.latency.observe(time.perf_counter() - started)
+        inst.count(status_code).inc()
+
+    def _before_request(self):
+        rule = request.url_rule
+        method = request.method if request.method in KNOWN_METHODS else OTHER_METHOD
+        g._metrics_route = self.start(method, rule.rule if rule is not None else UNMATCHED_ENDPOINT)
+        g._metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        inst = g.get('_metrics_route')
+        if inst is not None:
+            self.finish(inst, g._metrics_started, response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        inst = g.pop('_metrics_route', None)
+        if inst is not None:
+            inst.active.dec()
@@ -0,0 +1,195 @@
+"""
+Grounds generated food items in indian_food_nutrition.csv.
+
+NutritionIndex maps a free-text food name to a dataset row in two steps:
+
+* exact - the name's normalized token set (lower-cased, punctuation and
+  filler words dropped, sorted) looked up in a dict. Dish names are
+  indexed whole and by their parts, so "Curd with potatoes (Dahi aloo)"
+  is found as "Dahi Aloo" too,
+* fuzzy - otherwise the candidate rows sharing character trigrams with
+  the name are scored by Dice similarity, and the best one is taken when
+  it reaches ``NUTRITION_MATCH_THRESHOLD``.
+
+Lookups are cached per name. ``ground_plan`` then either replaces each
+matched item's calories and macros with the per-100 g dataset values
+scaled to the item's gram quantity (``NUTRITION_GROUNDING=replace``,
+default) or only counts how far the model's numbers were off (``check``).
+"""
+
+import csv
+import os
+import re
+from functools import lru_cache
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'indian_food_nutrition.csv')
+
+NUTRITION_GROUNDING = os.environ.get('NUTRITION_GROUNDING', 'replace').lower()
+NUTRITION_MATCH_THRESHOLD = float(os.environ.get('NUTRITION_MATCH_THRESHOLD', 0.55))
+
+# Item fields and the per-100 g dataset columns they are grounded in
+NUTRIENT_COLUMNS = {
+    'calories': 'calories_(kcal)_per_100g',
+    'protein': 'protein_(g)_per_100g',
+    'carbs': 'carbohydrates_(g)_per_100g',
+    'fats': 'fats_(g)_per_100g',
+}
+
+STOPWORDS = frozenset({'a', 'an', 'and', 'the', 'with', 'of', 'in', 'on', 'style', 'homemade', 'fresh'})
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_PARTS = re.compile(r'[()\[\]/,;]')
+_GRAMS = re.compile(r'(\d+(?:\.\d+)?)\s*(kg|g|gm|gms|grams?|ml|l|litres?|liters?)\b', re.IGNORECASE)
+_UNIT_GRAMS = {'kg': 1000.0, 'l': 1000.0, 'litre': 1000.0, 'litres': 1000.0, 'liter': 1000.0, 'liters': 1000.0}
+
+
+def load_food_rows(path=DATASET_PATH):
+    """Dataset rows as dicts, with nutrient columns as floats and is_* flags as ints"""
+    with open(path, encoding='utf-8') as src:
+        reader = csv.DictReader(src)
+        numeric = [column for column in reader.fieldnames if '_(' in column]
+        flags = [column for column in reader.fieldnames if column.startswith('is_')]
+        rows = []
+        for row in reader:
+            for column in numeric:
+                row[column] = float(row[column] or 0)
+            for column in flags:
+                row[column] = int(row[column] or 0)
+            rows.append(row)
+    return rows
+
+
+def tokens(name):
+    return [token for token in _TOKEN.findall(name.lower()) if token not in STOPWORDS]
+
+
+def normalize(name):
+    """Order-insensitive key for a food name"""
+    return ' '.join(sorted(set(tokens(name))))
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def quantity_grams(quantity):
+    """Grams in a quantity string such as '150 g' or '1 cup (200 ml)', if stated"""
+    if not isinstance(quantity, str):
+        return None
+    match = _GRAMS.search(quantity)
+    if match is None:
+        return None
+    unit = match.group(2).lower()
+    return float(match.group(1)) * _UNIT_GRAMS.get(unit, 1.0)
+
+
+class NutritionIndex:
+    """Exact and trigram-fuzzy lookup of food names to dataset rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._exact = {}
+        self._postings = {}
+        self._gram_counts = []
+
+        for row_id, row in enumerate(rows):
+            name = row['dish_name']
+            # The full name first, so it wins over a part shared with another dish
+            for variant in [name, *_PARTS.split(name)]:
+                key = normalize(variant)
+                if key:
+                    self._exact.setdefault(key, row_id)
+
+            grams = trigrams(' '.join(tokens(name)))
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(row_id)
+
+        self.match = lru_cache(maxsize=4096)(self._match)
+
+    @classmethod
+    def from_csv(cls, path=DATASET_PATH):
+        return cls(load_food_rows(path))
+
+    def _match(self, name):
+        """(row, 'exact' | 'fuzzy', score) for name, or None"""
+        key = normalize(name)
+        if not key:
+            return None
+        row_id = self._exact.get(key)
+        if row_id is not None:
+            return self.rows[row_id], 'exact', 1.0
+
+        query = trigrams(' '.join(tokens(name)))
+        shared = {}
+        postings = self._postings
+        for gram in query:
+            for candidate in postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        if not shared:
+            return None
+
+        counts = self._gram_counts
+        size = len(query)
+        best_id, best = max(
+            ((row_id, 2 * hits / (size + counts[row_id])) for row_id, hits in shared.items()),
+            key=lambda scored: scored[1]
+        )
+        if best < NUTRITION_MATCH_THRESHOLD:
+            return None
+        return self.rows[best_id], 'fuzzy', round(best, 3)
+
+
+class GroundingReport:
+    """Per-plan match counts and how far the model's calories were off"""
+
+    __slots__ = ('exact', 'fuzzy', 'unmatched', 'replaced', 'calorie_error')
+
+    def __init__(self):
+        self.exact = self.fuzzy = self.unmatched = self.replaced = 0
+        # Sum of |model - dataset| calories over items with a gram quantity
+        self.calorie_error = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def ground_plan(plan, index, mode=None):
+    """Match every food item in plan to the dataset; returns a GroundingReport"""
+    replace = (mode or NUTRITION_GROUNDING) == 'replace'
+    report = GroundingReport()
+    days = plan.get('meal_plan')
+    if not isinstance(days, list):
+        return report
+
+    match = index.match
+    for day in days:
+        for meal in (day.get('meals') or ()) if isinstance(day, dict) else ():
+            for item in (meal.get('food_items') or ()) if isinstance(meal, dict) else ():
+                name = item.get('item') if isinstance(item, dict) else None
+                found = match(name) if isinstance(name, str) else None
+                if found is None:
+                    report.unmatched += 1
+                    continue
+                row, kind, _score = found
+                if kind == 'exact':
+                    report.exact += 1
+                else:
+                    report.fuzzy += 1
+
+                grams = quantity_grams(item.get('quantity'))
+                if grams is None:
+                    continue
+                scale = grams / 100
+                calories = round(row['calories_(kcal)_per_100g'] * scale)
+                stated = item.get('calories')
+                if type(stated) in (int, float):
+                    report.calorie_error += abs(stated - calories)
+                if replace:
+                    item['calories'] = calories
+                    item['protein'] = round(row['protein_(g)_per_100g'] * scale, 1)
+                    item['carbs'] = round(row['carbohydrates_(g)_per_100g'] * scale, 1)
+                    item['fats'] = round(row['fats_(g)_per_100g'] * scale, 1)
+                    report.replaced += 1
+    return report
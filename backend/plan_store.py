@@ -0,0 +1,123 @@
+"""
+Content-addressed storage for generated diet plans.
+
+A plan's id is the SHA-256 of its canonical JSON encoding, which also
+serves as its strong ETag. Plans are written once to ``PLAN_STORE_DIR``
+(shared by all gunicorn workers on a host) and the most recently used
+ones are kept decoded in memory.
+
+The directory is capped at ``PLAN_STORE_MAX_FILES`` plans: every tenth of
+that many writes (and at startup) a worker deletes the least recently
+stored plans past the cap. Storing a plan that is already on disk
+refreshes it. ``PLAN_STORE_MAX_FILES=0`` disables pruning, for setups
+that expire the directory externally.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from serialization import content_hash, dumps
+
+PLAN_STORE_DIR = os.environ.get('PLAN_STORE_DIR', os.path.join(tempfile.gettempdir(), 'diet_plans'))
+PLAN_CACHE_SIZE = int(os.environ.get('PLAN_CACHE_SIZE', 256))
+PLAN_STORE_MAX_FILES = int(os.environ.get('PLAN_STORE_MAX_FILES', 10000))
+
+_PLAN_ID = re.compile(r'^[0-9a-f]{64}$')
+
+
+class PlanStore:
+    """Stores plans by content hash with an in-memory LRU in front of disk"""
+
+    def __init__(self, directory=PLAN_STORE_DIR, cache_size=PLAN_CACHE_SIZE, max_files=PLAN_STORE_MAX_FILES):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.max_files = max_files
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    def put(self, plan: dict) -> str:
+        plan_id = content_hash(plan)
+        path = self._path(plan_id)
+        try:
+            # Already stored: refreshed so pruning keeps it
+            os.utime(path)
+        except FileNotFoundError:
+            # Write-then-rename so concurrent readers never see partial files
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as out:
+                out.write(dumps(plan))
+            os.replace(tmp_path, path)
+            self._written()
+        self._remember(plan_id, plan)
+        return plan_id
+
+    def _written(self):
+        if not self.max_files:
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= max(1, self.max_files // 10)
+            if due:
+                self._writes = 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Delete the least recently stored plans beyond max_files; returns how many were deleted"""
+        if not self.max_files:
+            return 0
+        stored = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    try:
+                        stored.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        continue
+        excess = len(stored) - self.max_files
+        if excess <= 0:
+            return 0
+        stored.sort()
+        deleted = 0
+        for _mtime, path in stored[:excess]:
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                # Another worker pruned it first
+                continue
+        return deleted
+
+    def get(self, plan_id: str):
+        """The stored plan, or None for unknown or malformed ids"""
+        if not _PLAN_ID.match(plan_id):
+            return None
+        with self._lock:
+            plan = self._cache.get(plan_id)
+            if plan is not None:
+                self._cache.move_to_end(plan_id)
+                return plan
+        try:
+            with open(self._path(plan_id), 'rb') as src:
+                plan = json.loads(src.read())
+        except FileNotFoundError:
+            return None
+        self._remember(plan_id, plan)
+        return plan
+
+    def _remember(self, plan_id, plan):
+        with self._lock:
+            self._cache[plan_id] = plan
+            self._cache.move_to_end(plan_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _path(self, plan_id):
+        return os.path.join(self.directory, f'{plan_id}.json')
@@ -0,0 +1,123 @@
+"""
+Nutrient accumulators and summaries of weekly meal plans.
+
+PlanNutrients holds a plan's meals as one days x slots x nutrients array
+with running day and week totals. WeeklyMealPlanner fills it while it
+generates a plan and PlanEditor updates it on every change, one slot at a
+time: the slot's day row and the week row are summed again from the
+array (a few adds, in meal order, so the totals are exactly what summing
+the meals gives and never drift), and nothing reads the meals again.
+
+PlanSummary is computed from it once per plan state: the day totals'
+deviation from target_calories, daily averages and their deviation from
+the profile's calorie and macro targets are each one array operation on
+the running totals. The CLI display, the detailed analysis and the
+export all read the same summary; ``as_dict`` gives it in plain JSON
+types.
+"""
+
+import numpy as np
+
+# Meal keys accumulated, in get_daily_summary's order
+SUMMARY_NUTRIENTS = ('calories', 'protein', 'carbs', 'fats', 'fiber', 'sodium', 'calcium', 'iron', 'vitamin_c')
+
+# Nutrient -> profile key of its daily target
+SUMMARY_TARGETS = {
+    'calories': 'target_calories',
+    'protein': 'protein_target',
+    'carbs': 'carb_target',
+    'fats': 'fat_target',
+}
+
+_CALORIES = SUMMARY_NUTRIENTS.index('calories')
+
+
+def meal_nutrients(meal):
+    """A meal's SUMMARY_NUTRIENTS as floats, missing keys as 0"""
+    return np.array([meal.get(nutrient, 0) or 0 for nutrient in SUMMARY_NUTRIENTS], dtype=np.float64)
+
+
+class PlanNutrients:
+    """A weekly plan's nutrients as days x slots x SUMMARY_NUTRIENTS, with running day and week totals"""
+
+    def __init__(self, days, slots, plan=None):
+        """slots: the meal types of every day, or a list of them per day; plan: the weekly plan tracked"""
+        self.plan = plan
+        self.days = list(days)
+        if slots and isinstance(slots[0], str):
+            slots = [slots] * len(self.days)
+        self._days = {day: d for d, day in enumerate(self.days)}
+        self._slots = [{meal_type: s for s, meal_type in enumerate(day_slots)} for day_slots in slots]
+        width = max((len(day_slots) for day_slots in slots), default=0)
+        self.values = np.zeros((len(self.days), width, len(SUMMARY_NUTRIENTS)))
+        self.day_totals = np.zeros((len(self.days), len(SUMMARY_NUTRIENTS)))
+        self.week_totals = np.zeros(len(SUMMARY_NUTRIENTS))
+        self._summary = None
+
+    @classmethod
+    def from_plan(cls, weekly_plan):
+        """Accumulators of an existing plan"""
+        nutrients = cls(list(weekly_plan), [list(daily_plan) for daily_plan in weekly_plan.values()], weekly_plan)
+        for day, daily_plan in weekly_plan.items():
+            for meal_type, meal in daily_plan.items():
+                nutrients.set(day, meal_type, meal)
+        return nutrients
+
+    def set(self, day, meal_type, meal):
+        """Record the meal now in a slot; O(slots + days), independent of the rest of the plan"""
+        d = self._days[day]
+        self.values[d, self._slots[d][meal_type]] = meal_nutrients(meal)
+        self.values[d].sum(axis=0, out=self.day_totals[d])
+        self.day_totals.sum(axis=0, out=self.week_totals)
+        self._summary = None
+
+    def summary(self, user_profile):
+        """PlanSummary of the current meals, computed once until the next change"""
+        if self._summary is None or self._summary.user_profile is not user_profile:
+            self._summary = PlanSummary(self, user_profile)
+        return self._summary
+
+
+class PlanSummary:
+    """Daily and weekly totals, averages and target deviations of a plan"""
+
+    def __init__(self, nutrients, user_profile):
+        self.user_profile = user_profile
+        self.days = nutrients.days
+        self._days = nutrients._days
+        self.day_totals = nutrients.day_totals.copy()
+        self.week_totals = nutrients.week_totals.copy()
+        self.averages = self.week_totals / max(len(self.days), 1)
+
+        self.target_calories = user_profile['target_calories']
+        self.calorie_differences = self.day_totals[:, _CALORIES] - self.target_calories
+        self.weekly_calorie_difference = float(self.calorie_differences.sum())
+        # Relative miss of the daily averages, for targets the profile sets
+        self.targets = {nutrient: user_profile[key] for nutrient, key in SUMMARY_TARGETS.items()
+                        if (user_profile.get(key) or 0) > 0}
+        positions = [SUMMARY_NUTRIENTS.index(nutrient) for nutrient in self.targets]
+        variances = self.averages[positions] / np.array(list(self.targets.values()), dtype=np.float64) - 1
+        self.variances = dict(zip(self.targets, variances.tolist()))
+
+    def day(self, day):
+        """One day's totals, in get_daily_summary's format"""
+        d = self._days[day]
+        summary = {f'total_{nutrient}': float(value) for nutrient, value in zip(SUMMARY_NUTRIENTS, self.day_totals[d])}
+        summary['target_calories'] = self.target_calories
+        summary['calorie_difference'] = float(self.calorie_differences[d])
+        return summary
+
+    def average(self, nutrient):
+        """Daily average of a nutrient over the plan"""
+        return float(self.averages[SUMMARY_NUTRIENTS.index(nutrient)])
+
+    def as_dict(self):
+        """The summary in plain JSON types"""
+        return {
+            'days': [dict(self.day(day), day=day) for day in self.days],
+            'weekly_totals': dict(zip(SUMMARY_NUTRIENTS, self.week_totals.tolist())),
+            'daily_averages': dict(zip(SUMMARY_NUTRIENTS, self.averages.tolist())),
+            'targets': dict(self.targets),
+            'variances': dict(self.variances),
+            'weekly_calorie_difference': self.weekly_calorie_difference,
+        }
@@ -0,0 +1,302 @@
+"""
+Schema validation and total recomputation for generated diet plans.
+
+The plan schema is compiled once, at import, into a tree of small check
+functions. ``validate_plan`` walks a parsed plan a single time: it checks
+types, required keys and ranges, coerces numeric strings, and on the way
+back up recomputes every derived number from the food items:
+
+* ``total_meal_calories`` from the meal's food items,
+* ``daily_total_calories`` from the day's meals,
+* ``weekly_summary`` totals and per-day macro averages from all days,
+* ``macronutrient_breakdown`` percentages from its own gram targets.
+
+With ``PLAN_VALIDATION=correct`` (default) mismatches are corrected in
+place; ``flag`` only reports them and ``off`` skips validation.
+"""
+
+import os
+
+PLAN_VALIDATION = os.environ.get('PLAN_VALIDATION', 'correct').lower()
+
+# Differences below these are rounding noise, not mismatches
+CALORIE_TOLERANCE = 5
+GRAM_TOLERANCE = 0.5
+PERCENT_TOLERANCE = 1.5
+
+_MISSING = object()
+
+
+class ValidationReport:
+    """Issues found in one plan, as (kind, path, message, corrected) tuples
+
+    Paths are kept as linked (parent, key) tuples while validating and
+    only rendered as strings when read through ``issues``.
+    """
+
+    __slots__ = ('correct', '_issues', 'day_count', 'week')
+
+    def __init__(self, correct=True):
+        self.correct = correct
+        self._issues = []
+        self.day_count = 0
+        # calories, protein, carbs, fats summed over every food item
+        self.week = [0.0, 0.0, 0.0, 0.0]
+
+    def add(self, kind, path, message, corrected=False):
+        self._issues.append((kind, path, message, corrected))
+
+    @property
+    def issues(self):
+        return [(kind, _format_path(path), message, corrected)
+                for kind, path, message, corrected in self._issues]
+
+    @property
+    def corrected(self):
+        return sum(1 for issue in self._issues if issue[3])
+
+    def summary(self):
+        """Issue counts by kind, for logs"""
+        counts = {}
+        for kind, _path, _message, _corrected in self._issues:
+            counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+
+def _format_path(path):
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(f'[{key}]' if isinstance(key, int) else f'.{key}')
+    return ''.join(reversed(keys)).lstrip('.') or '$'
+
+
+def _to_number(value):
+    if isinstance(value, str):
+        try:
+            number = float(value.strip().split()[0])
+        except (ValueError, IndexError):
+            return None
+        return int(number) if number.is_integer() else number
+    return None
+
+
+def _as_float(value):
+    if type(value) in (int, float):
+        return value
+    number = _to_number(value)
+    return 0.0 if number is None else number
+
+
+# ============= CHECKS =============
+
+
+def number(lo, hi):
+    def check(value, path, report):
+        kind = type(value)
+        if kind is not int and kind is not float:
+            coerced = _to_number(value)
+            if coerced is None:
+                report.add('type', path, f'expected a number, got {kind.__name__}')
+                return value
+            report.add('type', path, f'numeric string {value!r}', corrected=report.correct)
+            if not report.correct:
+                return value
+            value = coerced
+        if not lo <= value <= hi:
+            report.add('range', path, f'{value} outside [{lo}, {hi}]')
+        return value
+    return check
+
+
+def string():
+    def check(value, path, report):
+        if type(value) is not str:
+            report.add('type', path, f'expected a string, got {type(value).__name__}')
+        return value
+    return check
+
+
+def list_of(item_check, min_items=0, max_items=None):
+    def check(value, path, report):
+        if type(value) is not list:
+            report.add('type', path, f'expected a list, got {type(value).__name__}')
+            return value
+        if len(value) < min_items or (max_items is not None and len(value) > max_items):
+            report.add('range', path, f'{len(value)} items, expected {min_items}..{max_items or "any"}')
+        if item_check is not None:
+            for index, item in enumerate(value):
+                checked = item_check(item, (path, index), report)
+                if checked is not item:
+                    value[index] = checked
+        return value
+    return check
+
+
+def obj(fields, optional=(), after=None):
+    """Object check; every field is required unless listed in optional"""
+    compiled = tuple((key, check, key not in optional) for key, check in fields.items())
+
+    def check(value, path, report):
+        if type(value) is not dict:
+            report.add('type', path, f'expected an object, got {type(value).__name__}')
+            return value
+        for key, field_check, required in compiled:
+            field = value.get(key, _MISSING)
+            if field is _MISSING:
+                if required:
+                    report.add('missing', (path, key), 'required field is missing')
+                continue
+            checked = field_check(field, (path, key), report)
+            if checked is not field:
+                value[key] = checked
+        if after is not None:
+            after(value, path, report)
+        return value
+    return check
+
+
+def _reconcile(container, key, actual, tolerance, path, report, what):
+    stated = container.get(key)
+    if type(stated) in (int, float) and abs(stated - actual) <= tolerance:
+        return
+    report.add('total_mismatch', (path, key), f'{what} is {stated!r}, recomputed {actual}',
+               corrected=report.correct)
+    if report.correct:
+        container[key] = actual
+
+
+# ============= TOTALS =============
+
+
+def _meal_totals(meal, path, report):
+    items = meal.get('food_items')
+    if type(items) is not list:
+        return
+    calories = protein = carbs = fats = 0.0
+    for item in items:
+        if type(item) is dict:
+            calories += _as_float(item.get('calories'))
+            protein += _as_float(item.get('protein'))
+            carbs += _as_float(item.get('carbs'))
+            fats += _as_float(item.get('fats'))
+    week = report.week
+    week[0] += calories
+    week[1] += protein
+    week[2] += carbs
+    week[3] += fats
+    _reconcile(meal, 'total_meal_calories', round(calories), CALORIE_TOLERANCE, path, report,
+               'total_meal_calories')
+
+
+def _day_totals(day, path, report):
+    report.day_count += 1
+    meals = day.get('meals')
+    if type(meals) is not list:
+        return
+    total = sum(_as_float(meal.get('total_meal_calories')) for meal in meals if type(meal) is dict)
+    _reconcile(day, 'daily_total_calories', round(total), CALORIE_TOLERANCE, path, report,
+               'daily_total_calories')
+
+
+def _plan_totals(plan, path, report):
+    breakdown = plan.get('macronutrient_breakdown')
+    if type(breakdown) is dict:
+        grams = [_as_float(breakdown.get(f'{macro}_grams')) for macro in ('protein', 'carbs', 'fats')]
+        energy = [grams[0] * 4, grams[1] * 4, grams[2] * 9]
+        total_energy = sum(energy)
+        if total_energy > 0:
+            bpath = (path, 'macronutrient_breakdown')
+            for macro, kcal in zip(('protein', 'carbs', 'fats'), energy):
+                _reconcile(breakdown, f'{macro}_percentage', round(kcal * 100 / total_energy),
+                           PERCENT_TOLERANCE, bpath, report, f'{macro}_percentage')
+
+    summary = plan.get('weekly_summary')
+    days = plan.get('meal_plan')
+    if type(summary) is not dict or type(days) is not list or not report.day_count:
+        return
+    total = round(sum(_as_float(day.get('daily_total_calories')) for day in days if type(day) is dict))
+    spath = (path, 'weekly_summary')
+    day_count = report.day_count
+    _, protein, carbs, fats = report.week
+    _reconcile(summary, 'total_calories', total, CALORIE_TOLERANCE, spath, report, 'total_calories')
+    _reconcile(summary, 'average_daily_calories', round(total / day_count), CALORIE_TOLERANCE, spath, report,
+               'average_daily_calories')
+    _reconcile(summary, 'average_protein', round(protein / day_count, 1), GRAM_TOLERANCE, spath, report,
+               'average_protein')
+    _reconcile(summary, 'average_carbs', round(carbs / day_count, 1), GRAM_TOLERANCE, spath, report,
+               'average_carbs')
+    _reconcile(summary, 'average_fats', round(fats / day_count, 1), GRAM_TOLERANCE, spath, report,
+               'average_fats')
+
+
+# ============= SCHEMA =============
+
+FOOD_ITEM = obj({
+    'item': string(),
+    'quantity': string(),
+    'calories': number(0, 3000),
+    'protein': number(0, 300),
+    'carbs': number(0, 500),
+    'fats': number(0, 300),
+}, optional=('quantity',))
+
+MEAL = obj({
+    'meal_type': string(),
+    'time': string(),
+    'meal_name': string(),
+    'food_items': list_of(FOOD_ITEM, min_items=1),
+    'total_meal_calories': number(0, 5000),
+    'ingredients': list_of(None),
+    'recipe_steps': list_of(None),
+    'cooking_time': string(),
+    'difficulty_level': string(),
+    'notes': string(),
+}, optional=('time', 'ingredients', 'recipe_steps', 'cooking_time', 'difficulty_level', 'notes'),
+    after=_meal_totals)
+
+DAY = obj({
+    'day': number(1, 7),
+    'day_name': string(),
+    'meals': list_of(MEAL, min_items=1, max_items=8),
+    'daily_total_calories': number(0, 10000),
+}, after=_day_totals)
+
+PLAN = obj({
+    'daily_calorie_target': number(800, 6000),
+    'bmr': number(500, 4000),
+    'tdee': number(600, 7000),
+    'calorie_adjustment': number(-1500, 1500),
+    'macronutrient_breakdown': obj({
+        'protein_grams': number(0, 500),
+        'protein_percentage': number(0, 100),
+        'carbs_grams': number(0, 1000),
+        'carbs_percentage': number(0, 100),
+        'fats_grams': number(0, 400),
+        'fats_percentage': number(0, 100),
+    }),
+    'meal_plan': list_of(DAY, min_items=7, max_items=7),
+    'snack_options': list_of(None),
+    'hydration_guidelines': obj({'daily_water_liters': number(0, 10)}),
+    'meal_timing': obj({}),
+    'nutrition_tips': list_of(string()),
+    'supplement_recommendations': list_of(None),
+    'dietary_restrictions_applied': obj({}),
+    'weekly_summary': obj({
+        'total_calories': number(0, 70000),
+        'average_daily_calories': number(0, 10000),
+        'average_protein': number(0, 1000),
+        'average_carbs': number(0, 2000),
+        'average_fats': number(0, 1000),
+    }),
+}, optional=('snack_options', 'meal_timing', 'nutrition_tips', 'supplement_recommendations',
+             'dietary_restrictions_applied'), after=_plan_totals)
+
+
+def validate_plan(plan, correct=None):
+    """Check plan against the schema and reconcile its totals; returns a ValidationReport"""
+    if correct is None:
+        correct = PLAN_VALIDATION == 'correct'
+    report = ValidationReport(correct)
+    PLAN(plan, None, report)
+    return report
@@ -0,0 +1,59 @@
+"""
+Field projection for plan responses (``?fields=``).
+
+``fields`` is a comma-separated list of dotted paths relative to the
+returned object, e.g. ``meal_plan.day_name,meal_plan.meals.meal_name``
+on a plan or ``meals.meal_name,daily_total_calories`` on a single day.
+Lists are traversed transparently, so ``meal_plan.meals.meal_name``
+keeps the meal names of every meal of every day.
+
+Projection builds new containers only along the selected paths; selected
+leaves and subtrees are shared with the stored plan, never copied.
+"""
+
+from functools import lru_cache
+
+MAX_FIELDS_LENGTH = 1024
+
+
+class InvalidFields(ValueError):
+    """Raised for a malformed ``fields`` parameter"""
+
+
+@lru_cache(maxsize=256)
+def parse_fields(spec: str):
+    """Compile a fields spec into a nested {key: subtree or None} dict"""
+    if len(spec) > MAX_FIELDS_LENGTH:
+        raise InvalidFields(f'fields parameter longer than {MAX_FIELDS_LENGTH} characters')
+
+    tree = {}
+    for path in spec.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        keys = path.split('.')
+        if not all(keys):
+            raise InvalidFields(f'Invalid field path: {path!r}')
+        node = tree
+        for key in keys[:-1]:
+            child = node.get(key, {})
+            if child is None:
+                # A shorter path already selects the whole subtree
+                break
+            node = node.setdefault(key, child)
+        else:
+            node[keys[-1]] = None
+    if not tree:
+        raise InvalidFields('fields parameter selects nothing')
+    return tree
+
+
+def project(value, tree):
+    """Select the paths in tree from value without copying unselected data"""
+    if tree is None:
+        return value
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    return value
@@ -0,0 +1,193 @@
+"""
+Response encoding for the Diet Plan API: fast JSON, compression and ETags.
+
+* ``JSON_ENCODER`` picks the encoder used for responses and log records:
+  ``orjson`` (default when installed) or ``stdlib``.
+* Responses of at least ``COMPRESS_MIN_BYTES`` are compressed with brotli
+  (when the ``brotli`` package is installed) or gzip, following the
+  client's Accept-Encoding.
+* Stored plans are served with strong ETags derived from the plan hash;
+  a matching If-None-Match returns 304 without a body.
+
+Serialization time and bytes on the wire are recorded per endpoint in
+``response_serialization_seconds`` and ``response_bytes``.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+from monitoring import RESPONSE_BYTES, RESPONSE_SERIALIZATION_TIME, UNMATCHED_ENDPOINT
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'orjson' if orjson else 'stdlib')
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+
+def _stdlib_dumps(obj, sort_keys=False):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                      sort_keys=sort_keys, default=str).encode('utf-8')
+
+
+def _orjson_dumps(obj, sort_keys=False):
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=str, option=option)
+
+
+ENCODERS = {'stdlib': _stdlib_dumps}
+if orjson is not None:
+    ENCODERS['orjson'] = _orjson_dumps
+
+if JSON_ENCODER not in ENCODERS:
+    raise ValueError(f"Unknown JSON_ENCODER {JSON_ENCODER!r}; choose from {', '.join(ENCODERS)}")
+
+dumps = ENCODERS[JSON_ENCODER]
+
+
+def dumps_str(obj):
+    """JSON text for log records"""
+    return dumps(obj).decode('utf-8')
+
+
+def content_hash(obj):
+    """Hex digest of the canonical (key-sorted) JSON encoding of obj"""
+    return hashlib.sha256(dumps(obj, sort_keys=True)).hexdigest()
+
+
+def representation_etag(plan_id, *variant):
+    """Strong ETag for a plan, or for a projection/slice of it"""
+    variant = [part for part in variant if part]
+    if not variant:
+        return plan_id
+    return hashlib.sha256('|'.join([plan_id, *variant]).encode('utf-8')).hexdigest()
+
+
+def matching_etag(etag):
+    """The If-None-Match tag matching etag in any of its encoded variants, if any"""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    for candidate in (etag, f'{etag}-br', f'{etag}-gzip'):
+        if if_none_match.contains(candidate):
+            return candidate
+    return None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by the configured encoder"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        started = time.perf_counter()
+        body = dumps(obj)
+        g.serialize_seconds = g.get('serialize_seconds', 0.0) + time.perf_counter() - started
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _accepted_encodings(header):
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding.lower()] = q
+    return accepted
+
+
+def negotiate_encoding(header):
+    accepted = _accepted_encodings(header or '')
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseEncoding:
+    """Flask hooks compressing large responses and recording their size"""
+
+    def __init__(self, app=None, min_size=COMPRESS_MIN_BYTES):
+        self.min_size = min_size
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.json = FastJSONProvider(app)
+        app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        rule = request.url_rule
+        endpoint = rule.rule if rule is not None else UNMATCHED_ENDPOINT
+
+        serialize_seconds = g.get('serialize_seconds')
+        if serialize_seconds is not None:
+            RESPONSE_SERIALIZATION_TIME.labels(endpoint=endpoint).observe(serialize_seconds)
+
+        encoding = None
+        if self._should_compress(response):
+            encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+            response.vary.add('Accept-Encoding')
+
+        etag, weak = response.get_etag()
+        if etag:
+            if encoding is not None:
+                # Strong ETags must differ between representations
+                response.set_etag(f'{etag}-{encoding}', weak=weak)
+            response.make_conditional(request.environ)
+
+        if response.status_code == 304:
+            encoding = None
+        elif encoding is not None:
+            response.set_data(compress(response.get_data(), encoding))
+            response.headers['Content-Encoding'] = encoding
+
+        if not response.direct_passthrough:
+            RESPONSE_BYTES.labels(endpoint=endpoint, encoding=encoding or 'identity').observe(
+                response.content_length or 0
+            )
+        return response
+
+    def _should_compress(self, response):
+        if response.direct_passthrough or response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        if not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        return (response.content_length or 0) >= self.min_size
@@ -0,0 +1,219 @@
+"""
+Non-blocking structured logging for the Diet Plan API.
+
+Request handlers log through a QueueHandler that only ever does a
+``put_nowait`` onto a bounded in-memory queue; a QueueListener thread
+formats records as JSON and writes them to stdout. When the queue is full
+(stdout pipe stalled) records are dropped and counted instead of blocking
+the worker.
+
+Before a record is queued it passes two cheap filters:
+
+* sampling - INFO and DEBUG records are kept with probability
+  ``LOG_INFO_SAMPLE_RATE`` (default 1.0, keep everything),
+* rate limiting - a token bucket per level, configured with
+  ``LOG_RATE_LIMITS`` as ``LEVEL=records_per_second`` pairs
+  (default ``DEBUG=50,INFO=100,WARNING=50``; unlisted levels are unlimited).
+
+Every JSON record carries the request id and profile hash of the request
+it was emitted in, plus any ``extra`` fields (e.g. stage timings).
+"""
+
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+from monitoring import LOG_RECORDS_DROPPED
+from serialization import dumps_str
+
+LOGGER_NAME = 'diet_api'
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_INFO_SAMPLE_RATE = float(os.environ.get('LOG_INFO_SAMPLE_RATE', 1.0))
+LOG_RATE_LIMITS = os.environ.get('LOG_RATE_LIMITS', 'DEBUG=50,INFO=100,WARNING=50')
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message'}
+
+
+def profile_hash(user_data: dict) -> str:
+    """Short stable hash identifying a user profile without logging its contents"""
+    canonical = json.dumps(user_data, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+
+class JsonFormatter(logging.Formatter):
+    """Renders a record and its extra fields as one JSON object per line"""
+
+    def __init__(self, dumps=None):
+        super().__init__()
+        self.dumps = dumps or dumps_str
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Rendered before queueing (NonBlockingQueueHandler.prepare)
+            entry['exception'] = record.exc_text
+        return self.dumps(entry)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attaches the current request id and profile hash to each record"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.profile_hash = g.get('profile_hash')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of INFO and lower records"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or self.rate >= 1.0:
+            return True
+        if random.random() < self.rate:
+            return True
+        LOG_RECORDS_DROPPED.labels(reason='sampled').inc()
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per log level"""
+
+    def __init__(self, limits):
+        super().__init__()
+        now = time.monotonic()
+        # level -> [tokens, last refill, rate]
+        self._buckets = {level: [rate, now, rate] for level, rate in limits.items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec):
+        limits = {}
+        for part in filter(None, (p.strip() for p in spec.split(','))):
+            level, _, rate = part.partition('=')
+            limits[logging.getLevelName(level.strip().upper())] = float(rate)
+        return cls(limits)
+
+    def filter(self, record):
+        bucket = self._buckets.get(record.levelno)
+        if bucket is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            tokens, last, rate = bucket
+            tokens = min(rate, tokens + (now - last) * rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return True
+            bucket[0] = tokens
+        LOG_RECORDS_DROPPED.labels(reason='rate_limited').inc()
+        return False
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records rather than waiting on a full queue"""
+
+    def prepare(self, record):
+        """Copy of record with args merged into msg and the traceback in exc_text, not in msg"""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            # Frames and traceback stay out of the queue
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason='queue_full').inc()
+
+
+_listener = None
+
+
+def configure_logging(level=LOG_LEVEL, stream=None, formatter=None):
+    """Route the ``diet_api`` logger through the background queue (idempotent)"""
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(formatter or JsonFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(LOG_INFO_SAMPLE_RATE))
+    handler.addFilter(RateLimitFilter.from_spec(LOG_RATE_LIMITS))
+
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
+
+
+def get_logger(name=None):
+    return logging.getLogger(f'{LOGGER_NAME}.{name}' if name else LOGGER_NAME)
+
+
+class RequestIdMiddleware:
+    """Assigns each request an id (honouring X-Request-ID) and echoes it back"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+
+    def _after_request(self, response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
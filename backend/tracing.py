@@ -0,0 +1,183 @@
+"""
+Per-stage latency breakdown for API requests.
+
+Each request gets a StageTimer on ``flask.g``. Route handlers and
+DietPlanGenerator record their stages into it (validation, queue wait,
+prompt building, model time-to-first-token, model total, parse,
+serialize) and RequestTracing publishes the result three ways:
+
+* a ``Server-Timing`` response header (durations in milliseconds),
+* the ``request_stage_seconds`` Prometheus histogram, one child per stage,
+* optionally, OTLP-compatible JSON spans appended to ``SPAN_EXPORT_PATH``
+  (one ``resourceSpans`` document per line, the OpenTelemetry collector
+  file-exporter format).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+from monitoring import REQUEST_STAGE_LATENCY, UNMATCHED_ENDPOINT
+
+SERVICE_NAME = 'diet-plan-api'
+
+# Local file for OTLP JSON spans; unset disables span export
+SPAN_EXPORT_PATH = os.environ.get('SPAN_EXPORT_PATH')
+
+
+class StageTimer:
+    """Collects named stage durations for one request"""
+
+    __slots__ = ('started_ns', 'stages')
+
+    def __init__(self):
+        self.started_ns = time.time_ns()
+        self.stages = []
+
+    def record(self, name, seconds, start_ns=None):
+        if start_ns is None:
+            start_ns = time.time_ns() - int(seconds * 1e9)
+        self.stages.append((name, start_ns, seconds))
+
+    @contextmanager
+    def stage(self, name):
+        start_ns = time.time_ns()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, start_ns)
+
+    def as_dict(self):
+        """Stage durations in milliseconds, keyed by stage name"""
+        return {name: round(seconds * 1000, 3) for name, _start, seconds in self.stages}
+
+    def server_timing(self):
+        return ', '.join(f'{name};dur={seconds * 1000:.3f}' for name, _start, seconds in self.stages)
+
+
+class SpanExporter:
+    """Writes request traces as OTLP JSON lines from a background thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, name, timer, end_ns, attributes):
+        self._queue.put((name, timer.started_ns, list(timer.stages), end_ns, attributes))
+
+    def _run(self):
+        with open(self.path, 'a', encoding='utf-8') as out:
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for item in batch:
+                    out.write(json.dumps(self._to_otlp(*item), separators=(',', ':')))
+                    out.write('\n')
+                out.flush()
+
+    @staticmethod
+    def _to_otlp(name, started_ns, stages, end_ns, attributes):
+        # Queue wait starts before the request reached the worker
+        started_ns = min([started_ns] + [start_ns for _name, start_ns, _seconds in stages])
+        trace_id = os.urandom(16).hex()
+        root_id = os.urandom(8).hex()
+        spans = [{
+            'traceId': trace_id,
+            'spanId': root_id,
+            'name': name,
+            'kind': 2,
+            'startTimeUnixNano': str(started_ns),
+            'endTimeUnixNano': str(end_ns),
+            'attributes': [_attribute(key, value) for key, value in attributes.items()],
+        }]
+        for stage_name, start_ns, seconds in stages:
+            spans.append({
+                'traceId': trace_id,
+                'spanId': os.urandom(8).hex(),
+                'parentSpanId': root_id,
+                'name': stage_name,
+                'kind': 1,
+                'startTimeUnixNano': str(start_ns),
+                'endTimeUnixNano': str(start_ns + int(seconds * 1e9)),
+            })
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_attribute('service.name', SERVICE_NAME)]},
+            'scopeSpans': [{'scope': {'name': SERVICE_NAME}, 'spans': spans}],
+        }]}
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+def _queue_wait_seconds(header):
+    """Time since the proxy's X-Request-Start stamp (t=<epoch> in s, ms or µs)"""
+    try:
+        stamp = float(header.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    # Normalise whichever unit the proxy used to seconds
+    while stamp > 1e11:
+        stamp /= 1000
+    wait = time.time() - stamp
+    return wait if wait >= 0 else None
+
+
+def current_timer():
+    """The active request's StageTimer, or None outside a traced request"""
+    return g.get('stage_timer')
+
+
+class RequestTracing:
+    """Flask hooks publishing each request's StageTimer"""
+
+    def __init__(self, app=None, export_path=SPAN_EXPORT_PATH):
+        self.exporter = SpanExporter(export_path) if export_path else None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        timer = g.stage_timer = StageTimer()
+        queue_start = request.headers.get('X-Request-Start')
+        if queue_start:
+            wait = _queue_wait_seconds(queue_start)
+            if wait is not None:
+                timer.record('queue_wait', wait)
+
+    def _after_request(self, response):
+        timer = g.get('stage_timer')
+        if timer is None or not timer.stages:
+            return response
+
+        response.headers['Server-Timing'] = timer.server_timing()
+        for name, _start, seconds in timer.stages:
+            REQUEST_STAGE_LATENCY.labels(stage=name).observe(seconds)
+
+        if self.exporter is not None:
+            rule = request.url_rule
+            self.exporter.export(
+                f'{request.method} {rule.rule if rule is not None else UNMATCHED_ENDPOINT}',
+                timer, time.time_ns(),
+                {'http.method': request.method, 'http.status_code': response.status_code}
+            )
+        return response
@@ -0,0 +1,229 @@
+"""
+Time-budgeted local search over a whole weekly plan.
+
+WeekOptimizer starts from a plan WeeklyMealPlanner generated (greedy or
+day-fitted) and swaps single meals for other candidates of the same slot
+while the plan's cost goes down, until the wall-clock budget runs out or
+no sampled swap helps any more. The cost adds up:
+
+* each day's distance from target_calories and the protein, carb and fat
+  targets (weighted like meal_fitting),
+* the week's shortfall against recommended fiber, calcium, iron and
+  vitamin C intake,
+* dishes repeated within one of the planner's three-day variety windows,
+* each meal's score shortfall against its slot's best candidate.
+
+The plan is held as days x slots x nutrients, with the day totals, week
+totals and per-window dish counts kept up to date. A move picks one meal
+and evaluates up to OPTIMIZE_SAMPLE candidates for it at once: their
+cost deltas are array operations over the candidates' nutrient rows,
+never a recomputation of the plan's totals.
+
+Fallback meals may be replaced by any candidate of their slot; meals
+edited by hand, and slots without candidates, stay in place but count
+towards the totals.
+"""
+
+import time
+
+import numpy as np
+
+from food_catalog import MealSelection
+from meal_fitting import CALORIE_WEIGHT, FIT_BAND, MACRO_WEIGHT, MACRO_TARGETS, SCORE_WEIGHT
+
+WEEK_BUDGET_MS = 20
+
+# Candidates evaluated per move
+OPTIMIZE_SAMPLE = 64
+
+# Smallest cost decrease a swap must bring (below it, float noise between duplicate rows)
+OPTIMIZE_MIN_GAIN = 1e-6
+
+# Stop after this many moves in a row without improvement, per movable meal
+OPTIMIZE_PATIENCE = 3
+
+# Recommended daily intake the week is measured against (see _detailed_nutrition_analysis)
+MICRO_TARGETS = {'fiber': 25, 'calcium': 1000, 'iron': 8, 'vitamin_c': 65}
+
+MICRO_WEIGHT = 1.0
+REPEAT_WEIGHT = 0.5
+
+NUTRIENTS = ('calories', *MACRO_TARGETS, *MICRO_TARGETS)
+
+# Days per variety window, as in WeeklyMealPlanner.generate_weekly_plan
+VARIETY_DAYS = 3
+
+
+class _SlotPool:
+    """A meal slot's candidate rows with their nutrients, dish codes and score costs"""
+
+    __slots__ = ('rows', 'nutrients', 'codes', 'costs', 'weights', 'best', 'spread')
+
+    def __init__(self, index, rows, weights, columns, codes):
+        self.rows = rows
+        features = index.features[rows]
+        self.nutrients = features[:, columns].astype(np.float64)
+        self.codes = codes[rows]
+        scores = features @ weights
+        self.weights = weights
+        self.best = float(scores.max())
+        self.spread = float(scores.max() - scores.min()) or 1.0
+        self.costs = SCORE_WEIGHT * (self.best - scores.astype(np.float64)) / self.spread
+
+    def cost(self, features):
+        """Score cost of any food, relative to this pool's best"""
+        return SCORE_WEIGHT * (self.best - float(features @ self.weights)) / self.spread
+
+
+class WeekOptimizer:
+    """Anytime local search improving a weekly plan's adherence, coverage and variety"""
+
+    def __init__(self, planner, seed=0):
+        self.planner = planner
+        self.index = planner.food_index
+        self.rng = np.random.default_rng(seed)
+        profile = planner.user_profile
+
+        # Daily targets of the adherence terms, and weights per unit of relative miss
+        adherence = {'calories': (profile['target_calories'], CALORIE_WEIGHT)}
+        for nutrient, key in MACRO_TARGETS.items():
+            if (profile.get(key) or 0) > 0:
+                adherence[nutrient] = (profile[key], MACRO_WEIGHT)
+        positions = {nutrient: position for position, nutrient in enumerate(NUTRIENTS)}
+        self.adherence = [positions[nutrient] for nutrient in adherence]
+        self.daily = np.array([target for target, _weight in adherence.values()], dtype=np.float64)
+        self.adherence_weights = np.array([weight for _target, weight in adherence.values()]) / self.daily
+        self.micro = [positions[nutrient] for nutrient in MICRO_TARGETS]
+        self.weekly = np.array(list(MICRO_TARGETS.values()), dtype=np.float64) * len(planner.days)
+        self.columns = [self.index.feature_index[nutrient] for nutrient in NUTRIENTS]
+        self._pools = {}
+
+    def _pool(self, meal_type, calorie_target):
+        pool = self._pools.get(meal_type)
+        if pool is None:
+            rows = np.asarray(self.planner._candidate_rows(meal_type, calorie_target, FIT_BAND))
+            pool = self._pools[meal_type] = _SlotPool(
+                self.index, rows, self.planner._score_weights(meal_type), self.columns, self.index.name_codes()
+            ) if len(rows) else False
+        return pool
+
+    # ============= COST TERMS =============
+
+    def _adherence(self, totals):
+        """Distance of day totals (... x nutrients) from the daily targets"""
+        return np.abs(totals[..., self.adherence] - self.daily) @ self.adherence_weights
+
+    def _coverage(self, week):
+        """Shortfall of week totals (... x nutrients) against the weekly micronutrient targets"""
+        return MICRO_WEIGHT * np.maximum(0.0, 1.0 - week[..., self.micro] / self.weekly).sum(axis=-1)
+
+    # ============= SEARCH =============
+
+    def optimize(self, weekly_plan, budget_ms=WEEK_BUDGET_MS):
+        """(improved plan, stats) within budget_ms of wall-clock time"""
+        started = time.perf_counter()
+        deadline = started + budget_ms / 1000
+        planner = self.planner
+        days = list(weekly_plan)
+        slots = [list(weekly_plan[day]) for day in days]
+        width = max(len(meals) for meals in slots)
+        codes = self.index.name_codes()
+
+        nutrients = np.zeros((len(days), width, len(NUTRIENTS)))
+        rows = np.full((len(days), width), -1, dtype=np.int64)
+        score_costs = np.zeros((len(days), width))
+        movable = []
+        for d, day in enumerate(days):
+            for s, meal_type in enumerate(slots[d]):
+                meal = weekly_plan[day][meal_type]
+                nutrients[d, s] = [meal.get(nutrient, 0) or 0 for nutrient in NUTRIENTS]
+                if isinstance(meal, MealSelection):
+                    if meal.edited:
+                        continue
+                    rows[d, s] = meal.row
+                elif meal.get('meal_category') != 'Fallback':
+                    continue
+                pool = self._pool(meal_type, planner.calorie_distribution.get(meal_type, 300))
+                if pool:
+                    # A fallback meal scores like the slot's worst candidate
+                    score_costs[d, s] = pool.cost(self.index.features[meal.row]) if rows[d, s] >= 0 else SCORE_WEIGHT
+                    movable.append((d, s, pool))
+
+        totals = nutrients.sum(axis=1)
+        week = totals.sum(axis=0)
+        windows = [d // VARIETY_DAYS for d in range(len(days))]
+        counts = np.zeros((max(windows) + 1, self.index.size), dtype=np.int64)
+        for d in range(len(days)):
+            present = rows[d][rows[d] >= 0]
+            np.add.at(counts[windows[d]], codes[present], 1)
+
+        day_costs = self._adherence(totals)
+        coverage = self._coverage(week)
+        cost = initial = self._cost(day_costs, coverage, counts, score_costs)
+
+        iterations = moves = stale = 0
+        while movable and time.perf_counter() < deadline and stale < OPTIMIZE_PATIENCE * len(movable):
+            iterations += 1
+            d, s, pool = movable[self.rng.integers(len(movable))]
+            offsets = np.arange(len(pool.rows))
+            if len(offsets) > OPTIMIZE_SAMPLE:
+                offsets = self.rng.choice(offsets, OPTIMIZE_SAMPLE, replace=False)
+            candidates = pool.nutrients[offsets]
+            old = nutrients[d, s]
+
+            # Cost of each candidate replacing meal (d, s), minus the current cost
+            delta = self._adherence(totals[d] - old + candidates) - day_costs[d]
+            delta += self._coverage(week - old + candidates) - coverage
+            window = counts[windows[d]]
+            old_code = codes[rows[d, s]] if rows[d, s] >= 0 else -1
+            new_codes = pool.codes[offsets]
+            # Repeats: one fewer if the old dish appeared twice or more, one more if the new one is still present
+            delta += REPEAT_WEIGHT * (window[new_codes] - (new_codes == old_code) >= 1)
+            if old_code >= 0 and window[old_code] > 1:
+                delta -= REPEAT_WEIGHT
+            delta += pool.costs[offsets] - score_costs[d, s]
+
+            best = int(np.argmin(delta))
+            if delta[best] > -OPTIMIZE_MIN_GAIN:
+                stale += 1
+                continue
+            stale = 0
+            moves += 1
+            offset = offsets[best]
+            change = pool.nutrients[offset] - old
+            nutrients[d, s] = pool.nutrients[offset]
+            totals[d] += change
+            week += change
+            if old_code >= 0:
+                window[old_code] -= 1
+            window[pool.codes[offset]] += 1
+            rows[d, s] = pool.rows[offset]
+            score_costs[d, s] = pool.costs[offset]
+            day_costs[d] = self._adherence(totals[d])
+            coverage = self._coverage(week)
+            cost += float(delta[best])
+
+        optimized = {}
+        for d, day in enumerate(days):
+            daily_plan = {}
+            for s, meal_type in enumerate(slots[d]):
+                meal = weekly_plan[day][meal_type]
+                if rows[d, s] >= 0 and not (isinstance(meal, MealSelection) and meal.row == rows[d, s]):
+                    meal = MealSelection(self.index.catalog, rows[d, s], planner.meal_schedule[meal_type],
+                                         planner.calorie_distribution.get(meal_type, 300))
+                daily_plan[meal_type] = meal
+            optimized[day] = daily_plan
+
+        stats = {
+            'initial_cost': round(initial, 4),
+            'cost': round(cost, 4),
+            'iterations': iterations,
+            'moves': moves,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+        return optimized, stats
+
+    def _cost(self, day_costs, coverage, counts, score_costs):
+        repeats = np.maximum(counts - 1, 0).sum()
+        return float(day_costs.sum() + coverage + REPEAT_WEIGHT * repeats + score_costs.sum())
+